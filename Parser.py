@@ -1,152 +1,244 @@
+from tokenStream import TokenStream, TokenCode, TOKEN_NAMES, TOKEN_CODES
+from astNodes import Program, Declaration, Assignment, Output, If, BinaryOp, Negate, Identifier, Literal
+from instrumentation import stageOf
+
+# Token type ids as plain ints, the parser only ever compares these.
+IDENTIFIER = int(TokenCode.IDENTIFIER)
+ENDLINE = int(TokenCode.ENDLINE)
+OP_ASSIGNMENT = int(TokenCode.OP_ASSIGNMENT)
+OP_COLON = int(TokenCode.OP_COLON)
+OP_LEFTSHIFT = int(TokenCode.OP_LEFTSHIFT)
+KEYWORD_INT = int(TokenCode.KEYWORD_INT)
+KEYWORD_DOUBLE = int(TokenCode.KEYWORD_DOUBLE)
+KEYWORD_OUTPUT = int(TokenCode.KEYWORD_OUTPUT)
+KEYWORD_IF = int(TokenCode.KEYWORD_IF)
+LITERAL_STRING = int(TokenCode.LITERAL_STRING)
+LITERAL_INTEGER = int(TokenCode.LITERAL_INTEGER)
+LITERAL_DOUBLE = int(TokenCode.LITERAL_DOUBLE)
+DELIMITER_LEFT_P = int(TokenCode.DELIMITER_LEFT_P)
+DELIMITER_RIGHT_P = int(TokenCode.DELIMITER_RIGHT_P)
+OP_ARITHMETIC_PLUS = int(TokenCode.OP_ARITHMETIC_PLUS)
+OP_ARITHMETIC_MINUS = int(TokenCode.OP_ARITHMETIC_MINUS)
+OP_ARITHMETIC_MULTIPLY = int(TokenCode.OP_ARITHMETIC_MULTIPLY)
+OP_ARITHMETIC_DIVIDE = int(TokenCode.OP_ARITHMETIC_DIVIDE)
+
+TYPES = (KEYWORD_INT, KEYWORD_DOUBLE, IDENTIFIER)
+STATEMENT_STARTS = (IDENTIFIER, KEYWORD_OUTPUT, KEYWORD_IF)
+ADDITIVE = (OP_ARITHMETIC_PLUS, OP_ARITHMETIC_MINUS)
+MULTIPLICATIVE = (OP_ARITHMETIC_MULTIPLY, OP_ARITHMETIC_DIVIDE)
+LITERAL_NUMBERS = (LITERAL_INTEGER, LITERAL_DOUBLE)
+RELATIONAL = tuple(int(code) for code in TokenCode if code.name.startswith("OP_RELATIONAL_"))
+
+def print_trace(label, parse_tree, node):
+    # The output the parser used to print after every statement.
+    print(parse_tree)
+    print(label)
+
 class Parser:
-    def __init__(self, tokens):
+    def __init__(self, tokens, trace = None, instrumentation = None):
+        # Takes a TokenStream straight from the lexer, or any iterable of (type, token, ...) tuples (a list, lexicalAnalyzer.iter_tokens(), ...).
+        # Only one token of lookahead is kept, so a generator is never materialized.
+        # trace is an optional callback trace(label, parse_tree, node), called after every statement. print_trace gives the old console output.
+        # The matched tokens are only collected into parse_tree when tracing.
+        # instrumentation (see instrumentation.py) times parse() and counts the tokens and statements.
         self.tokens = tokens
+        self.trace = trace
+        self.instrumentation = instrumentation
+        self.token_stream = self.read_codes(tokens)
+        self.next_token = next(self.token_stream, None)
+        self.current_type = None
         self.current_token = None
         self.token_index = 0
         self.parse_tree = []
 
+    def read_codes(self, tokens):
+        # Yields (type id, token) pairs, token is the index into the stream or the original tuple.
+        if isinstance(tokens, TokenStream):
+            return zip(tokens.types, range(len(tokens)))
+        return ((TOKEN_CODES.get(token[0], TokenCode.err), token) for token in tokens)
+
+    def token_tuple(self):
+        # (type, token) of the current token.
+        if isinstance(self.tokens, TokenStream):
+            return (TOKEN_NAMES[self.current_type], self.tokens.lexeme(self.current_token))
+        return self.current_token
+
+    def token_text(self):
+        if isinstance(self.tokens, TokenStream):
+            return self.tokens.lexeme(self.current_token)
+        return self.current_token[1]
+
+    def current_line(self):
+        if isinstance(self.tokens, TokenStream):
+            return self.tokens.lines[self.current_token]
+        return self.current_token[2] if len(self.current_token) > 2 else None
+
+    def current_name(self):
+        return TOKEN_NAMES[self.current_type]
+
+    def emit(self, label, node):
+        if self.trace is not None:
+            self.trace(label, self.parse_tree, node)
+        return node
+
     def consume(self):
-        self.current_token = self.tokens[self.token_index]
+        if self.next_token is None:
+            raise SyntaxError(f"Unexpected end of input after {self.current_name() if self.current_token is not None else 'nothing'}")
+        self.current_type, self.current_token = self.next_token
+        self.next_token = next(self.token_stream, None)
         self.token_index += 1
 
     def match(self, expected_type):
-        if self.current_token[0] == expected_type:
-            self.parse_tree.append(self.current_token)
+        if self.current_type == expected_type:
+            if self.trace is not None:
+                self.parse_tree.append(self.token_tuple())
             self.consume()
         else:
-            raise SyntaxError(f"Expected {expected_type} but got {self.current_token[0]}")
+            raise SyntaxError(f"Expected {TOKEN_NAMES[expected_type]} but got {self.current_name()}")
 
-    def program(self):
-        self.declarations()
-        self.statements()
+    def program(self, statements):
+        self.declarations(statements)
+        self.statements(statements)
         
-        if self.current_token[0] != 'ENDLINE':
-            raise SyntaxError(f"Expected ENDLINE at the end, but got {self.current_token[0]}")
+        if self.current_type != ENDLINE:
+            raise SyntaxError(f"Expected ENDLINE at the end, but got {self.current_name()}")
 
-    def declarations(self):
-        while self.current_token[0] == 'IDENTIFIER':
-            self.declaration_assignment()
-            if self.current_token[0] != 'ENDLINE':
-                raise SyntaxError(f"Expected ENDLINE after declaration, but got {self.current_token[0]}")
+    def declarations(self, statements):
+        while self.current_type == IDENTIFIER:
+            statements.append(self.declaration_assignment())
+            if self.current_type != ENDLINE:
+                raise SyntaxError(f"Expected ENDLINE after declaration, but got {self.current_name()}")
 
     def declaration_assignment(self):
-        self.match('IDENTIFIER')
-        if self.current_token[0] != 'OP_ASSIGNMENT':
+        name, line = self.token_text(), self.current_line()
+        self.match(IDENTIFIER)
+        if self.current_type != OP_ASSIGNMENT:
             # Variable Declaration
-            self.match('OP_COLON')
-            self.type()
+            self.match(OP_COLON)
+            return self.emit(".. Declaration", Declaration(name, self.type(), line))
         else:
             # Assignment as Declaration
-            self.match('OP_ASSIGNMENT')
-            self.expression()
-            print(self.parse_tree)
-            print(".. Assignment Statement")
+            self.match(OP_ASSIGNMENT)
+            return self.emit(".. Assignment Statement", Assignment(name, self.expression(), line))
 
     def assignment_statement(self):
-        self.match(':=')
-        self.expression()
-        print(self.parse_tree)
+        name, line = self.token_text(), self.current_line()
+        self.match(IDENTIFIER)
+        self.match(OP_ASSIGNMENT)
+        return self.emit(".. Assignment Statement", Assignment(name, self.expression(), line))
 
     def type(self):
-        if self.current_token[0] in ['KEYWORD_INT', 'KEYWORD_DOUBLE', 'IDENTIFIER']:
-            self.match(self.current_token[0])
-            print(self.parse_tree)
-            print(".. Declaration")
+        if self.current_type in TYPES:
+            data_type = self.current_type
+            self.match(self.current_type)
+            return data_type
         else:
-            raise SyntaxError(f"Invalid type: {self.current_token[0]}")
+            raise SyntaxError(f"Invalid type: {self.current_name()}")
         
 
-    def statements(self):
-        while self.current_token[0] in ['IDENTIFIER', 'KEYWORD_OUTPUT', 'KEYWORD_IF']:
-            self.statement()
+    def statements(self, statements):
+        while self.current_type in STATEMENT_STARTS:
+            statements.append(self.statement())
 
     def statement(self):
-        if self.current_token[0] == 'IDENTIFIER':
-            self.assignment_statement()
-        elif self.current_token[0] == 'KEYWORD_OUTPUT':
-            self.output_statement()
-        elif self.current_token[0] == 'KEYWORD_IF':
-            self.if_statement()
+        if self.current_type == IDENTIFIER:
+            return self.assignment_statement()
+        elif self.current_type == KEYWORD_OUTPUT:
+            return self.output_statement()
+        elif self.current_type == KEYWORD_IF:
+            return self.if_statement()
+        raise SyntaxError(f"Expected a statement but got {self.current_name()}")
 
     def output_statement(self):
-        self.match('KEYWORD_OUTPUT')
-        self.match('OP_LEFTSHIFT')
-        self.output_params()
-
-    def output_params(self):
-        if self.current_token[0] == 'LITERAL_STRING':
-            self.match('LITERAL_STRING')
-            print(self.parse_tree)
-            print(".. Output Literal String")
+        line = self.current_line()
+        self.match(KEYWORD_OUTPUT)
+        self.match(OP_LEFTSHIFT)
+        return self.output_params(line)
+
+    def output_params(self, line):
+        if self.current_type == LITERAL_STRING:
+            value = Literal(LITERAL_STRING, self.token_text()[1:-1], self.current_line())
+            self.match(LITERAL_STRING)
+            return self.emit(".. Output Literal String", Output(value, line))
         else:
-            self.expression()
-            print(self.parse_tree)
-            print(".. Output Expression")
+            return self.emit(".. Output Expression", Output(self.expression(), line))
             
 
     def if_statement(self):
-        self.match('KEYWORD_IF')
-        self.match('DELIMITER_LEFT_P')
-        self.condition()
-        self.match('DELIMITER_RIGHT_P')
-        self.statement()
-        print(self.parse_tree)
-        print(".. If Statement")
+        line = self.current_line()
+        self.match(KEYWORD_IF)
+        self.match(DELIMITER_LEFT_P)
+        condition = self.condition()
+        self.match(DELIMITER_RIGHT_P)
+        body = self.statement()
+        return self.emit(".. If Statement", If(condition, body, line))
 
     def expression(self):
-        self.simple_expression()
+        return self.simple_expression()
 
     def simple_expression(self):
-        self.term()
-        while self.current_token[0] in ['OP_ARITHMETIC_PLUS', 'OP_ARITHMETIC_MINUS']:
-            self.match(self.current_token[0])
-            self.term()
+        node = self.term()
+        while self.current_type in ADDITIVE:
+            op, line = self.current_type, self.current_line()
+            self.match(op)
+            node = BinaryOp(op, node, self.term(), line)
+        return node
 
     def term(self):
-        self.factor()
-        while self.current_token[0] in ['OP_ARITHMETIC_MULTIPLY', 'OP_ARITHMETIC_DIVIDE']:
-            self.match(self.current_token[0])
-            self.factor()
+        node = self.factor()
+        while self.current_type in MULTIPLICATIVE:
+            op, line = self.current_type, self.current_line()
+            self.match(op)
+            node = BinaryOp(op, node, self.factor(), line)
+        return node
 
     def factor(self):
-        if self.current_token[0] == 'IDENTIFIER':
-            self.match('IDENTIFIER')
-        elif self.current_token[0] in ['LITERAL_INTEGER', 'LITERAL_DOUBLE']:
-            self.match(self.current_token[0])
-        elif self.current_token[0] == '(':
-            self.match('(')
-            self.expression()
-            self.match(')')\
+        line = self.current_line()
+        if self.current_type == IDENTIFIER:
+            node = Identifier(self.token_text(), line)
+            self.match(IDENTIFIER)
+        elif self.current_type == LITERAL_INTEGER:
+            node = Literal(LITERAL_INTEGER, int(self.token_text()), line)
+            self.match(LITERAL_INTEGER)
+        elif self.current_type == LITERAL_DOUBLE:
+            node = Literal(LITERAL_DOUBLE, float(self.token_text()), line)
+            self.match(LITERAL_DOUBLE)
+        elif self.current_type == DELIMITER_LEFT_P:
+            self.match(DELIMITER_LEFT_P)
+            node = self.expression()
+            self.match(DELIMITER_RIGHT_P)
+        elif self.current_type == OP_ARITHMETIC_MINUS:
+            # The lexer never glues the - to a number, so -5 comes in as MINUS LITERAL_INTEGER.
+            self.match(OP_ARITHMETIC_MINUS)
+            node = Negate(self.factor(), line)
+        else:
+            raise SyntaxError(f"Expected an expression but got {self.current_name()}")
+        return node
 
     def parse(self):
-        while(True):
-            self.consume()  # Start parsing from the first token
-            self.program()  # Start with the program rule
-            self.parse_tree = []
-
-            # Check if we've reached the end of the input
-            if self.token_index == len(self.tokens):
-                return
+        statements = []
+        with stageOf(self.instrumentation)("parse"):
+            while(self.next_token is not None):
+                self.consume()  # Start parsing from the first token
+                self.program(statements)  # Start with the program rule
+                self.parse_tree = []
+                # Loops until we've reached the end of the input
+        if self.instrumentation is not None:
+            self.instrumentation.count("parsedTokens", self.token_index)
+            self.instrumentation.count("statements", len(statements))
+        return Program(statements, 0)
 
     def condition(self):
-        self.expression()
-        self.relational_expression()
-
-    def relational_expression(self):
-        # Based on RES_SYM.txt
-        if self.current_token[0] == 'OP_RELATIONAL_GREATERTHANOREQUAL':
-            self.match('OP_RELATIONAL_GREATERTHANOREQUAL')
-        elif self.current_token[0] == 'OP_RELATIONAL_LESSTHANOREQUAL':
-            self.match('OP_RELATIONAL_LESSTHANOREQUAL')
-        elif self.current_token[0] == 'OP_RELATIONAL_GREATERTHAN':
-            self.match('OP_RELATIONAL_GREATERTHAN')
-        elif self.current_token[0] == 'OP_RELATIONAL_LESSTHAN':
-            self.match('OP_RELATIONAL_LESSTHAN')
-        elif self.current_token[0] == 'OP_RELATIONAL_EQUAL':
-            self.match('OP_RELATIONAL_EQUAL')
-        elif self.current_token[0] == 'OP_RELATIONAL_NOTEQUAL':
-            self.match('OP_RELATIONAL_NOTEQUAL')
-        self.expression()
+        node = self.expression()
+        return self.relational_expression(node)
+
+    def relational_expression(self, left):
+        # Based on RES_SYM.txt. Without a relational operator the condition is the expression itself.
+        if self.current_type in RELATIONAL:
+            op, line = self.current_type, self.current_line()
+            self.match(op)
+            return BinaryOp(op, left, self.expression(), line)
+        return left
 
 # Sample usage (continued)
 #tokens = [('IDENTIFIER', 'x'),('OP_COLON', ':'),('KEYWORD_INT', 'integer'),('ENDLINE', ';'),
@@ -158,9 +250,9 @@ class Parser:
 #          ('KEYWORD_IF', 'if'),('DELIMITER_LEFT_P', '('), ('IDENTIFIER','x'), ('OP_RELATIONAL_GREATERTHANOREQUAL', '>='), ('IDENTIFIER', '-5'), ('DELIMITER_RIGHT_P', ')'),('KEYWORD_OUTPUT', 'output'),('OP_LEFTSHIFT', '<<'), ('IDENTIFIER', '-5'), ('ENDLINE', ';')
 #          ]
 
-#parser = Parser(tokens)
+#parser = Parser(tokens, trace=print_trace)
 #try:
-#    parser.parse()
+#    print(parser.parse())
 #    print("Grammar is correct.")
 #except SyntaxError as e:
 #    print(f"Syntax error: {e}")
@@ -0,0 +1,224 @@
+import json # For the JSON lines format.
+from json.encoder import encode_basestring_ascii # What json.dumps() does to a string, without the checks around it.
+import mmap # For loading a binary token file without reading it.
+import os
+import struct # For the header of the binary token file.
+import sys
+from array import array # For the columns of the binary token file.
+from itertools import islice
+
+from tokenStream import TokenStream, TOKEN_NAMES
+
+# Writers of the artifacts of one analysis: the atoms, the tokens and the symbol table.
+# Where they go is a sink, a directory (DirectorySink) or a dict in memory (MemorySink). The error log goes to the same sink, see diagnostics.py.
+# What they look like is a format, any number of them can be written side by side:
+#   legacy  NOSPACES.txt, NOSPACES_LINE.txt and the padded RES_SYM.txt, byte for byte what the lexer always wrote.
+#   jsonl   atoms.jsonl, tokens.jsonl and symbols.jsonl, one JSON object per line.
+#   binary  tokens.bin, the token columns and the source as they are in memory. loadTokens() maps it back as a TokenStream without copying anything.
+# Every file is written in one open, with its lines joined in blocks, instead of one write per atom or token.
+
+default_block = 1 << 12 # Lines joined into one write.
+default_buffer = 1 << 20 # Bytes buffered by an open file.
+
+def blocks(pieces, size: int = default_block, empty = ""):
+    """ This function will join an iterable of strings (or bytes) into blocks of `size` pieces."""
+    pieces = iter(pieces)
+    block = list(islice(pieces, size))
+    while block: # A block of empty pieces is still not the end.
+        yield empty.join(block)
+        block = list(islice(pieces, size))
+
+
+class DirectorySink:
+    """ Writes every artifact as a file of one directory."""
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def prepare(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def write(self, name: str, chunks, binary: bool = False, append: bool = False) -> None:
+        """ This function will write the chunks (strings, or bytes when binary) into one file, in a single open."""
+        mode = ("a" if append else "w") + ("b" if binary else "")
+        with open(self.path(name), mode, buffering = default_buffer) as file:
+            file.writelines(chunks)
+
+class MemorySink:
+    """ Keeps every artifact in memory, files[name] is the text (or bytes) a DirectorySink would have written."""
+    def __init__(self) -> None:
+        self.files = {}
+
+    def prepare(self) -> None:
+        pass
+
+    def write(self, name: str, chunks, binary: bool = False, append: bool = False) -> None:
+        data = (b"" if binary else "").join(chunks)
+        self.files[name] = self.files[name] + data if append and name in self.files else data
+
+    def __getitem__(self, name: str):
+        return self.files[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.files
+
+def sinkFor(target):
+    """ This function will return the sink of a log directory: None stays None, a path becomes a DirectorySink, a sink is kept."""
+    if target is None or hasattr(target, "write"):
+        return target
+    return DirectorySink(os.fspath(target))
+
+
+def lexemes(stream: TokenStream):
+    """ This function will yield the text of every token, slicing a text source directly when nothing is overridden."""
+    if stream.view is None and not stream.overrides:
+        source = stream.source
+        return (source[start:end] for start, end in zip(stream.starts, stream.ends))
+    return map(stream.lexeme, range(len(stream)))
+
+def byteOffsets(stream: TokenStream) -> (array, array):
+    """ This function will return the start and end of every token as byte offsets into the UTF-8 source."""
+    source = stream.source
+    if stream.view is not None or source.isascii():
+        return stream.starts, stream.ends
+    # Characters past the ASCII range take more than one byte, walk the source once in token order.
+    starts = array("q")
+    ends = array("q")
+    position = offset = 0
+    for start, end in zip(stream.starts, stream.ends):
+        if start < position: # Tokens are in source order, but be safe about it.
+            position = offset = 0
+        offset += len(source[position:start].encode())
+        starts.append(offset)
+        offset += len(source[start:end].encode())
+        ends.append(offset)
+        position = end
+    return starts, ends
+
+
+class ArtifactWriter:
+    """ One format. Each method writes one artifact into the sink, a format without that artifact writes nothing."""
+    def writeAtoms(self, sink, atoms: list, mode: str = "w") -> None:
+        pass
+
+    def writeTokens(self, sink, stream: TokenStream, types, mode: str = "w") -> None:
+        pass
+
+    def writeSymbols(self, sink, table, mode: str = "w") -> None:
+        pass
+
+class LegacyWriter(ArtifactWriter):
+    """ The text logs the lexer always wrote."""
+    padded = tuple(f"{name:<32} token: " for name in TOKEN_NAMES) # The padding of RES_SYM.txt, done once per type instead of once per token.
+
+    def writeAtoms(self, sink, atoms: list, mode: str = "w") -> None:
+        append = mode == "a"
+        sink.write("NOSPACES.txt", blocks(map("".join, atoms)), append = append)
+        sink.write("NOSPACES_LINE.txt", blocks("".join(line) + "\n" for line in atoms if line), append = append)
+
+    def writeTokens(self, sink, stream: TokenStream, types, mode: str = "w") -> None:
+        padded = self.padded
+        lines = (f"{padded[code]}{text} \n" for code, text in zip(types, lexemes(stream)))
+        sink.write("RES_SYM.txt", blocks(lines), append = mode == "a")
+
+class JsonLinesWriter(ArtifactWriter):
+    """ One JSON object per line. Lines are 1 based like everywhere they are displayed, offsets are the ones of the token stream."""
+    # Only the lexeme needs escaping, the rest of a token's object is put together around it.
+    def writeAtoms(self, sink, atoms: list, mode: str = "w") -> None:
+        lines = (f'{{"line": {lineCount + 1}, "atoms": {json.dumps(line)}}}\n' for lineCount, line in enumerate(atoms) if line)
+        sink.write("atoms.jsonl", blocks(lines), append = mode == "a")
+
+    def writeTokens(self, sink, stream: TokenStream, types, mode: str = "w") -> None:
+        prefixes = tuple(f'{{"type": "{name}", "token": ' for name in TOKEN_NAMES)
+        lines = (
+            f'{prefixes[code]}{encode_basestring_ascii(text)}, "line": {line + 1}, "start": {start}, "end": {end}}}\n'
+            for code, text, line, start, end in zip(types, lexemes(stream), stream.lines, stream.starts, stream.ends)
+        )
+        sink.write("tokens.jsonl", blocks(lines), append = mode == "a")
+
+    def writeSymbols(self, sink, table, mode: str = "w") -> None:
+        lines = (json.dumps({"name": name, **table[name]}) + "\n" for name in table)
+        sink.write("symbols.jsonl", blocks(lines), append = mode == "a")
+
+
+# tokens.bin, little endian:
+#   header   magic, version, token count, source bytes, override bytes (BINARY_HEADER)
+#   starts   int64 per token, byte offset into the source
+#   ends     int64 per token
+#   lines    uint32 per token, starts at 0
+#   types    uint8 per token, TokenCode
+#   source   the UTF-8 source
+#   overrides  JSON {index: text} of the tokens whose text is not a slice of the source, usually empty
+# The 8 byte columns come first, so every column is aligned when the file is mapped.
+BINARY_MAGIC = b"HLTK"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sIQQQ")
+
+class BinaryWriter(ArtifactWriter):
+    """ The token stream as its columns, for tools that want the tokens without parsing text. Atoms are the lexemes of the tokens of a line."""
+    def writeTokens(self, sink, stream: TokenStream, types, mode: str = "w") -> None:
+        if mode != "w":
+            raise ValueError("tokens.bin can only be written whole.")
+        starts, ends = byteOffsets(stream)
+        source = stream.source.encode() if stream.view is None else stream.view
+        overrides = json.dumps({str(index): text for index, text in stream.overrides.items()}).encode() if stream.overrides else b""
+        columns = [array("q", starts), array("q", ends), array("I", stream.lines), array("B", types)]
+        if sys.byteorder != "little":
+            for column in columns:
+                column.byteswap()
+        header = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(stream), len(source), len(overrides))
+        sink.write("tokens.bin", [header, *columns, source, overrides], binary = True)
+
+def loadTokens(target) -> TokenStream:
+    """ This function will load tokens.bin, from a path or any buffer, as a read only TokenStream over the file's own bytes."""
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, "rb") as file:
+            # The map outlives the file object, the stream's views keep it open.
+            target = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ) if os.fstat(file.fileno()).st_size else b""
+    view = memoryview(target)
+    if len(view) < BINARY_HEADER.size:
+        raise ValueError("Not a token file, it is shorter than its header.")
+    magic, version, count, sourceSize, overrideSize = BINARY_HEADER.unpack_from(view)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError(f"Not a version {BINARY_VERSION} token file.")
+
+    position = BINARY_HEADER.size
+    columns = []
+    for typecode, itemSize in (("q", 8), ("q", 8), ("I", 4), ("B", 1)):
+        section = view[position:position + count * itemSize]
+        if sys.byteorder == "little":
+            columns.append(section.cast(typecode)) # No copy, the column is the file.
+        else:
+            column = array(typecode, section.tobytes())
+            column.byteswap()
+            columns.append(column)
+        position += count * itemSize
+    source = view[position:position + sourceSize]
+    position += sourceSize
+    if position + overrideSize > len(view):
+        raise ValueError("The token file is truncated.")
+
+    stream = TokenStream(source)
+    stream.starts, stream.ends, stream.lines, stream.types = columns
+    if overrideSize:
+        stream.overrides = {int(index): text for index, text in json.loads(bytes(view[position:position + overrideSize])).items()}
+    return stream
+
+
+formats = {
+    "legacy": LegacyWriter,
+    "jsonl": JsonLinesWriter,
+    "binary": BinaryWriter,
+}
+default_formats = ("legacy",)
+
+def writersFor(names) -> list:
+    """ This function will return a writer for every format name, raising a ValueError on an unknown one."""
+    writers = []
+    for name in names:
+        if name not in formats:
+            raise ValueError(f"Unknown log format {name!r}, expected one of {', '.join(formats)}.")
+        writers.append(formats[name]())
+    return writers
@@ -0,0 +1,232 @@
+# Nodes of the syntax tree built by Parser.parse().
+# Slotted on purpose, a generated program can have hundreds of thousands of them.
+# Line count starts at 0, like everywhere else. None when the tokens did not carry a line.
+
+from array import array # For packTree().
+
+from tokenStream import TOKEN_NAMES
+
+class Node:
+    __slots__ = ("line",)
+    fields = ()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{field}={getattr(self, field)!r}' for field in self.fields)})"
+
+    def __eq__(self, other) -> bool:
+        # Structural, the line is not part of it.
+        return type(self) is type(other) and all(getattr(self, field) == getattr(other, field) for field in self.fields)
+
+
+class Program(Node):
+    __slots__ = ("statements",)
+    fields = ("statements",)
+
+    def __init__(self, statements: list, line: int = None) -> None:
+        self.statements = statements
+        self.line = line
+
+
+class Declaration(Node):
+    """ IDENTIFIER : <type>"""
+    __slots__ = ("name", "dataType")
+    fields = ("name", "dataType")
+
+    def __init__(self, name: str, dataType: int, line: int = None) -> None:
+        self.name = name
+        self.dataType = dataType # TokenCode of the type, KEYWORD_INT, KEYWORD_DOUBLE or IDENTIFIER.
+        self.line = line
+
+
+class Assignment(Node):
+    """ IDENTIFIER := <expression>"""
+    __slots__ = ("name", "value")
+    fields = ("name", "value")
+
+    def __init__(self, name: str, value: Node, line: int = None) -> None:
+        self.name = name
+        self.value = value
+        self.line = line
+
+
+class Output(Node):
+    """ KEYWORD_OUTPUT << <output_params>"""
+    __slots__ = ("value",)
+    fields = ("value",)
+
+    def __init__(self, value: Node, line: int = None) -> None:
+        self.value = value
+        self.line = line
+
+
+class If(Node):
+    """ KEYWORD_IF ( <condition> ) <statement>"""
+    __slots__ = ("condition", "body")
+    fields = ("condition", "body")
+
+    def __init__(self, condition: Node, body: Node, line: int = None) -> None:
+        self.condition = condition
+        self.body = body
+        self.line = line
+
+
+class BinaryOp(Node):
+    """ Arithmetic or relational operation, op is the TokenCode of the operator."""
+    __slots__ = ("op", "left", "right")
+    fields = ("op", "left", "right")
+
+    def __init__(self, op: int, left: Node, right: Node, line: int = None) -> None:
+        self.op = op
+        self.left = left
+        self.right = right
+        self.line = line
+
+
+class Negate(Node):
+    """ Unary minus, the lexer always splits the - from the number after it."""
+    __slots__ = ("operand",)
+    fields = ("operand",)
+
+    def __init__(self, operand: Node, line: int = None) -> None:
+        self.operand = operand
+        self.line = line
+
+
+class Identifier(Node):
+    __slots__ = ("name", "dataType")
+    fields = ("name",)
+
+    def __init__(self, name: str, line: int = None, dataType: int = None) -> None:
+        self.name = name
+        self.line = line
+        self.dataType = dataType # KEYWORD_INT or KEYWORD_DOUBLE once optimizer.py resolved it.
+
+
+class Literal(Node):
+    """ Integer, double or string literal. value is the Python value, the quotes of a string are stripped."""
+    __slots__ = ("kind", "value")
+    fields = ("kind", "value")
+
+    def __init__(self, kind: int, value, line: int = None) -> None:
+        self.kind = kind # TokenCode of the literal.
+        self.value = value
+        self.line = line
+
+
+# Flat encoding of a tree, for caching. Pickling the node objects one by one is slow and large,
+# so a tree is written as a post-order list of ints (kind, line, then the node's own ints) plus one table of its names and literal values.
+NODE_KINDS = (Program, Declaration, Assignment, Output, If, BinaryOp, Negate, Identifier, Literal)
+
+def children(node) -> list:
+    if isinstance(node, Program):
+        return node.statements
+    if isinstance(node, (Assignment, Output)):
+        return [node.value]
+    if isinstance(node, If):
+        return [node.condition, node.body]
+    if isinstance(node, BinaryOp):
+        return [node.left, node.right]
+    if isinstance(node, Negate):
+        return [node.operand]
+    return []
+
+def toDict(node: Node) -> dict:
+    """ This function will turn a tree into plain dicts and lists for JSON, with token codes as their names."""
+    result = {"node": type(node).__name__, "line": node.line}
+    for field in node.fields:
+        item = getattr(node, field)
+        if isinstance(item, Node):
+            item = toDict(item)
+        elif isinstance(item, list):
+            item = [toDict(child) for child in item]
+        elif field in ("dataType", "op", "kind"):
+            item = TOKEN_NAMES[item]
+        result[field] = item
+    if isinstance(node, Identifier) and node.dataType is not None:
+        result["dataType"] = TOKEN_NAMES[node.dataType]
+    return result
+
+def packTree(root: Node) -> (array, list):
+    """ This function will encode a tree as (ints, values), without recursion so any depth works."""
+    codes = array('q')
+    values = []
+    valueIndex = {}
+    kinds = {kind: position for position, kind in enumerate(NODE_KINDS)}
+
+    def value(item) -> int:
+        key = (type(item), item) # Keeps 1 and 1.0 apart.
+        if key not in valueIndex:
+            valueIndex[key] = len(values)
+            values.append(item)
+        return valueIndex[key]
+
+    stack = [(root, False)]
+    while stack:
+        node, visited = stack.pop()
+        if not visited:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children(node)))
+            continue
+        codes.append(kinds[type(node)])
+        codes.append(-1 if node.line is None else node.line)
+        if isinstance(node, Program):
+            codes.append(len(node.statements))
+        elif isinstance(node, Declaration):
+            codes.append(value(node.name))
+            codes.append(node.dataType)
+        elif isinstance(node, Assignment):
+            codes.append(value(node.name))
+        elif isinstance(node, BinaryOp):
+            codes.append(node.op)
+        elif isinstance(node, Identifier):
+            codes.append(value(node.name))
+            codes.append(-1 if node.dataType is None else node.dataType)
+        elif isinstance(node, Literal):
+            codes.append(node.kind)
+            codes.append(value(node.value))
+    return codes, values
+
+def unpackTree(codes, values: list) -> Node:
+    """ This function will rebuild the tree packTree() encoded."""
+    stack = []
+    position = 0
+    length = len(codes)
+    while position < length:
+        kind = NODE_KINDS[codes[position]]
+        line = codes[position + 1]
+        line = None if line == -1 else line
+        position += 2
+        if kind is Identifier:
+            dataType = codes[position + 1]
+            node = Identifier(values[codes[position]], line, None if dataType == -1 else dataType)
+            position += 2
+        elif kind is Literal:
+            node = Literal(codes[position], values[codes[position + 1]], line)
+            position += 2
+        elif kind is BinaryOp:
+            right = stack.pop()
+            node = BinaryOp(codes[position], stack.pop(), right, line)
+            position += 1
+        elif kind is Negate:
+            node = Negate(stack.pop(), line)
+        elif kind is Assignment:
+            node = Assignment(values[codes[position]], stack.pop(), line)
+            position += 1
+        elif kind is Output:
+            node = Output(stack.pop(), line)
+        elif kind is If:
+            body = stack.pop()
+            node = If(stack.pop(), body, line)
+        elif kind is Declaration:
+            node = Declaration(values[codes[position]], codes[position + 1], line)
+            position += 2
+        else: # Program
+            count = codes[position]
+            position += 1
+            statements = []
+            if count:
+                statements = stack[len(stack) - count:]
+                del stack[len(stack) - count:]
+            node = Program(statements, line)
+        stack.append(node)
+    return stack.pop()
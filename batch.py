@@ -0,0 +1,122 @@
+import argparse
+import glob # For the source patterns.
+import hashlib # For the log directories of sources outside the working directory.
+import json # For the summary output.
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from artifacts import formats, default_formats
+from cache import Cache, analyze
+
+# Runs lex -> symbol table -> parse over many .HL files on a pool of processes.
+# Every job is isolated: its logs go to its own directory under the output directory, or nowhere at all, so nothing is shared between jobs.
+
+default_extension = ".HL"
+
+def findSources(patterns: list) -> list:
+    """ This function will expand directories (every .HL under them) and glob patterns into a sorted list of files."""
+    sources = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                sources.update(os.path.join(root, name) for name in files if name.endswith(default_extension))
+        else:
+            sources.update(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+    return sorted(sources)
+
+def logDirectoryFor(source: str, outputDirectory: str) -> str:
+    """ This function will return the log directory of a source, its path mirrored under the output directory so two sources never share one."""
+    if outputDirectory is None:
+        return None
+    path = os.path.abspath(source)
+    try:
+        relative = os.path.relpath(path)
+    except ValueError: # Another drive.
+        relative = os.pardir
+    if relative.split(os.sep)[0] != os.pardir:
+        return os.path.join(outputDirectory, relative) # a/b_c.HL -> output/a/b_c.HL/, a_b/c.HL -> output/a_b/c.HL/
+    # Outside the working directory there is nothing to mirror, the name gets a hash of the whole path instead.
+    digest = hashlib.sha1(path.encode()).hexdigest()[:12]
+    return os.path.join(outputDirectory, f"{os.path.basename(path)}.{digest}")
+
+caches = {} # Absolute cache directory -> the Cache every job of this process shares, its index is only scanned once.
+
+def cacheFor(directory: str) -> Cache:
+    """ This function will return the cache of this process for a directory, made on first use."""
+    path = os.path.abspath(directory)
+    if path not in caches:
+        caches[path] = Cache(path)
+    return caches[path]
+
+def runJob(source: str, outputDirectory: str = None, useScanner: bool = True, cacheDirectory: str = None, logFormats: tuple = default_formats) -> dict:
+    """ This function will lex and parse one file, and return what happened as a plain dict."""
+    result = {"source": source, "status": "pass", "diagnostics": [], "statements": 0, "error": None, "seconds": 0.0, "cached": False}
+    start = time.perf_counter()
+    try:
+        cache = cacheFor(cacheDirectory) if cacheDirectory is not None else None
+        analysis = analyze(source, cache, useScanner=useScanner, echoErrors=False, logDirectory=logDirectoryFor(source, outputDirectory), logFormats=logFormats)
+        result["cached"] = analysis.cached
+        result["diagnostics"] = [diagnostic.toDict() for diagnostic in analysis.diagnostics]
+        if result["diagnostics"]:
+            result["status"] = "fail"
+        program = analysis.parse()
+        result["statements"] = len(program.statements)
+    except SyntaxError as error:
+        result["status"] = "fail"
+        result["error"] = f"Syntax Error: {error}"
+    except Exception as error: # A crash in one job must not take the batch down.
+        result["status"] = "error"
+        result["error"] = f"{type(error).__name__}: {error}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+def runBatch(sources: list, workers: int = None, outputDirectory: str = None, useScanner: bool = True, onResult = None, cacheDirectory: str = None, logFormats: tuple = default_formats) -> dict:
+    """ This function will run every source on a process pool and return the summary, results in the order of the sources."""
+    start = time.perf_counter()
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(runJob, source, outputDirectory, useScanner, cacheDirectory, logFormats): source for source in sources}
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            if onResult is not None:
+                onResult(result)
+
+    ordered = [results[source] for source in sources]
+    counts = {"pass": 0, "fail": 0, "error": 0}
+    for result in ordered:
+        counts[result["status"]] += 1
+    return {
+        "total": len(ordered),
+        "counts": counts,
+        "seconds": time.perf_counter() - start,
+        "jobSeconds": sum(result["seconds"] for result in ordered),
+        "cached": sum(result["cached"] for result in ordered),
+        "results": ordered,
+    }
+
+def printResult(result: dict) -> None:
+    detail = result["error"] or (f"{len(result['diagnostics'])} diagnostics" if result["diagnostics"] else f"{result['statements']} statements")
+    print(f"{result['status'].upper():<5} {result['seconds']*1000:>9.1f} ms  {result['source']}  ({detail})")
+
+
+if __name__ == "__main__":
+    arguments = argparse.ArgumentParser(description="Lex and parse many .HL files in parallel.")
+    arguments.add_argument("sources", nargs="+", help="directories (searched for .HL files) or glob patterns")
+    arguments.add_argument("--workers", type=int, default=None, help="number of processes, all cores by default")
+    arguments.add_argument("--output", default=None, help="write each file's logs into its own directory under this one, kept in memory otherwise")
+    arguments.add_argument("--log-format", action="append", choices=list(formats), default=None, help="format of the atom, token and symbol logs, can be repeated (legacy by default)")
+    arguments.add_argument("--atomizer", action="store_true", help="lex with atomizer() + tokenizer() instead of scanner()")
+    arguments.add_argument("--cache", nargs="?", const=".cache", default=None, help="reuse the results of unchanged files from this directory (.cache by default)")
+    arguments.add_argument("--json", default=None, help="write the summary, with every result, to this file")
+    options = arguments.parse_args()
+
+    sources = findSources(options.sources)
+    summary = runBatch(sources, options.workers, options.output, not options.atomizer, printResult, options.cache, tuple(options.log_format or default_formats))
+    counts = summary["counts"]
+    print(f"\n{summary['total']} files: {counts['pass']} passed, {counts['fail']} failed, {counts['error']} errors in {summary['seconds']:.2f} s ({summary['jobSeconds']:.2f} s of work, {summary['cached']} from the cache).")
+    if options.json is not None:
+        with open(options.json, "w") as file:
+            json.dump(summary, file, indent=2)
+    raise SystemExit(0 if counts["fail"] == 0 and counts["error"] == 0 else 1)
@@ -0,0 +1,405 @@
+import argparse
+import hashlib # For the grammar part of the program names.
+import json # For the results and the baseline.
+import os
+import platform
+import random # For the generated programs, always seeded.
+import subprocess # For the commit the results were measured on.
+import sys
+import time
+import tracemalloc # For the peak memory of every phase.
+
+from grammar import loadGrammar, isNonterminal, default_grammar_file
+from instrumentation import Instrumentation
+from lexicalAnalyzer import LexicalAnalyzer, atomPattern
+from tableParser import TableParser
+
+# Reproducible benchmarks of the front end on generated programs.
+# Programs are derived from the productions of logs/grammar_rules.txt, so they grow with the grammar. Same seed, same program.
+# Every phase (atomizer, tokenizer, analyzeTokens, ..., parse) is timed on its own through instrumentation.py and reported as lines/s and tokens/s.
+# Peak memory is measured in a separate run under tracemalloc, which would slow the timed runs down.
+# Results are written as JSON, and can be compared against an earlier run with --baseline.
+
+default_directory = "benchmarks" # Generated programs are kept here, a size is only generated once per seed.
+default_sizes = (1000, 10000, 100000)
+default_invalid_rate = 0.02 # Share of the lines broken on purpose in the invalid programs.
+results_format = 1
+
+# How the fixed terminals are spelled. IDENTIFIER and the literals are made up by the generator.
+LEXEMES = {
+    "KEYWORD_INT": "integer",
+    "KEYWORD_DOUBLE": "double",
+    "KEYWORD_IF": "if",
+    "KEYWORD_OUTPUT": "output",
+    "ENDLINE": ";",
+    "OP_ASSIGNMENT": ":=",
+    "OP_COLON": ":",
+    "OP_EQUAL": "=",
+    "OP_LEFTSHIFT": "<<",
+    "OP_ARITHMETIC_PLUS": "+",
+    "OP_ARITHMETIC_MINUS": "-",
+    "OP_ARITHMETIC_MULTIPLY": "*",
+    "OP_ARITHMETIC_DIVIDE": "/",
+    "OP_RELATIONAL_ISEQUAL": "==",
+    "OP_RELATIONAL_NOTEQUAL": "!=",
+    "OP_RELATIONAL_LESSTHAN": "<",
+    "OP_RELATIONAL_LESSTHANOREQUAL": "<=",
+    "OP_RELATIONAL_GREATERTHAN": ">",
+    "OP_RELATIONAL_GREATERTHANOREQUAL": ">=",
+    "DELIMITER_LEFT_P": "(",
+    "DELIMITER_RIGHT_P": ")",
+}
+
+# Relative weight of every alternative, in the order of the rules file. Rules not listed pick uniformly.
+# A weight of 0 keeps an alternative out of valid programs: a variable used as a type, or a declaration by assignment (cleanTable() rejects both).
+default_weights = {
+    "<type>": (1, 1, 0),
+    "<declaration_rest>": (1, 0),
+    "<statement>": (5, 3, 2),
+    "<output_params>": (3, 1),
+    "<simple_expression>": (4, 1, 1),
+    "<term>": (4, 1, 1),
+    "<factor>": (4, 3, 2, 1, 1),
+}
+
+CORRUPTIONS = ("undeclared", "illegal", "unterminated", "missing", "redeclared", "badType")
+# atomizer() carries an unclosed string on to the next quote, so one unterminated string turns the rest of the file into errors.
+# Its invalid programs leave that corruption out, their errors stay one broken line at a time like in the other modes.
+ATOMIZER_CORRUPTIONS = tuple(kind for kind in CORRUPTIONS if kind != "unterminated")
+
+def corruptionsFor(mode: str) -> tuple:
+    return ATOMIZER_CORRUPTIONS if mode == "atomizer" else CORRUPTIONS
+
+
+def derivationHeights(grammar: dict) -> dict:
+    """ This function will return the height of the smallest derivation tree of every nonterminal."""
+    heights = {name: None for name in grammar}
+    changed = True
+    while changed:
+        changed = False
+        for name, alternatives in grammar.items():
+            for alternative in alternatives:
+                height = alternativeHeight(alternative, heights)
+                if height is not None and (heights[name] is None or height < heights[name]):
+                    heights[name] = height
+                    changed = True
+    return heights
+
+def alternativeHeight(alternative: list, heights: dict):
+    # None while one of its nonterminals has no known derivation yet.
+    height = 0
+    for symbol in alternative:
+        if isNonterminal(symbol):
+            if heights[symbol] is None:
+                return None
+            height = max(height, heights[symbol])
+    return height + 1
+
+
+class ProgramGenerator:
+    """ Writes random programs line by line, every line a derivation of <declaration> or <statement>."""
+    # The list rules (<declarations>, <statements>) are unrolled here instead of derived, a 10M line program would not fit in a recursion.
+    # Every statement ends with an ENDLINE, which the rules leave out, and identifiers are only ever used after their declaration.
+
+    def __init__(self, grammar: dict, seed: int = 0, invalidRate: float = 0.0, maxHeight: int = 12, variables: int = 512, weights: dict = None, corruptions: tuple = CORRUPTIONS) -> None:
+        self.grammar = grammar
+        self.random = random.Random(seed)
+        self.invalidRate = invalidRate
+        self.maxHeight = maxHeight # Bounds the nesting of a statement.
+        self.variables = variables # Distinct names declared at most, later lines reuse them.
+        self.weights = default_weights if weights is None else weights
+        self.corruptions = corruptions # The ways a broken line can be broken.
+        self.heights = derivationHeights(grammar)
+        self.names = []
+        self.fresh = None # Name the next IDENTIFIER takes, while deriving a declaration.
+        self.corrupted = 0
+
+    def name(self, number: int) -> str:
+        # Identifiers are letters only. The leading v keeps them from being part of integer/double, which cleanTag() would cut them out of.
+        letters = []
+        while True:
+            number, digit = divmod(number, 26)
+            letters.append(chr(ord("a") + digit))
+            if number == 0:
+                break
+        return "v" + "".join(reversed(letters))
+
+    def lexeme(self, symbol: str) -> str:
+        if symbol == "IDENTIFIER":
+            if self.fresh is not None:
+                name, self.fresh = self.fresh, None
+                return name
+            return self.random.choice(self.names)
+        if symbol == "LITERAL_INTEGER":
+            return str(self.random.randrange(1000))
+        if symbol == "LITERAL_DOUBLE":
+            return f"{self.random.randrange(1000)}.{self.random.randrange(100)}"
+        if symbol == "LITERAL_STRING":
+            return f'"line {self.random.randrange(1 << 16)}"'
+        return LEXEMES[symbol]
+
+    def derive(self, symbol: str, budget: int, tokens: list) -> None:
+        """ This function will append the tokens of a random derivation of symbol, no taller than budget when possible."""
+        if not isNonterminal(symbol):
+            tokens.append(self.lexeme(symbol))
+            return
+        alternatives = self.grammar[symbol]
+        weights = self.weights.get(symbol, (1,) * len(alternatives))
+        candidates = []
+        for alternative, weight in zip(alternatives, weights):
+            height = alternativeHeight(alternative, self.heights)
+            if weight > 0 and height is not None and height <= budget:
+                candidates.append((alternative, weight))
+        if not candidates:
+            # Out of budget, take the shallowest alternative that is allowed at all.
+            allowed = [alternative for alternative, weight in zip(alternatives, weights) if weight > 0]
+            candidates = [(min(allowed, key=lambda alternative: alternativeHeight(alternative, self.heights)), 1)]
+        alternative = self.random.choices([alternative for alternative, _ in candidates], [weight for _, weight in candidates])[0]
+        for child in alternative:
+            self.derive(child, budget - 1, tokens)
+
+    def statementTokens(self) -> list:
+        tokens = []
+        declare = not self.names or (len(self.names) < self.variables and self.random.random() < 0.2)
+        if declare:
+            self.fresh = self.name(len(self.names))
+            self.derive("<declaration>", self.maxHeight, tokens)
+            self.names.append(tokens[0])
+        else:
+            self.derive("<statement>", self.maxHeight, tokens)
+        tokens.append(LEXEMES["ENDLINE"])
+        return tokens
+
+    def corrupt(self, tokens: list) -> list:
+        """ This function will break a line in one of the ways of self.corruptions."""
+        self.corrupted += 1
+        kind = self.random.choice(self.corruptions)
+        tokens = list(tokens)
+        position = self.random.randrange(len(tokens))
+        if kind == "undeclared":
+            tokens.insert(0, "vundeclared")
+            tokens.insert(1, LEXEMES["OP_ASSIGNMENT"])
+            tokens.insert(2, self.lexeme("LITERAL_INTEGER"))
+            tokens.insert(3, LEXEMES["ENDLINE"])
+        elif kind == "illegal":
+            tokens.insert(position, "$")
+        elif kind == "unterminated":
+            tokens.insert(len(tokens) - 1, '"open')
+        elif kind == "missing" and len(tokens) > 1:
+            del tokens[position]
+        elif kind == "redeclared":
+            tokens = [self.random.choice(self.names), LEXEMES["OP_COLON"], LEXEMES["KEYWORD_INT"], LEXEMES["ENDLINE"]] + tokens
+        else:
+            # The <type> -> IDENTIFIER alternative, which the valid programs never take.
+            tokens = [self.name(len(self.names) + self.variables), LEXEMES["OP_COLON"], self.random.choice(self.names), LEXEMES["ENDLINE"]] + tokens
+        return tokens
+
+    def line(self) -> str:
+        tokens = self.statementTokens()
+        if self.invalidRate and self.random.random() < self.invalidRate:
+            tokens = self.corrupt(tokens)
+        return joinTokens(tokens)
+
+    def write(self, path: str, lines: int) -> None:
+        """ This function will write a program of the given number of lines, in batches so a large one never sits in memory."""
+        with open(path, "w") as file:
+            batch = []
+            for _ in range(lines):
+                batch.append(self.line())
+                if len(batch) >= 10000:
+                    file.write("\n".join(batch) + "\n")
+                    batch = []
+            if batch:
+                file.write("\n".join(batch) + "\n")
+
+
+def atomClass(char: str) -> str:
+    match = atomPattern.match(char)
+    return match.lastgroup if match else "space"
+
+def joinTokens(tokens: list) -> str:
+    """ This function will join tokens as compactly as the lexer allows, with a space only where two atoms would be glued together."""
+    text = [tokens[0]]
+    for previous, token in zip(tokens, tokens[1:]):
+        if atomClass(previous[-1]) == atomClass(token[0]):
+            text.append(" ")
+        text.append(token)
+    return "".join(text)
+
+def programPath(directory: str, lines: int, seed: int, invalid: bool, grammarFile: str = default_grammar_file, corruptions: tuple = CORRUPTIONS) -> str:
+    # The name carries a hash of the rules, a program generated from an older grammar is never reused.
+    kind = "invalid" if invalid else "valid"
+    if invalid and corruptions != CORRUPTIONS:
+        kind += "_without_" + "_".join(left for left in CORRUPTIONS if left not in corruptions)
+    with open(grammarFile, "rb") as file:
+        rules = hashlib.sha256(file.read()).hexdigest()[:8]
+    return os.path.join(directory, f"program_{lines}_{seed}_{kind}_{rules}.HL")
+
+def generateProgram(path: str, lines: int, seed: int = 0, invalidRate: float = 0.0, grammarFile: str = default_grammar_file, corruptions: tuple = CORRUPTIONS) -> str:
+    """ This function will write a generated program to path, unless it is already there."""
+    if not os.path.exists(path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = path + ".tmp"
+        ProgramGenerator(loadGrammar(grammarFile), seed, invalidRate, corruptions=corruptions).write(temporary, lines)
+        os.replace(temporary, path) # An interrupted run never leaves half a program behind.
+    return path
+
+
+def runPipeline(path: str, mode: str) -> Instrumentation:
+    """ This function will run the front end on one file, and return its timings and counters."""
+    instrumentation = Instrumentation()
+    analyzer = LexicalAnalyzer(path, useScanner=mode == "scanner", useDFA=mode == "dfa", useMmap=mode == "mmap", echoErrors=False, logDirectory=None, instrumentation=instrumentation)
+    # With recovery an invalid program is parsed to its end like a valid one, the parser counts its syntaxErrors.
+    TableParser(analyzer.getTokenStream(), instrumentation=instrumentation, recover=True).parse()
+    return instrumentation
+
+def measure(path: str, lines: int, mode: str, repeat: int = 3, memory: bool = True) -> dict:
+    """ This function will time every phase on a file, best of repeat runs, and add the peak memory of a traced run."""
+    best = {}
+    counters = {}
+    for _ in range(repeat):
+        instrumentation = runPipeline(path, mode)
+        counters = instrumentation.counters
+        for name, stats in instrumentation.stages.items():
+            if name not in best or stats["wall"] < best[name]["wall"]:
+                best[name] = {"wall": stats["wall"], "cpu": stats["cpu"]}
+
+    if memory:
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        try:
+            for name, stats in runPipeline(path, mode).stages.items():
+                best[name]["peakMemory"] = stats["peakMemory"]
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+
+    tokens = counters.get("tokens", 0)
+    phases = {}
+    for name, stats in best.items():
+        wall = stats["wall"]
+        phases[name] = {
+            "wall": wall,
+            "cpu": stats["cpu"],
+            "linesPerSecond": lines / wall if wall else None,
+            "tokensPerSecond": tokens / wall if wall else None,
+            "peakMemory": stats.get("peakMemory"),
+        }
+    total = sum(stats["wall"] for stats in best.values())
+    return {
+        "lines": lines,
+        "bytes": os.path.getsize(path),
+        "tokens": tokens,
+        "errors": counters.get("errors", 0),
+        "syntaxErrors": counters.get("syntaxErrors", 0),
+        "wall": total,
+        "linesPerSecond": lines / total if total else None,
+        "phases": phases,
+    }
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def runBenchmarks(sizes, modes, seed: int = 0, invalid: bool = False, invalidRate: float = default_invalid_rate, repeat: int = 3,
+                  memory: bool = True, directory: str = default_directory, grammarFile: str = default_grammar_file, onCase = None) -> dict:
+    """ This function will generate (or reuse) a program of every size and measure it in every mode."""
+    results = {"format": results_format, "seed": seed, "repeat": repeat, "environment": environment(), "cases": {}}
+    kinds = (False, True) if invalid else (False,)
+    for lines in sizes:
+        for isInvalid in kinds:
+            for mode in modes:
+                corruptions = corruptionsFor(mode)
+                path = generateProgram(programPath(directory, lines, seed, isInvalid, grammarFile, corruptions), lines, seed, invalidRate if isInvalid else 0.0, grammarFile, corruptions)
+                name = f"{'invalid' if isInvalid else 'valid'}-{lines}-{mode}"
+                case = results["cases"][name] = measure(path, lines, mode, repeat, memory)
+                if isInvalid:
+                    case["corruptions"] = list(corruptions)
+                if onCase is not None:
+                    onCase(name, case)
+    return results
+
+def compareResults(results: dict, baseline: dict, minimum: float = 0.001) -> list:
+    """ This function will return (case, phase, baseline wall, wall, ratio) for every phase both runs measured."""
+    # Phases faster than minimum seconds in the baseline are mostly noise and left out.
+    rows = []
+    for name, case in results["cases"].items():
+        old = baseline.get("cases", {}).get(name)
+        if old is None:
+            continue
+        for phase, stats in case["phases"].items():
+            oldStats = old["phases"].get(phase)
+            if oldStats is None or oldStats["wall"] < minimum:
+                continue
+            rows.append((name, phase, oldStats["wall"], stats["wall"], stats["wall"] / oldStats["wall"]))
+    return rows
+
+def printCase(name: str, case: dict) -> None:
+    print(f"\n{name}: {case['lines']} lines, {case['tokens']} tokens, {case['bytes'] / 1024:.0f} KiB, {case['errors']} errors, {case['syntaxErrors']} syntax errors")
+    left = [kind for kind in CORRUPTIONS if kind not in case.get("corruptions", CORRUPTIONS)]
+    if left:
+        print(f"  (generated without {', '.join(left)} lines, which atomizer() would carry to the end of the file)")
+    print(f"  {'phase':<18} {'wall ms':>10} {'lines/s':>12} {'tokens/s':>12} {'peak KiB':>10}")
+    for phase, stats in case["phases"].items():
+        peak = "" if stats["peakMemory"] is None else f"{stats['peakMemory'] / 1024:.0f}"
+        linesPerSecond = f"{stats['linesPerSecond']:.0f}" if stats["linesPerSecond"] else ""
+        tokensPerSecond = f"{stats['tokensPerSecond']:.0f}" if stats["tokensPerSecond"] else ""
+        print(f"  {phase:<18} {stats['wall'] * 1000:>10.2f} {linesPerSecond:>12} {tokensPerSecond:>12} {peak:>10}")
+
+
+if __name__ == "__main__":
+    arguments = argparse.ArgumentParser(description="Benchmark the front end on generated programs.")
+    arguments.add_argument("--lines", type=int, nargs="+", default=list(default_sizes), help="sizes of the generated programs, in lines")
+    arguments.add_argument("--modes", nargs="+", default=["atomizer"], choices=["atomizer", "scanner", "dfa", "mmap"], help="how the lexer runs")
+    arguments.add_argument("--invalid", action="store_true", help="also measure programs with broken lines")
+    arguments.add_argument("--invalid-rate", type=float, default=default_invalid_rate, help="share of broken lines in the invalid programs")
+    arguments.add_argument("--seed", type=int, default=0)
+    arguments.add_argument("--repeat", type=int, default=3, help="timed runs per case, the best one counts")
+    arguments.add_argument("--no-memory", action="store_true", help="skip the traced run that measures peak memory")
+    arguments.add_argument("--directory", default=default_directory, help="where the generated programs are kept")
+    arguments.add_argument("--grammar", default=default_grammar_file, help="the productions the programs are derived from")
+    arguments.add_argument("--output", default=None, help="write the results to this file as JSON")
+    arguments.add_argument("--baseline", default=None, help="compare against the results of an earlier run")
+    arguments.add_argument("--threshold", type=float, default=0.10, help="with --baseline, fail when a phase got slower by more than this share")
+    arguments.add_argument("--generate", default=None, help="only write one program of --lines[0] lines to this file")
+    options = arguments.parse_args()
+
+    if options.generate is not None:
+        rate = options.invalid_rate if options.invalid else 0.0
+        ProgramGenerator(loadGrammar(options.grammar), options.seed, rate).write(options.generate, options.lines[0])
+        raise SystemExit(0)
+
+    results = runBenchmarks(options.lines, options.modes, options.seed, options.invalid, options.invalid_rate, options.repeat,
+                            not options.no_memory, options.directory, options.grammar, printCase)
+    if options.output is not None:
+        with open(options.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if options.baseline is not None:
+        with open(options.baseline, "r") as file:
+            baseline = json.load(file)
+        rows = compareResults(results, baseline)
+        print(f"\n{'case':<28} {'phase':<18} {'baseline ms':>12} {'now ms':>10} {'ratio':>7}")
+        slower = 0
+        for name, phase, old, new, ratio in rows:
+            flag = ""
+            if ratio > 1 + options.threshold:
+                flag = "  slower"
+                slower += 1
+            print(f"{name:<28} {phase:<18} {old * 1000:>12.2f} {new * 1000:>10.2f} {ratio:>7.2f}{flag}")
+        if slower:
+            print(f"\n{slower} phases slower than the baseline by more than {options.threshold:.0%}.", file=sys.stderr)
+            raise SystemExit(1)
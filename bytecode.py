@@ -0,0 +1,75 @@
+from array import array # For the flat instruction list.
+from enum import IntEnum
+
+# Instruction set shared by compiler.py and virtualMachine.py.
+# Every instruction is two ints, the opcode and its argument (0 when it has none), so the program counter always moves by 2.
+
+class Opcode(IntEnum):
+    HALT = 0
+    LOAD_CONST = 1 # push constants[arg]
+    LOAD = 2 # push slots[arg]
+    STORE = 3 # slots[arg] = pop
+    ADD_INT = 4
+    SUB_INT = 5
+    MUL_INT = 6
+    DIV_INT = 7 # Truncates toward zero, like C.
+    ADD_DOUBLE = 8
+    SUB_DOUBLE = 9
+    MUL_DOUBLE = 10
+    DIV_DOUBLE = 11
+    NEGATE = 12
+    TO_INT = 13 # Truncates the value arg entries below the top of the stack.
+    TO_DOUBLE = 14 # Same, to a double.
+    ISEQUAL = 15 # Comparisons push 1 or 0.
+    NOTEQUAL = 16
+    LESSTHAN = 17
+    LESSTHANOREQUAL = 18
+    GREATERTHAN = 19
+    GREATERTHANOREQUAL = 20
+    JUMP = 21 # pc = arg
+    JUMP_IF_FALSE = 22 # pc = arg if pop is 0
+    OUTPUT = 23 # Appends pop to the output buffer.
+
+OPCODE_NAMES = tuple(code.name for code in Opcode)
+
+
+class CodeObject:
+    """ A compiled program: instructions, constant pool and one slot per declared variable."""
+    __slots__ = ("instructions", "constants", "slotNames", "slotTypes")
+
+    def __init__(self) -> None:
+        self.instructions = array('l')
+        self.constants = []
+        self.slotNames = [] # Variable name of every slot, for the disassembly and errors.
+        self.slotTypes = [] # TokenCode.KEYWORD_INT or KEYWORD_DOUBLE of every slot.
+
+    def __len__(self) -> int:
+        return len(self.instructions) // 2
+
+    def emit(self, opcode: int, argument: int = 0) -> int:
+        """ This function will append an instruction and return its position, for patching jumps."""
+        position = len(self.instructions)
+        self.instructions.append(opcode)
+        self.instructions.append(argument)
+        return position
+
+    def patch(self, position: int, argument: int) -> None:
+        self.instructions[position + 1] = argument
+
+    def disassemble(self) -> str:
+        """ This function will return one line per instruction, for debugging."""
+        lines = []
+        instructions = self.instructions
+        for position in range(0, len(instructions), 2):
+            opcode, argument = instructions[position], instructions[position + 1]
+            name = OPCODE_NAMES[opcode]
+            if opcode == Opcode.LOAD_CONST:
+                detail = repr(self.constants[argument])
+            elif opcode in (Opcode.LOAD, Opcode.STORE):
+                detail = self.slotNames[argument]
+            elif opcode in (Opcode.JUMP, Opcode.JUMP_IF_FALSE, Opcode.TO_INT, Opcode.TO_DOUBLE):
+                detail = str(argument)
+            else:
+                detail = ""
+            lines.append(f"{position:>6} {name:<18} {detail}".rstrip())
+        return "\n".join(lines)
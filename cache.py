@@ -0,0 +1,321 @@
+import hashlib # For the content addresses.
+import os
+import pickle # For the cache entries.
+import tempfile # For the atomic writes.
+from array import array # For the narrowed columns.
+from collections import OrderedDict # For the least recently used order of the entries.
+
+import lexicalAnalyzer as lex
+import astNodes
+from astNodes import packTree, unpackTree
+import tableParser
+import parseTables
+from artifacts import sinkFor, writersFor, default_formats
+from diagnostics import Diagnostic, DiagnosticSink
+from instrumentation import stageOf
+from symbolTable import SymbolTable
+from tokenStream import TokenStream, TOKEN_NAMES
+
+# Content addressed cache of everything the front end computes for a source: tokens, symbol table, diagnostics and the AST.
+# The key is the hash of the source bytes plus a fingerprint of the token enums and the grammar, so a change to either never serves a stale entry.
+# Entries are written to a temporary file and renamed into place, a reader never sees half an entry, even with several workers on the same directory.
+# The AST is stored packed (astNodes.packTree()) and only rebuilt when somebody asks for it, a hit that only needs the diagnostics stays a file read.
+# Nothing in an entry names the file it came from, two files with the same bytes share it. The diagnostics get the name of the file asked for on a hit.
+# A hit writes the same logs as a fresh run, in every format asked for, from the cached tokens (with their types from before cleanTable()) and symbol table.
+# Least recently used entries are evicted once the directory grows past its size limit. A hit refreshes the entry's mtime.
+# The size and order of the entries are kept in memory as they are stored and hit, the directory is only scanned once at the start and when eviction is due.
+# Eviction goes down to a fraction of the limit, so the scans it takes (other workers may have written entries too) are spread over many stores.
+
+default_cache_directory = ".cache"
+default_cache_size = 256 << 20 # Bytes.
+default_eviction_target = 0.9 # Part of the size limit an eviction leaves in use.
+source_encoding = "utf-8" # Of the source files, for the text of both a hit and a miss.
+cache_format = 4 # Bump when the layout of an entry changes.
+
+def fingerprint() -> str:
+    """ This function will hash everything the cached results depend on besides the source itself."""
+    digest = hashlib.sha256(f"format {cache_format}\n".encode())
+    digest.update("\n".join(TOKEN_NAMES).encode())
+    for leaf in lex.tokenLeaves():
+        digest.update(f"\n{leaf.name}={leaf.value}".encode())
+    digest.update(lex.atomPattern.pattern.encode())
+    # The grammar lives in the parse table and the parser's builders, and the AST layout in astNodes.py.
+    for module in (parseTables, tableParser, astNodes):
+        with open(module.__file__, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+grammar_fingerprint = fingerprint()
+
+def narrow(column) -> (str, bytes):
+    """ This function will store an int column with the smallest array type its values fit in."""
+    low, high = (min(column), max(column)) if len(column) else (0, 0)
+    for typecode in "bhiq":
+        limit = 1 << (array(typecode).itemsize * 8 - 1)
+        if -limit <= low and high < limit:
+            return typecode, (column if column.typecode == typecode else array(typecode, column)).tobytes()
+
+def widen(stored: tuple) -> array:
+    # The column keeps its narrow type, it is only ever read after a hit.
+    typecode, data = stored
+    column = array(typecode)
+    column.frombytes(data)
+    return column
+
+
+class Analysis:
+    """ What the front end produced for one source, either freshly computed or loaded from the cache."""
+    __slots__ = ("fileName", "source", "tokenStream", "logTypes", "atoms", "symbolTable", "diagnostics", "program", "packedProgram", "syntaxError", "cached")
+
+    def __init__(self, fileName: str, source: str) -> None:
+        self.fileName = fileName
+        self.source = source
+        self.tokenStream = None
+        self.logTypes = None # Type ids before the symbol table rejected any identifier, what the token logs show. Like LexicalAnalyzer.tokensCopy.
+        self.atoms = None # Rebuilt from the token stream on a hit, see getAtoms().
+        self.symbolTable = SymbolTable()
+        self.diagnostics = []
+        self.program = None # None when the parse failed, see syntaxError.
+        self.packedProgram = None # (ints, values) of a cached AST that was not rebuilt yet.
+        self.syntaxError = None # Message of the SyntaxError the parser raised.
+        self.cached = False
+
+    def toEntry(self) -> dict:
+        stream = self.tokenStream
+        program = None
+        if self.program is not None:
+            codes, values = packTree(self.program)
+            program = (narrow(codes), values)
+        return {
+            "types": stream.types.tobytes(),
+            "logTypes": self.logTypes.tobytes(),
+            "starts": narrow(stream.starts),
+            "ends": narrow(stream.ends),
+            "lines": narrow(stream.lines),
+            "overrides": stream.overrides,
+            "symbolTable": self.symbolTable,
+            "diagnostics": [(diagnostic.token, diagnostic.line, diagnostic.column, diagnostic.lineText, diagnostic.errorType, diagnostic.message) for diagnostic in self.diagnostics],
+            "program": program,
+            "syntaxError": self.syntaxError,
+        }
+
+    @classmethod
+    def fromEntry(cls, fileName: str, source: str, entry: dict) -> "Analysis":
+        analysis = cls(fileName, source)
+        stream = analysis.tokenStream = TokenStream(source)
+        stream.types.frombytes(entry["types"])
+        analysis.logTypes = array(stream.types.typecode, entry["logTypes"])
+        stream.starts = widen(entry["starts"])
+        stream.ends = widen(entry["ends"])
+        stream.lines = widen(entry["lines"])
+        stream.overrides = entry["overrides"]
+        analysis.symbolTable = entry["symbolTable"]
+        analysis.diagnostics = [Diagnostic(fileName, *fields) for fields in entry["diagnostics"]]
+        if entry["program"] is not None:
+            codes, values = entry["program"]
+            analysis.packedProgram = (widen(codes), values)
+        analysis.syntaxError = entry["syntaxError"]
+        analysis.cached = True
+        return analysis
+
+    def getAtoms(self) -> list:
+        """ This function will return the atoms of every line, like LexicalAnalyzer.atoms."""
+        if self.atoms is None:
+            stream = self.tokenStream
+            self.atoms = [[] for _ in range(self.source.count("\n") + 1)]
+            for index, line in enumerate(stream.lines):
+                self.atoms[line].append(stream.lexeme(index))
+        return self.atoms
+
+    def writeLogs(self, logDirectory, logFormats: tuple = default_formats) -> None:
+        """ This function will write the atom, token and symbol logs the way LexicalAnalyzer.writeLogs() does, in every format asked for."""
+        artifacts = sinkFor(logDirectory)
+        if artifacts is None:
+            return
+        writers = writersFor(logFormats)
+        artifacts.prepare()
+        atoms = self.getAtoms()
+        for writer in writers:
+            writer.writeAtoms(artifacts, atoms)
+        for writer in writers:
+            writer.writeTokens(artifacts, self.tokenStream, self.logTypes)
+        for writer in writers:
+            writer.writeSymbols(artifacts, self.symbolTable)
+
+    def parse(self):
+        """ This function will return the AST, raising the SyntaxError of the parse like Parser.parse() would."""
+        if self.syntaxError is not None:
+            raise SyntaxError(self.syntaxError)
+        if self.program is None and self.packedProgram is not None:
+            self.program = unpackTree(*self.packedProgram)
+            self.packedProgram = None
+        return self.program
+
+
+class Cache:
+    def __init__(self, directory: str = default_cache_directory, maxBytes: int = default_cache_size) -> None:
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.hits = 0
+        self.misses = 0
+        self.entries = None # path -> size of every entry, least recently used first. Filled by scan() when first needed.
+        self.total = 0 # Bytes of the entries.
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, source: bytes, mode: str) -> str:
+        """ This function will return the address of a source lexed in the given mode."""
+        digest = hashlib.sha256(source)
+        digest.update(f"\n{mode}\n{grammar_fingerprint}".encode())
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pickle")
+
+    def load(self, key: str):
+        """ This function will return the entry stored under key, or None."""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as file:
+                entry = pickle.load(file)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError):
+            # Written by an incompatible version, or damaged. Drop it and recompute.
+            self.discard(path)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path) # Marks it as recently used.
+        except FileNotFoundError:
+            pass # Evicted by another worker in the meantime, the entry we read is still good.
+        if self.entries is not None and path in self.entries:
+            self.entries.move_to_end(path)
+        self.hits += 1
+        return entry
+
+    def store(self, key: str, entry: dict) -> None:
+        """ This function will write an entry atomically, then evict what no longer fits."""
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        path = self.path(key)
+        try:
+            with os.fdopen(handle, "wb") as file:
+                pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+                size = file.tell()
+            os.replace(temporary, path)
+        except RecursionError:
+            self.discard(temporary) # An AST too deep to pickle is just not cached.
+            return
+        except BaseException:
+            self.discard(temporary)
+            raise
+        if self.entries is None:
+            self.scan() # Finds the new entry too.
+        else:
+            self.total += size - self.entries.pop(path, 0)
+            self.entries[path] = size
+        if self.total > self.maxBytes:
+            self.evict()
+
+    def discard(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        if self.entries is not None and path in self.entries:
+            self.total -= self.entries.pop(path)
+
+    def scan(self) -> None:
+        """ This function will read the size and last use of every entry in the directory."""
+        found = []
+        with os.scandir(self.directory) as scan:
+            for item in scan:
+                if not item.name.endswith(".pickle"):
+                    continue
+                try:
+                    status = item.stat()
+                except FileNotFoundError:
+                    continue
+                found.append((status.st_mtime, item.path, status.st_size))
+        found.sort()
+        self.entries = OrderedDict((path, size) for _, path, size in found)
+        self.total = sum(self.entries.values())
+
+    def evict(self) -> None:
+        """ This function will remove the least recently used entries until the cache is back under its eviction target."""
+        self.scan() # Other workers share the directory, what they stored and hit only shows up here.
+        if self.total <= self.maxBytes:
+            return
+        target = self.maxBytes * default_eviction_target
+        while self.entries and self.total > target:
+            path, size = self.entries.popitem(last=False)
+            self.total -= size
+            self.discard(path)
+
+    def clear(self) -> None:
+        with os.scandir(self.directory) as scan:
+            for item in scan:
+                if item.name.endswith((".pickle", ".tmp")):
+                    self.discard(item.path)
+        self.entries = None
+        self.total = 0
+
+
+def decodeSource(raw: bytes) -> str:
+    """ This function will turn the bytes of a source into the text the lexer reads, with newlines translated like open() in text mode."""
+    return raw.decode(source_encoding).replace("\r\n", "\n").replace("\r", "\n")
+
+def analyze(fileName: str, cache: Cache = None, useScanner: bool = False, useDFA: bool = False, workers: int = None,
+            errorFormat: str = "text", echoErrors: bool = True, logDirectory: str = lex.default_directory, instrumentation = None, recoverSyntax: bool = False,
+            logFormats: tuple = default_formats) -> Analysis:
+    """ This function will lex, analyze and parse a file, or load all of it from the cache when the file did not change."""
+    stage = stageOf(instrumentation)
+    with open(fileName, "rb") as file:
+        raw = file.read()
+    mode = "scanner" if useScanner or useDFA or (workers is not None and workers > 1) else "atomizer" # The DFA and the parallel scanner give the scanner's results.
+    if recoverSyntax:
+        mode += "+recover" # The diagnostics then include every syntax error.
+
+    key = None
+    if cache is not None:
+        with stage("cacheLoad"):
+            key = cache.key(raw, mode)
+            entry = cache.load(key)
+            if entry is not None:
+                source = decodeSource(raw)
+                try:
+                    analysis = Analysis.fromEntry(fileName, source, entry)
+                except (KeyError, ValueError, TypeError):
+                    cache.discard(cache.path(key)) # Layout of an older version, recompute it.
+                    entry = None
+        if instrumentation is not None:
+            instrumentation.count("cacheHits" if entry is not None else "cacheMisses")
+        if entry is not None:
+            # Same console output and logs as a fresh run.
+            sink = DiagnosticSink(fileName, analysis.source, logDirectory, errorFormat, echoErrors)
+            sink.diagnostics.extend(analysis.diagnostics)
+            if echoErrors:
+                print()
+            with stage("writeLogs"):
+                analysis.writeLogs(logDirectory, logFormats)
+            sink.flush()
+            return analysis
+
+    # The lexer gets the same text a hit would have, not what open() makes of the bytes with the locale's encoding.
+    analyzer = lex.LexicalAnalyzer(fileName, useScanner=useScanner, useDFA=useDFA, errorFormat=errorFormat, echoErrors=echoErrors, workers=workers, logDirectory=logDirectory, instrumentation=instrumentation, recoverSyntax=recoverSyntax,
+                                   logFormats=logFormats, source=decodeSource(raw))
+    analysis = Analysis(fileName, analyzer.file)
+    analysis.tokenStream = analyzer.getTokenStream()
+    analysis.logTypes = analyzer.tokensCopy
+    analysis.atoms = analyzer.getAtoms()
+    analysis.symbolTable = analyzer.getSymbolTable()
+    analysis.diagnostics = analyzer.getDiagnostics()
+    try:
+        analysis.program = analyzer.getProgram()
+    except SyntaxError as error:
+        analysis.syntaxError = str(error)
+
+    if cache is not None:
+        with stage("cacheStore"):
+            cache.store(key, analysis.toEntry())
+    return analysis
@@ -0,0 +1,144 @@
+from astNodes import Program, Declaration, Assignment, Output, If, BinaryOp, Negate, Identifier, Literal
+from bytecode import Opcode, CodeObject
+from tokenStream import TokenCode
+
+# Lowers the Program returned by Parser.parse() to bytecode for virtualMachine.py.
+# Names are resolved to slots here, once, and every arithmetic instruction is already typed, so the VM never looks anything up by name or type.
+# Nothing here recurses, the parser builds trees as deep as the source nests them (a chain like 1+1+...+1 is as deep as it is long).
+
+INT = int(TokenCode.KEYWORD_INT)
+DOUBLE = int(TokenCode.KEYWORD_DOUBLE)
+
+ARITHMETIC = {
+    # operator: (integer opcode, double opcode)
+    TokenCode.OP_ARITHMETIC_PLUS: (Opcode.ADD_INT, Opcode.ADD_DOUBLE),
+    TokenCode.OP_ARITHMETIC_MINUS: (Opcode.SUB_INT, Opcode.SUB_DOUBLE),
+    TokenCode.OP_ARITHMETIC_MULTIPLY: (Opcode.MUL_INT, Opcode.MUL_DOUBLE),
+    TokenCode.OP_ARITHMETIC_DIVIDE: (Opcode.DIV_INT, Opcode.DIV_DOUBLE),
+}
+
+RELATIONAL = {
+    TokenCode.OP_RELATIONAL_ISEQUAL: Opcode.ISEQUAL,
+    TokenCode.OP_RELATIONAL_NOTEQUAL: Opcode.NOTEQUAL,
+    TokenCode.OP_RELATIONAL_LESSTHAN: Opcode.LESSTHAN,
+    TokenCode.OP_RELATIONAL_LESSTHANOREQUAL: Opcode.LESSTHANOREQUAL,
+    TokenCode.OP_RELATIONAL_GREATERTHAN: Opcode.GREATERTHAN,
+    TokenCode.OP_RELATIONAL_GREATERTHANOREQUAL: Opcode.GREATERTHANOREQUAL,
+}
+
+
+class CompileError(Exception):
+    def __init__(self, message: str, line: int = None) -> None:
+        super().__init__(message if line is None else f"line {line+1}: {message}")
+        self.line = line
+
+
+class Compiler:
+    def __init__(self) -> None:
+        self.code = CodeObject()
+        self.slots = {} # name: slot
+        self.constantIndex = {} # (kind, repr of the value): index into the constant pool. The kind keeps 1 and 1.0 apart, the repr 0.0 and -0.0.
+
+    def compile(self, program: Program) -> CodeObject:
+        """ This function will compile a whole program, ending it with HALT."""
+        for statement in program.statements:
+            self.statement(statement)
+        self.code.emit(Opcode.HALT)
+        return self.code
+
+    def constant(self, kind: int, value) -> int:
+        key = (kind, repr(value))
+        index = self.constantIndex.get(key)
+        if index is None:
+            index = self.constantIndex[key] = len(self.code.constants)
+            self.code.constants.append(value)
+        return index
+
+    def slot(self, name: str, line: int) -> int:
+        slot = self.slots.get(name)
+        if slot is None:
+            raise CompileError(f"Undeclared Variable {name}.", line)
+        return slot
+
+    def convert(self, fromType: int, toType: int, depth: int = 0) -> None:
+        # Converts the value depth entries below the top of the stack.
+        if fromType != toType:
+            self.code.emit(Opcode.TO_DOUBLE if toType == DOUBLE else Opcode.TO_INT, depth)
+
+    def statement(self, node) -> None:
+        # Nested ifs all end where the innermost body ends, their jumps are patched together.
+        jumps = []
+        while isinstance(node, If):
+            self.expression(node.condition)
+            jumps.append(self.code.emit(Opcode.JUMP_IF_FALSE))
+            node = node.body
+
+        if isinstance(node, Assignment):
+            slot = self.slot(node.name, node.line)
+            self.convert(self.expression(node.value), self.code.slotTypes[slot])
+            self.code.emit(Opcode.STORE, slot)
+        elif isinstance(node, Output):
+            if isinstance(node.value, Literal) and node.value.kind == TokenCode.LITERAL_STRING:
+                self.code.emit(Opcode.LOAD_CONST, self.constant(TokenCode.LITERAL_STRING, node.value.value))
+            else:
+                self.expression(node.value)
+            self.code.emit(Opcode.OUTPUT)
+        elif isinstance(node, Declaration):
+            if node.name in self.slots:
+                raise CompileError(f"Redeclaration of {node.name}.", node.line)
+            if node.dataType not in (INT, DOUBLE):
+                raise CompileError(f"Invalid type for {node.name}.", node.line)
+            self.slots[node.name] = len(self.code.slotNames)
+            self.code.slotNames.append(node.name)
+            self.code.slotTypes.append(node.dataType)
+        else:
+            raise CompileError(f"Cannot compile {type(node).__name__}.", node.line)
+
+        for jump in jumps:
+            self.code.patch(jump, len(self.code.instructions))
+
+    def expression(self, root) -> int:
+        """ This function will compile an expression and return its type, INT or DOUBLE."""
+        # Post order walk on an explicit stack. An operator is pushed back once its operands are pushed, and emitted when it comes up again.
+        types = [] # Type of every value the compiled code leaves on the VM stack.
+        pending = [(root, False)]
+        while pending:
+            node, operandsDone = pending.pop()
+            if isinstance(node, Identifier):
+                slot = self.slot(node.name, node.line)
+                self.code.emit(Opcode.LOAD, slot)
+                types.append(self.code.slotTypes[slot])
+            elif isinstance(node, Literal):
+                if node.kind == TokenCode.LITERAL_STRING:
+                    raise CompileError("A string can only be output.", node.line)
+                valueType = INT if node.kind == TokenCode.LITERAL_INTEGER else DOUBLE
+                self.code.emit(Opcode.LOAD_CONST, self.constant(valueType, node.value))
+                types.append(valueType)
+            elif isinstance(node, BinaryOp):
+                if not operandsDone:
+                    pending += [(node, True), (node.right, False), (node.left, False)] # The left operand comes off first.
+                    continue
+                rightType = types.pop()
+                leftType = types.pop()
+                resultType = DOUBLE if DOUBLE in (leftType, rightType) else INT
+                # Mixed operands are both promoted to double, the left one sits under the right one.
+                self.convert(leftType, resultType, 1)
+                self.convert(rightType, resultType)
+                if node.op in ARITHMETIC:
+                    self.code.emit(ARITHMETIC[node.op][resultType == DOUBLE])
+                    types.append(resultType)
+                else:
+                    self.code.emit(RELATIONAL[node.op])
+                    types.append(INT)
+            elif isinstance(node, Negate):
+                if not operandsDone:
+                    pending += [(node, True), (node.operand, False)]
+                    continue
+                self.code.emit(Opcode.NEGATE) # Same type as the operand.
+            else:
+                raise CompileError(f"Cannot compile {type(node).__name__}.", node.line)
+        return types.pop()
+
+
+def compileProgram(program: Program) -> CodeObject:
+    return Compiler().compile(program)
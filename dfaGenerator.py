@@ -0,0 +1,499 @@
+import argparse # For the command line options.
+import hashlib # For the fingerprint of the lexical grammar.
+import sys
+
+import lexicalAnalyzer as lex
+
+# Generates dfaTables.py, the frozen transition tables that DFALexer (dfaLexer.py) runs on.
+# The token enums in lexicalAnalyzer.py are the lexical grammar, so this is the only place that has to read them.
+# Run it again whenever an enum or checkAtomType() changes, `python dfaGenerator.py --check` tells if the tables are stale.
+
+# Pipeline:
+# 1. Parse the regex of every leaf enum (KEYWORD_INT, LITERAL_STRING, ...) into a small syntax tree.
+# 2. Expand backreferences, LITERAL_STRING's \1 can only ever be one of two quotes so it is still a regular language.
+# 3. Split the characters into classes that no pattern (and no atom type) can tell apart.
+# 4. Thompson NFA -> subset construction, every accepting DFA state is labelled with the first leaf in enum order.
+# 5. Product with the atom automaton, so a token ends exactly where atomizer() would end an atom (longest match).
+# 6. Minimize and write the tables as bytes literals.
+
+default_output = "dfaTables.py"
+
+# Stand-ins for every non-ASCII character, the runtime maps those by category instead of by table.
+# Order matters, it is the same order DFALexer checks the categories in.
+NON_ASCII_SAMPLES = ("é", "٣", " ", "§") # letter, digit, space, anything else
+
+# Labels that are not token types.
+ERROR_LABEL = "err"
+SKIP_LABEL = "skip"
+NEWLINE_LABEL = "newline"
+
+
+class CharSet:
+    """ A set of characters from a regex, either listed, ranged or negated."""
+    def __init__(self, chars = "", ranges = (), negate = False) -> None:
+        self.chars = frozenset(chars)
+        self.ranges = tuple(ranges)
+        self.negate = negate
+
+    def __contains__(self, char) -> bool:
+        found = char in self.chars or any(low <= char <= high for low, high in self.ranges)
+        return found != self.negate
+
+    def members(self) -> list:
+        """ This function will list the characters of a finite set, used for backreference expansion."""
+        if self.negate:
+            raise ValueError("Cannot expand a backreference to a negated character set.")
+        members = set(self.chars)
+        for low, high in self.ranges:
+            members.update(chr(code) for code in range(ord(low), ord(high) + 1))
+        return sorted(members)
+
+
+class RegexParser:
+    """ Recursive descent parser for the subset of regex used by the token enums."""
+    # Supported: literals, escaped punctuation, [...], [^...], ., groups, (?:...), |, *, +, ? and lazy quantifiers, \1 backreferences.
+    # Lazy quantifiers accept the same language as greedy ones, and that is all a DFA cares about.
+
+    def __init__(self, pattern: str) -> None:
+        self.pattern = pattern
+        self.pos = 0
+        self.groupCount = 0
+
+    def parse(self) -> tuple:
+        node = self.alternation()
+        if self.pos != len(self.pattern):
+            raise ValueError(f"Unexpected {self.pattern[self.pos]!r} in {self.pattern!r}.")
+        return node
+
+    def peek(self) -> str:
+        return self.pattern[self.pos] if self.pos < len(self.pattern) else ""
+
+    def next(self) -> str:
+        if self.pos >= len(self.pattern):
+            raise ValueError(f"Unexpected end of {self.pattern!r}.")
+        char = self.pattern[self.pos]
+        self.pos += 1
+        return char
+
+    def alternation(self) -> tuple:
+        branches = [self.concatenation()]
+        while self.peek() == "|":
+            self.pos += 1
+            branches.append(self.concatenation())
+        return branches[0] if len(branches) == 1 else ("alt", branches)
+
+    def concatenation(self) -> tuple:
+        items = []
+        while self.peek() not in ("", "|", ")"):
+            items.append(self.repetition())
+        return items[0] if len(items) == 1 else ("cat", items)
+
+    def repetition(self) -> tuple:
+        node = self.atom()
+        while self.peek() in ("*", "+", "?"):
+            node = ({"*": "star", "+": "plus", "?": "opt"}[self.next()], node)
+            if self.peek() == "?": # Lazy, same language.
+                self.pos += 1
+        return node
+
+    def atom(self) -> tuple:
+        char = self.next()
+        if char == "(":
+            if self.pattern.startswith("?:", self.pos):
+                self.pos += 2
+                node = self.alternation()
+            else:
+                self.groupCount += 1
+                node = ("group", self.groupCount, self.alternation())
+            if self.next() != ")":
+                raise ValueError(f"Unbalanced group in {self.pattern!r}.")
+            return node
+        if char == "[":
+            return ("set", self.charSet())
+        if char == ".":
+            return ("set", CharSet("\n", negate = True))
+        if char == "\\":
+            escaped = self.next()
+            if escaped.isdigit():
+                return ("backref", int(escaped))
+            if escaped.isalnum():
+                # \w, \d, \s and friends depend on Unicode tables, the atom types already cover those cases.
+                raise ValueError(f"Unsupported escape \\{escaped} in {self.pattern!r}.")
+            return ("set", CharSet(escaped))
+        if char in "*+?":
+            raise ValueError(f"Nothing to repeat in {self.pattern!r}.")
+        return ("set", CharSet(char))
+
+    def charSet(self) -> CharSet:
+        negate = self.peek() == "^"
+        if negate:
+            self.pos += 1
+        chars, ranges = [], []
+        first = True
+        while first or self.peek() != "]":
+            first = False
+            char = self.next()
+            if char == "\\":
+                char = self.next()
+            if self.peek() == "-" and self.pattern[self.pos + 1:self.pos + 2] not in ("", "]"):
+                self.pos += 1
+                high = self.next()
+                if high == "\\":
+                    high = self.next()
+                ranges.append((char, high))
+            else:
+                chars.append(char)
+        self.pos += 1 # Closing bracket.
+        return CharSet(chars, ranges, negate)
+
+
+def findNode(node: tuple, kind: str):
+    """ This function will return the first node of the given kind, depth first."""
+    if node[0] == kind:
+        return node
+    for child in children(node):
+        found = findNode(child, kind)
+        if found is not None:
+            return found
+    return None
+
+def children(node: tuple) -> list:
+    if node[0] in ("alt", "cat"):
+        return node[1]
+    if node[0] in ("star", "plus", "opt"):
+        return [node[1]]
+    if node[0] == "group":
+        return [node[2]]
+    return []
+
+def findGroup(node: tuple, index: int):
+    """ This function will return the capturing group with the given number."""
+    if node[0] == "group" and node[1] == index:
+        return node
+    for child in children(node):
+        found = findGroup(child, index)
+        if found is not None:
+            return found
+    return None
+
+def substitute(node: tuple, group: int, char: str) -> tuple:
+    """ This function will replace group `group` and its backreferences with the single character `char`."""
+    kind = node[0]
+    if kind == "group" and node[1] == group:
+        return ("set", CharSet(char))
+    if kind == "backref" and node[1] == group:
+        return ("set", CharSet(char))
+    if kind in ("alt", "cat"):
+        return (kind, [substitute(child, group, char) for child in node[1]])
+    if kind in ("star", "plus", "opt"):
+        return (kind, substitute(node[1], group, char))
+    if kind == "group":
+        return ("group", node[1], substitute(node[2], group, char))
+    return node
+
+def expandBackrefs(node: tuple) -> tuple:
+    """ This function will turn a backreference to a one character group into an alternation over that character."""
+    backref = findNode(node, "backref")
+    if backref is None:
+        return node
+    group = findGroup(node, backref[1])
+    if group is None or group[2][0] != "set":
+        raise ValueError("Only backreferences to a single character set can be expanded.")
+    return ("alt", [expandBackrefs(substitute(node, backref[1], char)) for char in group[2][1].members()])
+
+def collectSets(node: tuple, sets: list) -> list:
+    if node[0] == "set":
+        sets.append(node[1])
+    for child in children(node):
+        collectSets(child, sets)
+    return sets
+
+
+class NFA:
+    """ Thompson construction over character classes."""
+    def __init__(self, classSamples: list) -> None:
+        self.classSamples = classSamples # One sample character per class.
+        self.epsilon = [] # state -> [states]
+        self.moves = [] # state -> [(frozenset of classes, state)]
+
+    def newState(self) -> int:
+        self.epsilon.append([])
+        self.moves.append([])
+        return len(self.epsilon) - 1
+
+    def build(self, node: tuple) -> (int, int):
+        """ This function will return the (start, accept) states of the fragment for `node`."""
+        kind = node[0]
+        start, accept = self.newState(), self.newState()
+        if kind == "set":
+            classes = frozenset(index for index, sample in enumerate(self.classSamples) if sample in node[1])
+            self.moves[start].append((classes, accept))
+        elif kind == "cat":
+            current = start
+            for child in node[1]:
+                childStart, childAccept = self.build(child)
+                self.epsilon[current].append(childStart)
+                current = childAccept
+            self.epsilon[current].append(accept)
+        elif kind == "alt":
+            for child in node[1]:
+                childStart, childAccept = self.build(child)
+                self.epsilon[start].append(childStart)
+                self.epsilon[childAccept].append(accept)
+        elif kind in ("star", "plus", "opt"):
+            childStart, childAccept = self.build(node[1])
+            self.epsilon[start].append(childStart)
+            self.epsilon[childAccept].append(accept)
+            if kind != "plus":
+                self.epsilon[start].append(accept)
+            if kind != "opt":
+                self.epsilon[childAccept].append(childStart)
+        elif kind == "group":
+            return self.build(node[2])
+        else:
+            raise ValueError(f"Unexpanded {kind} node.")
+        return start, accept
+
+    def closure(self, states) -> frozenset:
+        stack, seen = list(states), set(states)
+        while stack:
+            for target in self.epsilon[stack.pop()]:
+                if target not in seen:
+                    seen.add(target)
+                    stack.append(target)
+        return frozenset(seen)
+
+
+def atomTypeOf(char: str) -> lex.atomType:
+    """ Same answer atomizer() gets, checkAtomType() does not use the instance."""
+    return lex.LexicalAnalyzer.checkAtomType(None, char)
+
+def buildClasses(sets: list) -> (list, dict):
+    """ This function will split ASCII plus the non-ASCII stand-ins into equivalence classes."""
+    # Two characters share a class when they have the same atom type, are both (or neither) the newline,
+    # and every character set of every pattern either contains both or neither.
+    samples = [chr(code) for code in range(128)] + list(NON_ASCII_SAMPLES)
+    signatures = {}
+    classOf = {}
+    classSamples = []
+    for char in samples:
+        signature = (atomTypeOf(char), char == "\n", tuple(char in charSet for charSet in sets))
+        if signature not in signatures:
+            signatures[signature] = len(classSamples)
+            classSamples.append(char)
+        classOf[char] = signatures[signature]
+    return classSamples, classOf
+
+def buildTokenDFA(leaves: list, classSamples: list, trees: list) -> (list, list, int):
+    """ Subset construction, returns (transitions, labels, start) where labels hold the leaf index or None."""
+    nfa = NFA(classSamples)
+    start = nfa.newState()
+    acceptOf = {}
+    for index, tree in enumerate(trees):
+        leafStart, leafAccept = nfa.build(tree)
+        nfa.epsilon[start].append(leafStart)
+        acceptOf[leafAccept] = index
+
+    startSet = nfa.closure([start])
+    states = {startSet: 0}
+    order = [startSet]
+    transitions = []
+    labels = []
+    while len(transitions) < len(order):
+        current = order[len(transitions)]
+        accepting = [acceptOf[state] for state in current if state in acceptOf]
+        labels.append(min(accepting) if accepting else None) # First leaf in enum order wins, like checkTokenType().
+        row = []
+        for classIndex in range(len(classSamples)):
+            targets = [target for state in current for classes, target in nfa.moves[state] if classIndex in classes]
+            if not targets:
+                row.append(None)
+                continue
+            targetSet = nfa.closure(targets)
+            if targetSet not in states:
+                states[targetSet] = len(order)
+                order.append(targetSet)
+            row.append(states[targetSet])
+        transitions.append(row)
+    return transitions, labels, 0
+
+
+def atomStep(state, char: str):
+    """ Transition of the atom automaton, mirrors how atomizer() combines characters."""
+    # States: "start", ("run", atomType), ("string", quoteType), "closed", "space", "newline".
+    kind = atomTypeOf(char)
+    if state == "start":
+        if char == "\n":
+            return "newline"
+        if kind == lex.atomType.space:
+            return "space"
+        if kind in (lex.atomType.string_ap, lex.atomType.string_qt):
+            return ("string", kind)
+        return ("run", kind)
+    if state == "space":
+        return "space" if kind == lex.atomType.space and char != "\n" else None
+    if state in ("closed", "newline"):
+        return None
+    if state[0] == "run":
+        return state if kind == state[1] else None
+    # Inside a string, anything but the newline goes, the same quote closes it.
+    if char == "\n":
+        return None
+    return "closed" if kind == state[1] else state
+
+def buildLexerDFA(leaves: list) -> dict:
+    """ This function will build the whole table set for the leaves, ready to be written."""
+    trees = [expandBackrefs(RegexParser(leaf.value).parse()) for leaf in leaves]
+    sets = [charSet for tree in trees for charSet in collectSets(tree, [])]
+    classSamples, classOf = buildClasses(sets)
+    tokenTransitions, tokenLabels, tokenStart = buildTokenDFA(leaves, classSamples, trees)
+
+    labelNames = [ERROR_LABEL, SKIP_LABEL, NEWLINE_LABEL] + [leaf.name for leaf in leaves]
+
+    def labelOf(atomState, tokenState) -> int:
+        if atomState == "space":
+            return labelNames.index(SKIP_LABEL)
+        if atomState == "newline":
+            return labelNames.index(NEWLINE_LABEL)
+        if tokenState is None or tokenLabels[tokenState] is None:
+            return labelNames.index(ERROR_LABEL)
+        return 3 + tokenLabels[tokenState]
+
+    # Product of the atom automaton and the token DFA. State 0 is reserved for "no transition".
+    start = ("start", tokenStart)
+    states = {start: 1}
+    order = [start]
+    rows = []
+    while len(rows) < len(order):
+        atomState, tokenState = order[len(rows)]
+        row = []
+        for classIndex, sample in enumerate(classSamples):
+            nextAtom = atomStep(atomState, sample)
+            if nextAtom is None:
+                row.append(0)
+                continue
+            nextToken = None
+            if nextAtom not in ("space", "newline") and tokenState is not None:
+                nextToken = tokenTransitions[tokenState][classIndex]
+            target = (nextAtom, nextToken)
+            if target not in states:
+                states[target] = len(order) + 1
+                order.append(target)
+            row.append(states[target])
+        rows.append(row)
+    labels = [labelOf(atomState, tokenState) for atomState, tokenState in order]
+
+    rows, labels = minimize(rows, labels)
+    return {
+        "classOf": classOf,
+        "classCount": len(classSamples),
+        "rows": rows,
+        "labels": labels,
+        "labelNames": labelNames,
+    }
+
+def minimize(rows: list, labels: list) -> (list, list):
+    """ Moore's partition refinement, the start state stays state 1."""
+    # States are 1-based in rows (row i is state i + 1), 0 is the dead state and is never merged.
+    block = [0] + [label + 1 for label in labels]
+    while True:
+        signatures = {}
+        newBlock = [0]
+        for state in range(1, len(block)):
+            signature = (block[state], tuple(block[target] for target in rows[state - 1]))
+            newBlock.append(signatures.setdefault(signature, len(signatures) + 1))
+        if len(signatures) == len(set(block[1:])):
+            break
+        block = newBlock
+
+    # Renumber so that the start state is 1 and the rest follow in discovery order.
+    renumber = {0: 0}
+    for state in range(1, len(block)):
+        renumber.setdefault(block[state], len(renumber))
+    newRows = [None] * (len(renumber) - 1)
+    newLabels = [None] * (len(renumber) - 1)
+    for state in range(1, len(block)):
+        newState = renumber[block[state]]
+        newRows[newState - 1] = [renumber[block[target]] for target in rows[state - 1]]
+        newLabels[newState - 1] = labels[state - 1]
+    return newRows, newLabels
+
+
+def fingerprint(leaves: list) -> str:
+    """ This function will hash everything the tables depend on, the leaf patterns in order and the atom type of every character."""
+    digest = hashlib.sha256()
+    for leaf in leaves:
+        digest.update(f"{leaf.name}={leaf.value}\n".encode())
+    for char in [chr(code) for code in range(128)] + list(NON_ASCII_SAMPLES):
+        digest.update(f"{ord(char)}:{atomTypeOf(char).name}\n".encode())
+    return digest.hexdigest()
+
+def renderTables(tables: dict, stamp: str) -> str:
+    """ This function will render the tables as a Python module made only of literals."""
+    stateCount = len(tables["rows"]) + 1
+    width = 1 if stateCount <= 256 else 2
+    flat = [0] * tables["classCount"] # Row of the dead state.
+    for row in tables["rows"]:
+        flat.extend(row)
+    transitions = b"".join(target.to_bytes(width, "little") for target in flat)
+    charClasses = bytes(tables["classOf"][chr(code)] for code in range(128))
+    nonAscii = tuple(tables["classOf"][char] for char in NON_ASCII_SAMPLES)
+    labels = bytes([0] + tables["labels"])
+
+    lines = [
+        "# Generated by dfaGenerator.py from the token enums in lexicalAnalyzer.py. Do not edit by hand.",
+        "# Regenerate with `python dfaGenerator.py` whenever the enums or checkAtomType() change.",
+        "",
+        f"FINGERPRINT = {stamp!r}",
+        "",
+        f"CLASS_COUNT = {tables['classCount']}",
+        f"STATE_COUNT = {stateCount}",
+        "START = 1",
+        f"TRANSITION_WIDTH = {width} # Bytes per entry, little endian.",
+        "",
+        "# Character class of every ASCII code point.",
+        f"CHAR_CLASSES = {charClasses!r}",
+        "",
+        "# Class of a non-ASCII character that is a letter, a digit, a space, or anything else (checked in that order).",
+        f"NON_ASCII_CLASSES = {nonAscii!r}",
+        "",
+        "# TRANSITIONS[state * CLASS_COUNT + class] is the next state, 0 means the token ends before this character.",
+        f"TRANSITIONS = {transitions!r}",
+        "",
+        "# LABELS[state] indexes LABEL_NAMES, the type of the token that ends in that state.",
+        f"LABELS = {labels!r}",
+        f"LABEL_NAMES = {tuple(tables['labelNames'])!r}",
+        "",
+    ]
+    return "\n".join(lines)
+
+def generate(output: str = default_output) -> str:
+    """ This function will build the DFA from the token enums and write it into `output`."""
+    leaves = lex.tokenLeaves()
+    source = renderTables(buildLexerDFA(leaves), fingerprint(leaves))
+    with open(output, "w") as file:
+        file.write(source)
+    return output
+
+def isStale() -> bool:
+    """ This function will check the fingerprint of the committed tables against the enums."""
+    try:
+        import dfaTables
+    except ImportError:
+        return True
+    return dfaTables.FINGERPRINT != fingerprint(lex.tokenLeaves())
+
+
+if __name__ == "__main__":
+    argParser = argparse.ArgumentParser(description = "Generate the DFA tables for dfaLexer.py from the token enums.")
+    argParser.add_argument("--output", default = default_output, help = "Where to write the tables module.")
+    argParser.add_argument("--check", action = "store_true", help = "Only check that the existing tables are up to date.")
+    args = argParser.parse_args()
+
+    if args.check:
+        if isStale():
+            print("dfaTables.py is out of date, run `python dfaGenerator.py`.")
+            sys.exit(1)
+        print("dfaTables.py is up to date.")
+    else:
+        print(f"Wrote {generate(args.output)}")
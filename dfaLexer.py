@@ -0,0 +1,75 @@
+import dfaTables as tables
+
+# Table-driven lexer, runs the DFA that dfaGenerator.py froze into dfaTables.py.
+# Nothing is joined or compiled here, importing this module only loads a handful of bytes literals.
+# Every character costs one class lookup and one transition lookup, and a token ends as soon as there is no transition (longest match).
+# Token boundaries and types are the same as atomizer() + tokenizer() in lexicalAnalyzer.py.
+
+class DFALexer:
+    def __init__(self, source: str) -> None:
+        self.source = source
+
+        self.classCount = tables.CLASS_COUNT
+        self.charClasses = tables.CHAR_CLASSES
+        self.transitions = tables.TRANSITIONS if tables.TRANSITION_WIDTH == 1 else memoryview(tables.TRANSITIONS).cast("H")
+        self.labels = tables.LABELS
+        self.labelNames = tables.LABEL_NAMES
+        self.skipLabel = self.labelNames.index("skip")
+        self.newlineLabel = self.labelNames.index("newline")
+
+    def nonAsciiClass(self, char: str) -> int:
+        """ This function will return the class of a character outside the ASCII table, by category like checkAtomType()."""
+        alpha, digit, space, special = tables.NON_ASCII_CLASSES
+        if char.isalpha():
+            return alpha
+        if char.isdigit():
+            return digit
+        if char.isspace():
+            return space
+        return special
+
+    def scan(self):
+        """ This function will yield (start, end, label) for every token, including the skip and newline labels."""
+        source = self.source
+        length = len(source)
+        classCount = self.classCount
+        charClasses = self.charClasses
+        transitions = self.transitions
+        labels = self.labels
+        start = tables.START
+
+        position = 0
+        while position < length:
+            state = start
+            tokenStart = position
+            while position < length:
+                code = ord(source[position])
+                charClass = charClasses[code] if code < 128 else self.nonAsciiClass(source[position])
+                nextState = transitions[state * classCount + charClass]
+                if not nextState:
+                    break
+                state = nextState
+                position += 1
+            yield tokenStart, position, labels[state]
+
+    def lines(self):
+        """ This function will yield the list of (token, type, offset) tuples of every line, empty lines included."""
+        source = self.source
+        labelNames = self.labelNames
+        skipLabel = self.skipLabel
+        newlineLabel = self.newlineLabel
+
+        line = []
+        for start, end, label in self.scan():
+            if label == skipLabel:
+                continue
+            if label == newlineLabel:
+                yield line
+                line = []
+                continue
+            line.append((source[start:end], labelNames[label], start))
+        yield line # Last line, same as split("\n") would give.
+
+    def tokenize(self) -> list:
+        """ This function will return all the tokens as (token, type) tuples, like LexicalAnalyzer.getTokens()."""
+        return [(token, typeToken) for line in self.lines() for token, typeToken, _ in line]
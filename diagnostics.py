@@ -0,0 +1,132 @@
+import bisect # For the line lookup by offset.
+import json # For the JSON lines output.
+import sys
+
+from artifacts import sinkFor
+
+# Diagnostics are collected in memory and written once at the end, instead of reopening the log for every error.
+# Line and Column count should always start at 0. But displayed as 1.
+
+class LineIndex:
+    """ Start offset of every line of a source, built once."""
+    # The source can also be bytes-like (an mmap), the lines are then decoded as they are asked for.
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.starts = [0]
+        newline = "\n" if isinstance(text, str) else b"\n"
+        find = text.find
+        position = find(newline)
+        while position != -1:
+            self.starts.append(position + 1)
+            position = find(newline, position + 1)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def position(self, offset: int) -> (int, int):
+        """ This function will return the (line, column) of an offset in O(log n)."""
+        line = bisect.bisect_right(self.starts, offset) - 1
+        return line, offset - self.starts[line]
+
+    def lineText(self, line: int) -> str:
+        """ This function will return the text of a line, without its newline."""
+        start = self.starts[line]
+        end = self.starts[line + 1] - 1 if line + 1 < len(self.starts) else len(self.text)
+        if isinstance(self.text, str):
+            return self.text[start:end]
+        return self.text[start:end].decode("utf-8")
+
+
+class Diagnostic:
+    __slots__ = ("fileName", "token", "line", "column", "lineText", "errorType", "message")
+
+    def __init__(self, fileName: str, token: str, line: int, column: int, lineText: str, errorType: str, message: str) -> None:
+        self.fileName = fileName
+        self.token = token
+        self.line = line
+        self.column = column # -1 when the token is not on the line, like str.find().
+        self.lineText = lineText
+        self.errorType = errorType
+        self.message = message
+
+    def toText(self) -> str:
+        """ This function will format the diagnostic the way error.txt always had it."""
+        return f"\nIn {self.fileName}, line {self.line+1}: {self.lineText}, column {self.column+1}.\n|\t{self.token} :: {self.errorType} :: {self.message}"
+
+    def toDict(self) -> dict:
+        return {
+            "file": self.fileName,
+            "line": self.line + 1,
+            "column": self.column + 1,
+            "token": self.token,
+            "type": self.errorType,
+            "message": self.message,
+        }
+
+    def toJson(self) -> str:
+        return json.dumps(self.toDict())
+
+
+formats = {
+    "text": ("error.txt", Diagnostic.toText, ""),
+    "jsonl": ("error.jsonl", Diagnostic.toJson, "\n"),
+}
+
+class DiagnosticSink:
+    """ Collects diagnostics for one source and writes them in one go."""
+    def __init__(self, fileName: str, source: str, directory: str = None, errorFormat: str = "text", echo: bool = True) -> None:
+        if errorFormat not in formats:
+            raise ValueError(f"Unknown error format {errorFormat!r}, expected one of {', '.join(formats)}.")
+        self.fileName = fileName
+        self.source = source
+        self.directory = directory # None keeps everything in memory. A path, or any sink of artifacts.py.
+        self.errorFormat = errorFormat
+        self.echo = echo
+        self.diagnostics = []
+        self.lineIndex = None # Only built once the first error shows up.
+
+    def index(self) -> LineIndex:
+        if self.lineIndex is None:
+            self.lineIndex = LineIndex(self.source)
+        return self.lineIndex
+
+    def report(self, token: str, line: int = None, errorMessage: str = None, errorType: str = None, offset: int = None) -> Diagnostic:
+        """ This function will record a diagnostic at an offset, or at a line when the offset is unknown."""
+        index = self.index()
+        if offset is not None:
+            line, column = index.position(offset)
+            lineText = index.lineText(line)
+        else:
+            if line is None or not 0 <= line < len(index):
+                return None # Same as before, an error outside the file has nowhere to point to.
+            lineText = index.lineText(line)
+            column = lineText.find(token)
+        diagnostic = Diagnostic(self.fileName, token, line, column, lineText, errorType, errorMessage)
+        self.diagnostics.append(diagnostic)
+        return diagnostic
+
+    def sortByPosition(self) -> None:
+        """ This function will put the diagnostics in the order of the source, errors of the same place keep their order."""
+        self.diagnostics.sort(key = lambda diagnostic: (diagnostic.line, diagnostic.column))
+
+    def __len__(self) -> int:
+        return len(self.diagnostics)
+
+    def __iter__(self):
+        return iter(self.diagnostics)
+
+    def render(self, errorFormat: str = None) -> str:
+        """ This function will render every diagnostic in the given format (text or jsonl)."""
+        _, formatter, separator = formats[errorFormat or self.errorFormat]
+        return separator.join(formatter(diagnostic) for diagnostic in self.diagnostics) + separator
+
+    def flush(self) -> None:
+        """ This function will write all the diagnostics in one write, and echo them to stdout if asked for."""
+        if not self.diagnostics:
+            return
+        if self.echo:
+            sys.stdout.write("".join(f"{diagnostic.toText()}\n" for diagnostic in self.diagnostics))
+        sink = sinkFor(self.directory)
+        if sink is not None:
+            fileName, _, _ = formats[self.errorFormat]
+            sink.write(fileName, [self.render()])
@@ -0,0 +1,372 @@
+import bisect # For the line lists kept in file order.
+
+from astNodes import Program
+from diagnostics import Diagnostic
+from lexicalAnalyzer import scanSource, cleanTag, matchEnum, DATA_TYPE, LITERAL
+from symbolTable import SymbolType, TYPE_CODES, literalValue
+from Parser import Parser
+from tokenStream import TokenStream, TokenCode, TOKEN_NAMES
+
+# Incremental version of LexicalAnalyzer + Parser for a source that keeps changing, like a file open in an editor.
+# Lexing never crosses a line, so an edit only re-lexes the lines it touches.
+# The symbol table is never replayed: every identifier keeps its declaration, assignment and literal assignment lines sorted,
+# and its entry falls out of the first declaration and the last literal assignment (same rules as lexicalAnalyzer.declareOrAssign()).
+# Statements are parsed in blocks of lines that end with an ENDLINE, only the blocks an edit touched are parsed again.
+# The statements of every block are kept in one list in file order, a re-parsed block is spliced in where its old statements were.
+# Their lines are relative to the first line of their block, so an edit never renumbers the rest of the document. lineOf() gives the real line.
+# Results are the same as LexicalAnalyzer(useScanner=True) followed by Parser.parse() on the whole text.
+
+default_order_gap = 1 << 16 # Room left between the order keys of two lines, for inserting without renumbering.
+
+ENDLINE = int(TokenCode.ENDLINE)
+IDENTIFIER = int(TokenCode.IDENTIFIER)
+OP_ASSIGNMENT = int(TokenCode.OP_ASSIGNMENT)
+OP_COLON = int(TokenCode.OP_COLON)
+
+def orderOf(line: "Line") -> int:
+    return line.order
+
+def insertLine(lines: list, line: "Line") -> None:
+    if not lines or lines[-1].order < line.order:
+        lines.append(line) # Lexing a whole text only ever appends.
+    else:
+        lines.insert(bisect.bisect_left(lines, line.order, key=orderOf), line)
+
+def removeLine(lines: list, line: "Line") -> None:
+    del lines[bisect.bisect_left(lines, line.order, key=orderOf)]
+
+
+class Line:
+    """ One line of a Document, lexed on its own."""
+    __slots__ = ("text", "order", "atoms", "codes", "columns", "identifiers", "isAssign", "tags", "errors", "block")
+
+    def __init__(self, text: str, atoms: list, codes: list, columns: list) -> None:
+        self.text = text
+        self.order = 0 # Sort key, increasing along the file. Not the line number, which changes with every edit above.
+        self.atoms = atoms
+        self.codes = codes
+        self.columns = columns
+        self.identifiers = {} # name -> index of its first token on the line.
+        self.isAssign = False
+        self.tags = {} # name -> cleaned tag, for the identifiers this line declares or assigns (see collectFacts()).
+        self.errors = [(atom, column) for atom, code, column in zip(atoms, codes, columns) if code == TokenCode.err]
+        self.block = None # The Block this line was last parsed in, None until it is parsed again.
+
+        isColon = False
+        for index, code in enumerate(codes):
+            if code == IDENTIFIER:
+                self.identifiers.setdefault(atoms[index], index)
+            elif code == OP_ASSIGNMENT:
+                self.isAssign = True
+            elif code == OP_COLON:
+                isColon = True
+        if self.identifiers and (self.isAssign or isColon):
+            parsedAtom = ''.join(atoms)
+            self.tags = {name: cleanTag(parsedAtom, name) for name in self.identifiers}
+
+    def endsStatement(self) -> bool:
+        return bool(self.codes) and self.codes[-1] == ENDLINE
+
+
+class Block:
+    """ Lines parsed together, from the line after an ENDLINE up to the next ENDLINE."""
+    __slots__ = ("first", "lines", "statements", "error")
+
+    def __init__(self, lines: list, statements: list, error: str) -> None:
+        self.first = lines[0] # Always a line of the document: a block is dropped as soon as one of its lines changes or goes away.
+        self.lines = lines
+        self.statements = statements # Node lines count from the first line of the block.
+        self.error = error
+
+def blockOrder(block: Block) -> int:
+    return block.first.order
+
+
+class Symbol:
+    """ Where one identifier shows up, every list sorted in file order."""
+    __slots__ = ("occurrences", "declarations", "assignments", "literals")
+
+    def __init__(self) -> None:
+        self.occurrences = []
+        self.declarations = []
+        self.assignments = []
+        self.literals = [] # Assignments of a literal, the only ones that set a value.
+
+
+class Document:
+    def __init__(self, text: str = "", fileName: str = "<document>") -> None:
+        self.fileName = fileName
+        self.lines = []
+        self.symbols = {} # name -> Symbol
+        self.errorLines = [] # Lines with invalid tokens, in file order.
+        self.statements = [] # Statements of every parsed block, in file order.
+        self.statementBlocks = [] # The Block of every statement, sorted by the order of their first line.
+        self.errorBlocks = [] # Blocks that failed to parse, in file order.
+        self.dirtyLines = set() # Lines that are in no Block, parse() parses the blocks around them.
+        self.edit(0, 0, text.split("\n"))
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def getText(self) -> str:
+        return "\n".join(line.text for line in self.lines)
+
+    def lineNumber(self, line: Line) -> int:
+        """ This function will return the current number of a line, starting at 0."""
+        return bisect.bisect_left(self.lines, line.order, key=orderOf)
+
+    # Edits
+
+    def edit(self, start: int, end: int, newLines: list) -> None:
+        """ This function will replace lines start to end (end excluded) with newLines, a list of line texts without newlines."""
+        if not 0 <= start <= end <= len(self.lines):
+            raise IndexError(f"Invalid line range {start}:{end} for {len(self.lines)} lines.")
+        flipped = set() # Identifiers that gained or lost their declaration.
+
+        # A block can now end or start somewhere else, the blocks of the replaced lines and of the lines around them are parsed again.
+        # They are dropped while the order keys still sort them, assignOrders() may renumber every line.
+        for line in self.lines[max(start - 1, 0):end + 1]:
+            self.dropBlock(line.block)
+        for line in self.lines[start:end]:
+            self.unregister(line, flipped)
+            self.dirtyLines.discard(line)
+        lexed = self.lex(newLines)
+        self.lines[start:end] = lexed
+        self.assignOrders(start, len(lexed))
+        for line in lexed:
+            self.register(line, flipped)
+        self.dirtyLines.update(lexed)
+
+        # Whether an identifier is declared decides if its tokens are IDENTIFIER or err, everywhere it shows up.
+        for name in flipped:
+            symbol = self.symbols.get(name)
+            if symbol is not None:
+                for line in symbol.occurrences:
+                    self.dropBlock(line.block)
+
+        if not self.lines:
+            self.edit(0, 0, [""]) # Like split("\n"), an empty text still has one line.
+
+    def replaceLine(self, lineNumber: int, text: str) -> None:
+        self.edit(lineNumber, lineNumber + 1, text.split("\n"))
+
+    def insertLines(self, lineNumber: int, newLines: list) -> None:
+        self.edit(lineNumber, lineNumber, newLines)
+
+    def deleteLines(self, start: int, end: int) -> None:
+        self.edit(start, end, [])
+
+    def lex(self, texts: list) -> list:
+        """ This function will lex lines of text into Line objects, in one scan."""
+        if not texts:
+            return []
+        text = "\n".join(texts)
+        stream = TokenStream(text)
+        atoms = []
+        atoms.append(scanSource(text, stream, atoms, [])) # Invalid tokens are kept on their Line.
+        lines = []
+        index = 0
+        lineStart = 0
+        starts = stream.starts
+        types = stream.types
+        for lineText, lineAtoms in zip(texts, atoms):
+            count = len(lineAtoms)
+            lines.append(Line(lineText, lineAtoms, list(types[index:index + count]), [offset - lineStart for offset in starts[index:index + count]]))
+            index += count
+            lineStart += len(lineText) + 1
+        return lines
+
+    def assignOrders(self, start: int, count: int) -> None:
+        # Spread the new lines between their neighbours, or renumber everything when there is no room left.
+        if not count:
+            return
+        low = self.lines[start - 1].order if start > 0 else 0
+        high = self.lines[start + count].order if start + count < len(self.lines) else low + (count + 1) * default_order_gap
+        step = (high - low) // (count + 1)
+        if step < 1:
+            for position, line in enumerate(self.lines):
+                line.order = (position + 1) * default_order_gap
+            return
+        for position in range(count):
+            self.lines[start + position].order = low + (position + 1) * step
+
+    def register(self, line: Line, flipped: set) -> None:
+        for name in line.identifiers:
+            symbol = self.symbols.get(name)
+            if symbol is None:
+                symbol = self.symbols[name] = Symbol()
+            insertLine(symbol.occurrences, line)
+            tag = line.tags.get(name)
+            if tag is None:
+                continue
+            if line.isAssign:
+                insertLine(symbol.assignments, line)
+                if matchEnum(LITERAL, tag) != False:
+                    insertLine(symbol.literals, line)
+            else:
+                if not symbol.declarations:
+                    flipped.add(name)
+                insertLine(symbol.declarations, line)
+        if line.errors:
+            insertLine(self.errorLines, line)
+
+    def unregister(self, line: Line, flipped: set) -> None:
+        for name in line.identifiers:
+            symbol = self.symbols[name]
+            removeLine(symbol.occurrences, line)
+            tag = line.tags.get(name)
+            if tag is not None:
+                if line.isAssign:
+                    removeLine(symbol.assignments, line)
+                    if matchEnum(LITERAL, tag) != False:
+                        removeLine(symbol.literals, line)
+                else:
+                    removeLine(symbol.declarations, line)
+                    if not symbol.declarations:
+                        flipped.add(name)
+            if not symbol.occurrences:
+                del self.symbols[name]
+        if line.errors:
+            removeLine(self.errorLines, line)
+
+    # Queries
+
+    def isDeclared(self, name: str) -> bool:
+        symbol = self.symbols.get(name)
+        return symbol is not None and bool(symbol.declarations)
+
+    def getTokens(self, lineNumber: int) -> list:
+        """ This function will return the (token, type) tuples of a line, undeclared identifiers as err like cleanTable() does."""
+        line = self.lines[lineNumber]
+        return [(atom, 'err' if code == IDENTIFIER and not self.isDeclared(atom) else TOKEN_NAMES[code]) for atom, code in zip(line.atoms, line.codes)]
+
+    def getSymbol(self, name: str) -> dict:
+        """ This function will return the symbol table entry of a name, None when it is not in the (cleaned) table."""
+        symbol = self.symbols.get(name)
+        if symbol is None or not symbol.declarations:
+            return None
+        declaration = symbol.declarations[0]
+        dataType = matchEnum(DATA_TYPE, declaration.tags[name])
+        entry = {'data_type': dataType, 'value': None, 'first_line': self.lineNumber(declaration) + 1, 'last_line': self.lineNumber(declaration) + 1}
+        if symbol.literals:
+            last = symbol.literals[-1]
+            tag = last.tags[name]
+            isAfter = last.order > declaration.order
+            # A literal assigned before the declaration was applied while the name was still undeclared.
+            entry['value'] = literalValue(tag, TYPE_CODES.get(dataType, SymbolType.INVALID) if isAfter else SymbolType.UNDECLARED)
+            if isAfter:
+                entry['last_line'] = self.lineNumber(last) + 1
+        return entry
+
+    def getSymbolTable(self) -> dict:
+        """ This function will return the whole symbol table, in order of first appearance like LexicalAnalyzer.symbol_table."""
+        names = [name for name, symbol in self.symbols.items() if symbol.declarations]
+        names.sort(key=self.rank)
+        return {name: self.getSymbol(name) for name in names}
+
+    def rank(self, name: str) -> tuple:
+        # Position of the first appearance of a name in the file.
+        first = self.symbols[name].occurrences[0]
+        return (first.order, first.identifiers[name])
+
+    def getDiagnostics(self) -> list:
+        """ This function will return every diagnostic, in the order LexicalAnalyzer would have reported them."""
+        diagnostics = []
+        for line in self.errorLines:
+            lineNumber = self.lineNumber(line)
+            for token, column in line.errors:
+                diagnostics.append(Diagnostic(self.fileName, token, lineNumber, column, line.text, "Lexical Error", "Invalid Token Type."))
+
+        problems = [] # (sort key, line, reported token, message)
+        for name, symbol in self.symbols.items():
+            if not symbol.declarations and not symbol.assignments:
+                continue
+            rank = self.rank(name)
+            declaration = symbol.declarations[0] if symbol.declarations else None
+            # Every assignment before the first declaration is to an undeclared variable.
+            for line in symbol.assignments:
+                if declaration is not None and line.order > declaration.order:
+                    break
+                problems.append(((line.order, rank), line, line.tags[name], f"Undeclared Variable {name}."))
+            if declaration is not None:
+                previous = self.lineNumber(declaration) + 1
+                for line in symbol.declarations[1:]:
+                    problems.append(((line.order, rank), line, name, f"Redeclaration Error of {name} previously in line: {previous}"))
+        problems.sort(key=lambda problem: problem[0])
+        for _, line, token, message in problems:
+            diagnostics.append(Diagnostic(self.fileName, token, self.lineNumber(line), line.text.find(token), line.text, "Lexical Error", message))
+        return diagnostics
+
+    def parse(self) -> Program:
+        """ This function will return the AST of the whole document, only parsing the blocks that changed. Raises the first SyntaxError."""
+        # The Program shares the document's statement list, it is only valid until the next edit. Node lines are relative to their block, see lineOf().
+        if self.dirtyLines:
+            self.parseDirty()
+        if self.errorBlocks:
+            raise SyntaxError(self.errorBlocks[0].error)
+        return Program(self.statements, 0)
+
+    def lineOf(self, index: int, node = None) -> int:
+        """ This function will return the line number (starting at 0) of statement `index` of parse(), or of a node inside it."""
+        node = self.statements[index] if node is None else node
+        return self.lineNumber(self.statementBlocks[index].first) + node.line
+
+    def dropBlock(self, block: Block) -> None:
+        """ This function will take a block's statements out of the document, its lines wait in dirtyLines to be parsed again."""
+        if block is None:
+            return
+        if block.statements:
+            position = bisect.bisect_left(self.statementBlocks, block.first.order, key=blockOrder)
+            del self.statements[position:position + len(block.statements)]
+            del self.statementBlocks[position:position + len(block.statements)]
+        if block.error is not None:
+            del self.errorBlocks[bisect.bisect_left(self.errorBlocks, block.first.order, key=blockOrder)]
+        for line in block.lines:
+            line.block = None
+            self.dirtyLines.add(line)
+
+    def parseDirty(self) -> None:
+        # Every dirty line is parsed with the whole block around it, the blocks are found by walking to the nearest ENDLINE on both sides.
+        lines = self.lines
+        pending = sorted(self.dirtyLines, key=orderOf)
+        self.dirtyLines = set()
+        end = -1
+        for line in pending:
+            if line.block is not None:
+                continue # Already parsed with an earlier block.
+            first = self.lineNumber(line)
+            if first <= end:
+                continue
+            while first > 0 and not lines[first - 1].endsStatement():
+                first -= 1
+            end = first
+            while end < len(lines) - 1 and not lines[end].endsStatement():
+                end += 1
+            block = lines[first:end + 1]
+            for other in block:
+                if other.block is not None:
+                    self.dropBlock(other.block) # Cannot happen after edit(), but a block is never left half covered.
+            self.dirtyLines.difference_update(block)
+            self.parseBlock(block)
+
+    def parseBlock(self, lines: list) -> Block:
+        tokens = []
+        for number, line in enumerate(lines):
+            for atom, code in zip(line.atoms, line.codes):
+                typeName = 'err' if code == IDENTIFIER and not self.isDeclared(atom) else TOKEN_NAMES[code]
+                tokens.append((typeName, atom, number))
+        statements, error = [], None
+        try:
+            statements = Parser(tokens).parse().statements
+        except SyntaxError as exception:
+            error = str(exception)
+        block = Block(lines, statements, error)
+        for line in lines:
+            line.block = block
+        if statements:
+            position = bisect.bisect_left(self.statementBlocks, block.first.order, key=blockOrder)
+            self.statements[position:position] = statements
+            self.statementBlocks[position:position] = [block] * len(statements)
+        if error is not None:
+            self.errorBlocks.insert(bisect.bisect_left(self.errorBlocks, block.first.order, key=blockOrder), block)
+        return block
@@ -0,0 +1,66 @@
+import os
+import re # For splitting the right hand sides.
+
+from tokenStream import TOKEN_CODES
+
+# Reads the productions of logs/grammar_rules.txt, the grammar the parser was written from.
+# Nonterminals keep their <brackets>, terminals become token names (":=" -> OP_ASSIGNMENT) so they compare directly with TOKEN_NAMES.
+# An empty alternative (ε) is an empty list.
+# The rules describe exactly what Parser.py accepts, one <line> per ENDLINE. tableGenerator.py builds the LL(1) table of tableParser.py from them.
+
+default_grammar_file = os.path.join("logs", "grammar_rules.txt")
+EPSILON = "ε"
+
+# Terminals the rules spell out as text instead of a token name.
+TERMINAL_NAMES = {
+    ":": "OP_COLON",
+    ":=": "OP_ASSIGNMENT",
+    "<<": "OP_LEFTSHIFT",
+    "(": "DELIMITER_LEFT_P",
+    ")": "DELIMITER_RIGHT_P",
+    ";": "ENDLINE",
+}
+
+symbolPattern = re.compile(r"<[a-z_]+>|:=|<<|[A-Z_]+|ε|\S")
+nonterminalPattern = re.compile(r"<[a-z_]+>")
+
+def isNonterminal(symbol: str) -> bool:
+    return nonterminalPattern.fullmatch(symbol) is not None
+
+def parseAlternative(text: str, lineCount: int) -> list:
+    """ This function will split one alternative into its symbols."""
+    symbols = []
+    for match in symbolPattern.finditer(text):
+        symbol = match.group()
+        if symbol == EPSILON:
+            continue
+        if not isNonterminal(symbol):
+            symbol = TERMINAL_NAMES.get(symbol, symbol)
+            if symbol not in TOKEN_CODES:
+                raise ValueError(f"Line {lineCount + 1}: unknown terminal {match.group()!r}.")
+        symbols.append(symbol)
+    return symbols
+
+def loadGrammar(path: str = default_grammar_file) -> dict:
+    """ This function will return {nonterminal: [alternative, ...]}, in the order of the file. The first rule is the start."""
+    grammar = {}
+    with open(path, "r", encoding="utf-8") as file:
+        for lineCount, line in enumerate(file):
+            line = line.strip()
+            if not line:
+                continue
+            left, arrow, right = line.partition("->")
+            left = left.strip()
+            if not arrow or not isNonterminal(left):
+                raise ValueError(f"Line {lineCount + 1}: expected <rule> -> alternatives, got {line!r}.")
+            grammar.setdefault(left, []).extend(parseAlternative(alternative, lineCount) for alternative in right.split("|"))
+
+    for alternatives in grammar.values():
+        for alternative in alternatives:
+            for symbol in alternative:
+                if isNonterminal(symbol) and symbol not in grammar:
+                    raise ValueError(f"{symbol} is used but has no rule.")
+    return grammar
+
+def startSymbol(grammar: dict) -> str:
+    return next(iter(grammar))
@@ -0,0 +1,80 @@
+import json # For the export.
+import time
+import tracemalloc # For the peak memory of each stage, only when it is tracing.
+from contextlib import contextmanager, nullcontext
+
+# Timings and counters of a pipeline run, collected only when an Instrumentation is handed to LexicalAnalyzer / Parser.
+# Without one every stage runs under a nullcontext, so the normal path pays nothing.
+# Peak memory needs tracemalloc to be tracing (main.py --trace-memory), it is None otherwise.
+# Every stage resets tracemalloc's peak, so a stage running inside another one hands the peak it saw back to the outer stage when it ends.
+
+class Instrumentation:
+    def __init__(self) -> None:
+        self.stages = {} # name -> {"calls", "wall", "cpu", "peakMemory"}, in the order the stages first ran.
+        self.counters = {}
+        self.hooks = []
+        self.peaks = [] # Highest traced memory of every open stage, from before the stages nested in it reset the peak.
+
+    def addHook(self, hook) -> None:
+        """ This function will register hook(event, name, data), called on "start" and "end" of every stage and on every "count"."""
+        self.hooks.append(hook)
+
+    def notify(self, event: str, name: str, data: dict) -> None:
+        for hook in self.hooks:
+            hook(event, name, data)
+
+    @contextmanager
+    def stage(self, name: str):
+        """ This function will time the block it wraps as one call of the stage."""
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            before, peak = tracemalloc.get_traced_memory()
+            if self.peaks:
+                self.peaks[-1] = max(self.peaks[-1], peak) # The outer stage's peak so far, reset_peak() is about to lose it.
+            self.peaks.append(before)
+            tracemalloc.reset_peak()
+        self.notify("start", name, {})
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            stats = self.stages.setdefault(name, {"calls": 0, "wall": 0.0, "cpu": 0.0, "peakMemory": None})
+            stats["calls"] += 1
+            stats["wall"] += wall
+            stats["cpu"] += cpu
+            if tracing:
+                peak = max(tracemalloc.get_traced_memory()[1], self.peaks.pop())
+                if self.peaks:
+                    self.peaks[-1] = max(self.peaks[-1], peak)
+                stats["peakMemory"] = max(peak - before, stats["peakMemory"] or 0)
+            self.notify("end", name, stats)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+        if self.hooks:
+            self.notify("count", name, {"amount": amount, "total": self.counters[name]})
+
+    def toDict(self) -> dict:
+        return {"stages": self.stages, "counters": self.counters}
+
+    def toJson(self, indent: int = 2) -> str:
+        return json.dumps(self.toDict(), indent=indent)
+
+    def report(self) -> str:
+        """ This function will format the stages and counters as a table, for the console."""
+        lines = [f"{'stage':<20} {'calls':>6} {'wall ms':>10} {'cpu ms':>10} {'peak KiB':>10}"]
+        for name, stats in self.stages.items():
+            peak = "" if stats["peakMemory"] is None else f"{stats['peakMemory'] / 1024:.1f}"
+            lines.append(f"{name:<20} {stats['calls']:>6} {stats['wall'] * 1000:>10.2f} {stats['cpu'] * 1000:>10.2f} {peak:>10}")
+        lines.extend(f"{name:<32} {value:>10}" for name, value in sorted(self.counters.items()))
+        return "\n".join(lines)
+
+
+def stageOf(instrumentation: Instrumentation):
+    """ This function will return the stage() of an Instrumentation, or one that does nothing for None."""
+    if instrumentation is None:
+        return lambda name: nullcontext()
+    return instrumentation.stage
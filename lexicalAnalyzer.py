@@ -1,7 +1,18 @@
 import re # For regex in token type. 
 import os # For creating directory for logs.
+import codecs # For decoding binary file objects chunk by chunk.
+import mmap # For lexing a file straight from the page cache.
+from array import array # For shifting the offsets of a lexed chunk.
+from concurrent.futures import ProcessPoolExecutor # For lexing a large file on every core.
 from enum import Enum
 
+from artifacts import sinkFor, writersFor, default_formats
+from diagnostics import DiagnosticSink
+from instrumentation import stageOf
+from symbolTable import SymbolTable, SymbolType, TYPE_CODES, literalValue
+from tableParser import TableParser
+from tokenStream import TokenStream, TokenCode, TOKEN_NAMES, TOKEN_CODES
+
 # Line and Column count should always start at 0. But displayed as 1.
 
 default_directory = "logs"
@@ -98,25 +109,444 @@ enumDictionary = {
     "ARITHMETIC": ARITHMETIC
 }
 
+# SCANNER
+# Same atom classes as checkAtomType(), so the scanner splits a line exactly where atomizer() would.
+# Whitespace (other than the newline) is left out on purpose, finditer() skips over it for free.
+atomPattern = re.compile(r"""
+      (?P<newline>\n)
+    | (?P<string>'[^'\n]*'?|"[^"\n]*"?)
+    | (?P<alpha>[^\W\d]+)
+    | (?P<numeric>[\d.]+)
+    | (?P<end>;+)
+    | (?P<del_left>\(+)
+    | (?P<del_right>\)+)
+    | (?P<arithmetic>[-+*/]+)
+    | (?P<special>[^\w\s.;()+\-*/'"]+)
+""", re.VERBOSE)
+
+def tokenLeaves(typeScope: Enum = None) -> list:
+    """ This function will return the leaf enums (KEYWORD_INT, OP_ASSIGNMENT, ...) in the same order checkTokenType() tries them."""
+    typeScope = tokenType if typeScope is None else typeScope
+    leaves = []
+    for scope in typeScope:
+        if scope.name in enumDictionary:
+            leaves.extend(tokenLeaves(enumDictionary[scope.name]))
+        else:
+            leaves.append(scope)
+    return leaves
+
+def buildTokenPattern() -> str:
+    """ This function will flatten the enum hierarchy into one alternation with a named group per leaf."""
+    # Since the leaves keep the order of checkTokenType(), the first leaf that fullmatches is the same leaf the recursion would land on.
+    # Backreferences (LITERAL_STRING) have to be shifted past the groups of the leaves before them.
+    alternatives = []
+    groupCount = 0
+    for leaf in tokenLeaves():
+        groupCount += 1 # The named group of the leaf itself.
+        shift = groupCount
+        value = re.sub(r"(?<!\\)\\(\d+)", lambda m: f"\\{int(m.group(1)) + shift}", leaf.value)
+        alternatives.append(f"(?P<{leaf.name}>{value})")
+        groupCount += re.compile(leaf.value).groups
+    return '|'.join(alternatives)
+
+# Compiled once at import, the scanner only ever calls fullmatch() on this.
+tokenPattern = re.compile(buildTokenPattern())
+
+# Same two patterns over bytes, for a memory mapped file (see mapSource()). Only ever used on ASCII, where they split and classify the same.
+byteAtomPattern = re.compile(atomPattern.pattern.encode(), re.VERBOSE)
+byteTokenPattern = re.compile(tokenPattern.pattern.encode())
+unmappablePattern = re.compile(rb"[^\x00-\x7f]|\r")
+
+# The integer type ids in tokenStream.py are numbered after the leaves, both lists have to agree.
+if [leaf.name for leaf in tokenLeaves()] != list(TOKEN_NAMES[1:]):
+    raise ImportError("TokenCode in tokenStream.py does not match the token enums, update it to the leaves of tokenLeaves().")
+
+default_chunk_size = 1 << 20 # Characters read per chunk by iter_tokens().
+default_cache_limit = 1 << 16 # Distinct atoms remembered by iter_tokens(), keeps memory bounded on huge inputs.
+
+def iter_tokens(source, chunkSize: int = default_chunk_size, cacheLimit: int = default_cache_limit):
+    """ This function will lazily yield (type, token, line, column) for every token of a path or file object."""
+    # Lexing is line oriented (strings never span lines), so a chunk can be lexed as soon as its last newline is known.
+    # Only the current chunk and the unfinished line after it are kept in memory, a single line longer than a chunk is read whole.
+    # The tuples start with the type so they can be fed to Parser directly. Line and column start at 0.
+    # These are the tokens before the symbol table, undeclared identifiers are still IDENTIFIER.
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "r") as file:
+            yield from iter_tokens(file, chunkSize, cacheLimit)
+        return
+
+    decoder = None
+    classified = {}
+    pending = ""
+    lineCount = 0
+    while True:
+        chunk = source.read(chunkSize)
+        isLast = not chunk
+        if isinstance(chunk, bytes):
+            decoder = decoder or codecs.getincrementaldecoder("utf-8")()
+            chunk = decoder.decode(chunk, final = isLast)
+        if isLast:
+            text, pending = pending, ""
+        else:
+            cut = chunk.rfind("\n")
+            if cut == -1:
+                pending += chunk
+                continue
+            text, pending = pending + chunk[:cut + 1], chunk[cut + 1:]
+
+        lineStart = 0
+        for match in atomPattern.finditer(text):
+            if match.lastgroup == 'newline':
+                lineCount += 1
+                lineStart = match.end()
+                continue
+
+            token = match.group()
+            typeToken = classified.get(token)
+            if typeToken is None:
+                result = tokenPattern.fullmatch(token)
+                typeToken = result.lastgroup if result else 'err'
+                if len(classified) < cacheLimit:
+                    classified[token] = typeToken
+            yield (typeToken, token, lineCount, match.start() - lineStart)
+
+        if isLast:
+            return
+
+def matchEnum(enumScope: Enum, target: str):
+    """ This function will return the value of the first member of enumScope that fullmatches target, False otherwise. Same as LexicalAnalyzer.tokenize()."""
+    for scope in enumScope:
+        if re.fullmatch(scope.value, target):
+            return scope.value
+    return False
+
+def cleanTag(parsedAtom: str, key: str) -> str:
+    """ This function will remove what we know from a line, ergo the identifier, assignment/colon, and the endline tokens, leaving only the likehood of data type or literal."""
+    return parsedAtom.replace(key, "").replace(OPERATOR.OP_ASSIGNMENT.value, "").replace(OPERATOR.OP_COLON.value, "").replace(tokenType.ENDLINE.value, "")
+
+def declareOrAssign(table: SymbolTable, symbolId: int, tag: str, line, mode: bool) -> str:
+    """ This function will apply one declaration (mode False) or assignment (mode True) to a symbol table record, and return the problem if any."""
+    # line is what goes into first_line/last_line. Returns None, "redeclared" or "undeclared", the caller reports it.
+    dt = table.types[symbolId]
+    if mode == False: # Declaration
+        if dt == SymbolType.UNDECLARED:
+            table.declare(symbolId, TYPE_CODES.get(matchEnum(DATA_TYPE, tag), SymbolType.INVALID), line)
+            return None
+        return "redeclared"
+
+    # Assignment
+    if matchEnum(LITERAL, tag) != False:
+        table.assign(symbolId, literalValue(tag, dt), line)
+    return "undeclared" if dt == SymbolType.UNDECLARED else None
+
+def scanSource(text: str, tokenStream: TokenStream, atoms: list, errors: list, firstLine: int = 0, classified: dict = None) -> list:
+    """ This function will scan a text into a TokenStream, one atom list per finished line, and return the atoms of the unfinished last line."""
+    # Invalid tokens are collected as (token, line, offset) in errors, the caller decides where they are reported.
+    # classified maps every distinct atom to its type id, each entry is one regex classification.
+    classified = {} if classified is None else classified
+    append = tokenStream.append
+    line = []
+    lineCount = firstLine
+    for match in atomPattern.finditer(text):
+        if match.lastgroup == 'newline':
+            atoms.append(line)
+            line = []
+            lineCount += 1
+            continue
+
+        token = match.group()
+        line.append(token)
+        code = classified.get(token)
+        if code is None:
+            result = tokenPattern.fullmatch(token)
+            code = classified[token] = TOKEN_CODES[result.lastgroup] if result else TokenCode.err
+        if code == TokenCode.err:
+            errors.append((token, lineCount, match.start()))
+        append(code, match.start(), match.end(), lineCount)
+    return line
+
+def scanBuffer(buffer, tokenStream: TokenStream, errors: list, start: int = 0, end: int = None, firstLine: int = 0, classified: dict = None) -> int:
+    """ This function will scan the bytes of a buffer (an mmap) from start to end into a TokenStream, and return the number of the last line."""
+    # Same as scanSource(), without the atoms. The stream only keeps offsets, the text of a token is decoded when somebody asks for it.
+    # The bytes of an atom are only sliced out to look it up in classified, and dropped right after.
+    classified = {} if classified is None else classified
+    append = tokenStream.append
+    lineCount = firstLine
+    for match in byteAtomPattern.finditer(buffer, start, len(buffer) if end is None else end):
+        if match.lastgroup == 'newline':
+            lineCount += 1
+            continue
+
+        token = match.group()
+        code = classified.get(token)
+        if code is None:
+            result = byteTokenPattern.fullmatch(token)
+            code = classified[token] = TOKEN_CODES[result.lastgroup] if result else TokenCode.err
+        if code == TokenCode.err:
+            errors.append((token.decode(), lineCount, match.start()))
+        append(code, match.start(), match.end(), lineCount)
+    return lineCount
+
+def mapSource(fileName: str):
+    """ This function will memory map a file for scanBuffer(), or return None when it has to be read as text."""
+    # Offsets into the bytes are only offsets into the text for ASCII with \n newlines (open() turns \r\n into \n), anything else is read as before.
+    with open(fileName, "rb") as file:
+        try:
+            buffer = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+        except ValueError:
+            return None # An empty file cannot be mapped.
+    if unmappablePattern.search(buffer):
+        buffer.close()
+        return None
+    return buffer
+
+def countLines(buffer, start: int, end: int, block: int = 1 << 24) -> int:
+    """ This function will count the newlines of buffer[start:end], one block at a time so a huge file is never copied whole."""
+    count = 0
+    for position in range(start, end, block):
+        count += buffer[position:min(end, position + block)].count(b"\n")
+    return count
+
+def collectFacts(tokenStream: TokenStream) -> (list, list):
+    """ This function will return the identifiers in order of first appearance, and the declaration/assignment facts of every line."""
+    # A fact is (line, isAssign, identifiers of the line, the line's atoms joined), everything assignOrDeclare() needs.
+    # Nothing here depends on the lines before, so each chunk of a file can collect its own facts.
+    # There is one atom per token, so a line's atoms joined are its lexemes joined. Only the identifiers and the fact lines are ever decoded.
+    types = tokenStream.types
+    lines = tokenStream.lines
+    lexeme = tokenStream.lexeme
+    seen = {}
+    facts = []
+    total = len(types)
+    index = 0
+    while index < total:
+        lineCount = lines[index]
+        lineStart = index
+        keys = {}
+        isAssign = False
+        isColon = False
+        while index < total and lines[index] == lineCount:
+            code = types[index]
+            if code == TokenCode.IDENTIFIER:
+                token = lexeme(index)
+                seen.setdefault(token, None)
+                keys.setdefault(token, None)
+            elif code == TokenCode.OP_ASSIGNMENT:
+                isAssign = True
+            elif code == TokenCode.OP_COLON:
+                isColon = True
+            index += 1
+
+        # Limited to only assignment and declaration. Rest is up to syntax and evaluation.
+        if keys and (isAssign or isColon):
+            facts.append((lineCount, isAssign, list(keys), ''.join(lexeme(position) for position in range(lineStart, index))))
+    return list(seen), facts
+
+def scanChunk(chunk: tuple) -> tuple:
+    """ This function will lex one line aligned chunk of a file, in a worker process."""
+    text, start, firstLine, isLast = chunk
+    tokenStream = TokenStream(text)
+    atoms = []
+    errors = []
+    line = scanSource(text, tokenStream, atoms, errors, firstLine)
+    if isLast:
+        atoms.append(line) # Last line, same as split("\n") would give.
+    identifiers, facts = collectFacts(tokenStream)
+    # Offsets are moved from the chunk to the whole file here, while still in parallel.
+    starts = array('q', [offset + start for offset in tokenStream.starts])
+    ends = array('q', [offset + start for offset in tokenStream.ends])
+    errors = [(token, lineCount, offset + start) for token, lineCount, offset in errors]
+    return tokenStream.types.tobytes(), starts.tobytes(), ends.tobytes(), tokenStream.lines.tobytes(), atoms, errors, identifiers, facts
+
+def scanMappedChunk(chunk: tuple) -> tuple:
+    """ This function will lex the bytes from start to end of a memory mapped file, in a worker process."""
+    # Every worker maps the file itself, so they all read the same pages of the page cache and nothing but the name is sent over.
+    # Offsets are already offsets into the whole file.
+    fileName, start, end, firstLine = chunk
+    with open(fileName, "rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+    tokenStream = TokenStream(buffer)
+    errors = []
+    lastLine = scanBuffer(buffer, tokenStream, errors, start, end, firstLine)
+    identifiers, facts = collectFacts(tokenStream)
+    return tokenStream.types.tobytes(), tokenStream.starts.tobytes(), tokenStream.ends.tobytes(), tokenStream.lines.tobytes(), lastLine, errors, identifiers, facts
+
+def splitBuffer(buffer, parts: int) -> list:
+    """ This function will cut a buffer into about `parts` chunks, each ending right after a newline, as (start, end, firstLine)."""
+    chunks = []
+    size = max(1, len(buffer) // max(1, parts))
+    start = 0
+    firstLine = 0
+    while start < len(buffer):
+        cut = buffer.find(b"\n", start + size)
+        end = len(buffer) if cut == -1 else cut + 1
+        chunks.append((start, end, firstLine))
+        firstLine += countLines(buffer, start, end)
+        start = end
+    return chunks
+
+def splitLines(text: str, parts: int) -> list:
+    """ This function will cut a text into about `parts` chunks, each ending right after a newline, as (text, start, firstLine, isLast)."""
+    chunks = []
+    size = max(1, len(text) // max(1, parts))
+    start = 0
+    firstLine = 0
+    while start < len(text):
+        cut = text.find("\n", start + size)
+        end = len(text) if cut == -1 else cut + 1
+        chunkText = text[start:end]
+        chunks.append((chunkText, start, firstLine, end == len(text)))
+        firstLine += chunkText.count("\n")
+        start = end
+    if not chunks or not chunks[-1][3]:
+        chunks.append(("", len(text), firstLine, True)) # Empty text, or a text ending with a newline still has an (empty) last line.
+    return chunks
+
+default_chunks_per_worker = 4 # More chunks than workers, so a slow chunk does not hold everyone up.
+
 class LexicalAnalyzer:
-    def __init__(self, fileToTokenize) -> None:
+    def __init__(self, fileToTokenize, useScanner: bool = False, useDFA: bool = False, errorFormat: str = "text", echoErrors: bool = True, workers: int = None, logDirectory: str = default_directory, instrumentation = None, lazy: bool = False, useMmap: bool = False, source: str = None, recoverSyntax: bool = False, logFormats: tuple = default_formats) -> None:
+        # lazy=False runs every stage and writes the logs right here, like it always did.
+        # lazy=True only reads the file. Each artifact is computed the first time it is asked for (getAtoms(), getTokenStream(), getSymbolTable(),
+        # getDiagnostics(), getProgram()) and kept, and nothing is written to the log directory unless writeLogs() is called.
+        # useMmap=True memory maps the file and lexes its bytes with the scanner (on several processes with workers). Tokens are offsets into the map,
+        # the atoms are only built if asked for. Files that are not plain ASCII with \n newlines are read as text instead. Ignored with useDFA.
+        # source is the text when the caller already has it in memory (server.py), fileToTokenize is then only the name the diagnostics show.
+        # recoverSyntax=True parses with error recovery as part of the analysis: every syntax error of the file becomes a diagnostic,
+        # merged with the lexical ones in order of position, and getProgram() raises the first of them.
+        # logDirectory can also be a sink (artifacts.MemorySink keeps the logs in memory), logFormats are the formats of the atom, token and symbol logs, see artifacts.py.
         self.fileName = fileToTokenize
-
-        with open(fileToTokenize, "r") as file:
-            self.file = file.read()
+        self.useScanner = useScanner
+        self.useDFA = useDFA
+        self.workers = workers
+        self.useMmap = useMmap
+        self.recoverSyntax = recoverSyntax
+        self.instrumentation = instrumentation # Stage timings and counters, see instrumentation.py. None costs nothing.
+        self.logDirectory = logDirectory # Where the logs go, None keeps everything in memory.
+        self.artifacts = sinkFor(logDirectory) # The same as a sink, None when nothing is written.
+        self.writers = writersFor(logFormats)
+
+        self.mapped = mapSource(fileToTokenize) if useMmap and not useDFA and source is None else None # The memory mapped file, or None.
+        if self.mapped is not None:
+            self.file = self.mapped
+        elif source is not None:
+            self.file = source
+        else:
+            with open(fileToTokenize, "r") as file:
+                self.file = file.read()
+        self.lineTotal = None # Number of lines, once a memory mapped file is lexed (there are no atoms to count).
 
         self.atoms = [] # A nested list containing the atoms of each line. Should not be modified after atomizer() (R)
-        self.tokens = [] # A list containing the tokens of the file in the form of a tuple (token, type). Can only be changed after parsing, to sort out negative values. (R)
-        self.symbol_table = {} # Considered as environment (RW)
-        self.isFirstError = True # Indicates if it is the first error, useful for the error log.
+        self.tokenStream = TokenStream(self.file) # Type ids, offsets and line of every token. Can only be changed after parsing, to sort out negative values. (R)
+        self.tokens = self.tokenStream.asTuples() # The same tokens seen as the old list of (token, type) tuples. (R)
+        self.symbol_table = SymbolTable() # Considered as environment (RW). Reads like the old dict of entries, see symbolTable.py.
+        self.diagnostics = DiagnosticSink(self.fileName, self.file, self.artifacts, errorFormat, echoErrors) # Errors are kept here and written once, in flushDiagnostics().
+
+        self.chunkFacts = None # (identifiers of every chunk, facts of every line) when parallelScanner() ran, see collectFacts().
+        self.tokensCopy = None # Copy of the token type ids, used for symbol table initialization and perhaps other uses. (RW)
+        self.program = None # The AST, once getProgram() parsed it.
+        self.syntaxError = None # What the parser raised, raised again on every getProgram().
+        self.done = set() # Stages that already ran, each one only ever runs once. See require().
+        if lazy:
+            return
 
-        self.tokensCopy = [] # used for symbol table initialization and perhaps other uses. (RW)
         # The following functions will be called in the constructor.
-        self.initDir()
-        self.atomizer()
-        self.tokenizer()
-        self.analyzeTokens()
-        self.cleanTable() # At this point, all the variables should have a data type and value. Otherwise, they are not an indentifier, or declared/assigned properly.
+        self.writeLogs() # Runs the lexer and the symbol table analysis first.
+        self.countTokens()
+
+    def require(self, name: str) -> bool:
+        """ This function will tell if a stage still has to run, and mark it as done."""
+        if name in self.done:
+            return False
+        self.done.add(name)
+        return True
+
+    def lex(self) -> None:
+        """ This function will fill the atoms and the token stream with the lexer chosen in the constructor."""
+        if not self.require("lex"):
+            return
+        stage = stageOf(self.instrumentation)
+        if self.workers is not None and self.workers > 1:
+            with stage("parallelScanner"):
+                self.parallelScanner(self.workers) # Same result as scanner(), on several processes.
+        elif self.useDFA:
+            with stage("dfaScanner"):
+                self.dfaScanner() # Same as scanner(), but driven by the frozen tables in dfaTables.py.
+        elif self.useScanner or self.useMmap:
+            with stage("scanner"):
+                self.scanner() # Does the job of both atomizer() and tokenizer() in one pass.
+        else:
+            with stage("atomizer"):
+                self.atomizer()
+            with stage("tokenizer"):
+                self.tokenizer()
+
+    def analyze(self) -> None:
+        """ This function will build the symbol table, and turn the identifiers it rejects into err tokens."""
+        if not self.require("analyze"):
+            return
+        self.lex()
+        stage = stageOf(self.instrumentation)
+        with stage("analyzeTokens"):
+            self.analyzeTokens()
+        with stage("cleanTable"):
+            self.cleanTable() # At this point, all the variables should have a data type and value. Otherwise, they are not an indentifier, or declared/assigned properly.
+
+    def parse(self) -> None:
+        """ This function will parse the token stream into self.program, keeping the SyntaxError instead of raising it."""
+        if not self.require("parse"):
+            return
+        self.analyze()
+        parser = TableParser(self.tokenStream, instrumentation=self.instrumentation, recover=self.recoverSyntax) # No recursion, any nesting depth parses.
+        try:
+            self.program = parser.parse()
+        except SyntaxError as error:
+            self.syntaxError = error
+        if parser.errors:
+            # One pass found them all. The program only has the lines that parsed, the first error still fails getProgram().
+            self.syntaxError = SyntaxError(parser.errors[0][0])
+            stream = self.tokenStream
+            for message, index in parser.errors:
+                self.reportError(stream.lexeme(index), stream.lines[index], message, "Syntax Error", offset = stream.starts[index])
+            self.diagnostics.sortByPosition()
+
+    def writeLogs(self) -> None:
+        """ This function will write the atom, token and symbol logs in every format asked for and the error log, and echo the errors."""
+        if not self.require("logs"):
+            return
+        self.analyze()
+        if self.recoverSyntax:
+            self.parse() # The syntax errors go into the same error log.
+        stage = stageOf(self.instrumentation)
+        with stage("initDir"):
+            self.initDir()
+        with stage("writeLogs"):
+            if self.artifacts is not None:
+                self.getAtoms() # Not built yet for a memory mapped file.
+            self.writeAtoms()
+            self.writeTokens()
+            self.writeSymbols()
+        with stage("flushDiagnostics"):
+            self.flushDiagnostics()
+
+    def count(self, name: str, amount: int = 1) -> None:
+        if self.instrumentation is not None:
+            self.instrumentation.count(name, amount)
+
+    def countTokens(self) -> None:
+        """ This function will add the size of the results to the counters: atoms, tokens of each type, symbols and errors."""
+        if self.instrumentation is None:
+            return
+        self.count("atoms", len(self.tokenStream)) # One atom per token.
+        self.count("lines", len(self.atoms) if self.mapped is None else self.lineTotal)
+        self.count("tokens", len(self.tokenStream))
+        types = self.tokenStream.types.tobytes()
+        for code, name in enumerate(TOKEN_NAMES):
+            amount = types.count(code)
+            if amount:
+                self.count(f"tokens.{name}", amount)
+        self.count("symbols", len(self.symbol_table))
+        self.count("errors", len(self.diagnostics))
 
     def getEnumValue(self, enumScope:Enum, target:str, isName:bool = False) -> str:
         """ This function will return the value of the enum."""
@@ -128,12 +558,12 @@ class LexicalAnalyzer:
 
     def updateTokenCopy(self) -> None:
         """ This function will update the token copy. Useful for symbol table initialization and perhaps other uses."""
-        self.tokensCopy = self.tokens.copy()
+        self.tokensCopy = self.tokenStream.types[:] # Only the type ids, the text never changes.
 
     def initDir(self) -> None:
         """ This function will create a directory for the logs."""
-        if not os.path.exists(default_directory):
-            os.makedirs(default_directory)
+        if self.artifacts is not None:
+            self.artifacts.prepare()
 
     def checkAtomType(self, char) -> atomType:
         """"""
@@ -177,7 +607,7 @@ class LexicalAnalyzer:
         # 5. If the character is not a string, then combine the characters until it finds a different type of character.
         # 6. If the character is a space, then ignore it.
         # 7. At the end of the line, append the list of tokens to the tokens list.
-        # 8. Write into NOSPACES.txt
+        # NOSPACES.txt is written by writeLogs().
 
         lineCount = 0
         for line in self.file.split("\n"):
@@ -224,21 +654,12 @@ class LexicalAnalyzer:
         # for line in self.atoms:
         #     print(line)
 
-        self.writeAtoms()
-
     def writeAtoms(self, mode = "w") -> None:
         """ This function will write the atoms into a file."""
-        with open(f'{default_directory}/NOSPACES.txt', mode) as file:
-            for line in self.atoms:
-                for atom in line:
-                    file.write(atom)
-        
-        with open(f'{default_directory}/NOSPACES_LINE.txt', mode) as file:
-            for line in self.atoms:
-                if line != []:
-                    for atom in line:
-                        file.write(atom)
-                    file.write("\n")
+        if self.artifacts is None:
+            return
+        for writer in self.writers:
+            writer.writeAtoms(self.artifacts, self.atoms, mode)
     
     # Must pass only a base or extended enum, otherwise it will not work as there's no recursion for general enums.
     def tokenize(self, typeScope: Enum, token: str, lineCount: int) -> str:
@@ -257,11 +678,14 @@ class LexicalAnalyzer:
         
         nextScope = None
 
+        tried = 0
         for ttype in typeScope:
+            tried += 1
             if re.fullmatch(ttype.value, token):
                 isToken = True
                 nextScope = ttype.name
                 break
+        self.count("regexCalls", tried)
         if not isToken:
             # If it reaches this point, this means that there's a regex in the higher scope that matches the token but not the lower scope.
             # Managed to reach this with 'errors" or "below'
@@ -290,15 +714,23 @@ class LexicalAnalyzer:
         # 3. Check the type of the token.
         # 4. If error, print and write the error. Set the token type to 'err'.
         # 5. At the end of the line, append the list of tokens to the tokens list.
-        # 6. Write into RES_SYM.txt
+        # RES_SYM.txt is written by writeLogs().
 
+        # The atoms do not remember where they came from, so each one is looked up on its line, left to right.
+        lineIndex = self.diagnostics.index()
         lineCount = 0
         for line in self.atoms:
+            lineText = lineIndex.lineText(lineCount)
+            lineStart = lineIndex.starts[lineCount]
+            position = 0
             for token in line:
+                found = lineText.find(token, position)
+                column = found if found != -1 else position # Glued strings are not a slice of the line, see TokenStream.appendText().
                 isToken, typeToken = self.checkTokenType(token, tokenType)
                 if not isToken:
-                    self.reportError(token, lineCount, "Invalid Token Type.", "Lexical Error")
-                self.tokens.append((token, typeToken))
+                    self.reportError(token, lineCount, "Invalid Token Type.", "Lexical Error", offset = lineStart + column)
+                self.tokenStream.appendText(TOKEN_CODES[typeToken], lineStart + column, token, lineCount)
+                position = column + len(token) if found != -1 else position
             lineCount += 1
         
         # Debugging
@@ -306,116 +738,206 @@ class LexicalAnalyzer:
         # for tup in self.tokens:
         #     print(f"Type: {tup[1]:<32} | Token: {tup[0]}") # 32 is the longest name length of token type. Could've used a more dynamic way to get the length. QOL
 
-        self.writeTokens()
+    def scanner(self) -> None:
+        """ Single pass alternative to atomizer() + tokenizer(), fills both self.atoms and self.tokens."""
+
+        # Algorithm:
+        # 1. Walk the whole file with atomPattern.finditer(), each match is one atom (or a newline).
+        # 2. Classify the atom with a single fullmatch against tokenPattern, the matched group name is the token type.
+        # 3. Atoms repeat a lot (keywords, operators, common identifiers), so each distinct atom is only matched once.
+        # 4. If error, print and write the error. Set the token type to 'err'.
+        # NOSPACES.txt, NOSPACES_LINE.txt and RES_SYM.txt are written by writeLogs().
+
+        # Note: atomizer() carries an unclosed string over to the next line, and glues a string to the atom before it
+        # when it is the second string of the line or is followed by a character of the same type as that atom.
+        # The scanner always treats a quoted string as its own atom, closed by the same quote or the end of the line.
+        errors = []
+        classified = {}
+        if self.mapped is not None:
+            self.lineTotal = scanBuffer(self.mapped, self.tokenStream, errors, classified = classified) + 1
+        else:
+            line = scanSource(self.file, self.tokenStream, self.atoms, errors, classified = classified)
+            self.atoms.append(line) # Last line, same as split("\n") would give.
+        self.count("regexCalls", len(classified) + 1) # One fullmatch per distinct atom, plus the finditer() over the file.
+        for token, lineCount, offset in errors:
+            self.reportError(token, lineCount, "Invalid Token Type.", "Lexical Error", offset = offset)
+
+    def dfaScanner(self) -> None:
+        """ Table-driven alternative to scanner(), fills both self.atoms and self.tokens with DFALexer."""
+        from dfaLexer import DFALexer # Only loaded when asked for.
+
+        for lineCount, line in enumerate(DFALexer(self.file).lines()):
+            for token, typeToken, offset in line:
+                if typeToken == 'err':
+                    self.reportError(token, lineCount, "Invalid Token Type.", "Lexical Error", offset = offset)
+                self.tokenStream.append(TOKEN_CODES[typeToken], offset, offset + len(token), lineCount)
+            self.atoms.append([token for token, _, _ in line])
+
+    def parallelScanner(self, workers: int) -> None:
+        """ Same as scanner(), with line aligned chunks of the file lexed on a pool of processes."""
+
+        # Algorithm:
+        # 1. Cut the file into chunks that end on a newline. Lexing never crosses a line, so every chunk lexes on its own.
+        # 2. Each worker scans its chunk and collects the identifiers and declaration/assignment facts of its lines.
+        # 3. Merge the chunks in file order: token columns, atoms, errors, and facts for analyzeTokens().
+        # NOSPACES.txt, NOSPACES_LINE.txt and RES_SYM.txt are written by writeLogs().
+        # A memory mapped file is cut by offsets and mapped again by every worker, see scanMappedChunk().
+        stream = self.tokenStream
+        self.chunkFacts = ([], [])
+        if self.mapped is not None:
+            chunks = [(self.fileName, start, end, firstLine) for start, end, firstLine in splitBuffer(self.mapped, workers * default_chunks_per_worker)]
+            self.count("chunks", len(chunks))
+            self.lineTotal = 1
+            with ProcessPoolExecutor(max_workers = workers) as executor:
+                for types, starts, ends, lines, lastLine, errors, identifiers, facts in executor.map(scanMappedChunk, chunks):
+                    stream.types.frombytes(types)
+                    stream.starts.frombytes(starts)
+                    stream.ends.frombytes(ends)
+                    stream.lines.frombytes(lines)
+                    self.lineTotal = lastLine + 1
+                    for token, lineCount, offset in errors:
+                        self.reportError(token, lineCount, "Invalid Token Type.", "Lexical Error", offset = offset)
+                    self.chunkFacts[0].append(identifiers)
+                    self.chunkFacts[1].extend(facts)
+            return
+
+        chunks = splitLines(self.file, workers * default_chunks_per_worker)
+        self.count("chunks", len(chunks))
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            for types, starts, ends, lines, atoms, errors, identifiers, facts in executor.map(scanChunk, chunks):
+                stream.types.frombytes(types)
+                stream.starts.frombytes(starts)
+                stream.ends.frombytes(ends)
+                stream.lines.frombytes(lines)
+                self.atoms.extend(atoms)
+                for token, lineCount, offset in errors:
+                    self.reportError(token, lineCount, "Invalid Token Type.", "Lexical Error", offset = offset)
+                self.chunkFacts[0].append(identifiers)
+                self.chunkFacts[1].extend(facts)
 
     def writeTokens(self, mode = 'w') -> None:
         """ This function will write the tokens into a file."""
-        with open(f'{default_directory}/RES_SYM.txt', mode) as file:
-            for tup in self.tokens:
-                file.write(f"{tup[1]:<32} token: {tup[0]} \n")
+        if self.artifacts is None:
+            return
+        # The types before cleanTable() marked the rejected identifiers, same as the file always had. Every format has the same types.
+        types = self.tokensCopy if self.tokensCopy is not None else self.tokenStream.types
+        for writer in self.writers:
+            writer.writeTokens(self.artifacts, self.tokenStream, types, mode)
+
+    def writeSymbols(self, mode = 'w') -> None:
+        """ This function will write the symbol table into a file, for the formats that have one."""
+        if self.artifacts is None:
+            return
+        for writer in self.writers:
+            writer.writeSymbols(self.artifacts, self.symbol_table, mode)
 
     def analyzeTokens(self) -> None:
         """ This function initializes the symbol table and analyzes the tokens."""
         # Base from my light understanding, symbol table is a dictionary that contains the variables and their values.
         # Despite the fact that output is technically a function, it will not be included in the symbol table for the time being.
         # Identifier - Data Type - Value - First Line - Last Line
-        
-        # Implementation (In a way, we're rebuilding the self.atoms list.)
-        # Initialize the symbol table with the identifiers and their default values.
-        # Heuristic approach, select only the lines containing the identifiers in a list.
-        # Recursively check the list for the data type and value, update accordingly.
-
-        # Initialization
-        for token in self.tokens:
-            if token[1] == tokenType.IDENTIFIER.name:
-                if token[0] not in self.symbol_table:
-                    self.symbol_table[token[0]] = {'data_type': None, 'value': 'null', 'first_line': None, 'last_line': None}
-
-        # print("\nSymbol Table:")
-        # print(self.symbol_table, end="\n\n")
-        # Then we proceed by looking up all the combined atoms and check if they have an identifier or not. 
-        
+
+        # Implementation (single pass over the tokens, line by line. self.atoms has exactly one atom per token.)
+        # 1. Collect every identifier in order of first appearance, and the lines that have an assignment or a colon (collectFacts()).
+        #    parallelScanner() already did this per chunk.
+        # 2. Add every identifier to the symbol table, in that order.
+        # 3. Apply each fact with assignOrDeclare(), in symbol table order so errors come out in the same order as always.
+
         # Heuristic
         self.updateTokenCopy()
-        analyzeList = []
-        for lineCount, atom in enumerate(self.atoms):
-            for key in self.symbol_table:
-                # Limited to only assignment and declaration. Rest is up to syntax and evaluation. 
-                if key in atom and (OPERATOR.OP_ASSIGNMENT.value in atom or OPERATOR.OP_COLON.value in atom):
-                    parsedAtom = ''.join(atom)
-                    isAssign = OPERATOR.OP_ASSIGNMENT.value in atom  # Cause it's guaranteeed that its a colon.
-                    #print("Key:", key, "Parsed Atom:", parsedAtom, "Line:", lineCount, isAssign) 
-                    # Remove what we know, ergo the identifier, assignment/colon, and the endline tokens, leaving only the likehood of data type or literal.
-                    cleanedAtom = parsedAtom.replace(key, "").replace(OPERATOR.OP_ASSIGNMENT.value, "").replace(OPERATOR.OP_COLON.value, "").replace(tokenType.ENDLINE.value, "")
-                    # That's why if the declaration or assignment is wrong syntactically, it will not be added to the symbol table and flag the error.
-                    analyzeList.append((key, cleanedAtom, lineCount, isAssign)) # key, line, lineCount, mode tuple. lineCount still starts at 0 to confer to error reporting.
-    
-        # print("Analyze List:", analyzeList)
-        # Recursion
-        self.assignOrDeclare(analyzeList)
-
-    def fixTokens(self, targetToken: any, targetLine: int) -> None:
-        """ This function will fix the tokens by removing the target token and the token before it."""
-        # print("Target Token:", targetToken, "Target Line:", targetLine)
-        for ctr, val in enumerate(self.tokensCopy):
-            if val[0] == targetToken and val[1] == tokenType.IDENTIFIER.name:
-                # print("Replacing :", self.tokens[ctr], "AT LINE:", targetLine, "VAL:", val)
-                self.tokens[ctr] = (self.tokens[ctr][0], 'err')
+        if self.chunkFacts is None:
+            identifiers, facts = collectFacts(self.tokenStream)
+            chunkIdentifiers = [identifiers]
+        else:
+            chunkIdentifiers, facts = self.chunkFacts
+        table = self.symbol_table
+        for identifiers in chunkIdentifiers:
+            for token in identifiers:
+                table.add(token) # The id of an identifier is the index of its first occurrence.
+        firstSeen = table.ids
+
+        if self.instrumentation is not None:
+            self.count("symbolLookups", self.tokensCopy.count(TokenCode.IDENTIFIER) + sum(len(keys) for _, _, keys, _ in facts)) # One per identifier token, one per fact applied.
+        for lineCount, isAssign, keys, parsedAtom in facts:
+            for key in sorted(keys, key = firstSeen.get):
+                # cleanTag() leaves only the likehood of data type or literal. That's why if the declaration or assignment is wrong syntactically, it will not be added to the symbol table and flag the error.
+                self.assignOrDeclare(key, cleanTag(parsedAtom, key), lineCount, isAssign) # lineCount still starts at 0 to confer to error reporting.
+
+    def fixTokens(self, symbolId: int) -> None:
+        """ This function will turn every occurrence of a rejected identifier into an err token."""
+        # Only its own tokens are touched, from the index cleanTable() built.
+        setType = self.tokenStream.setType
+        for position in self.symbol_table.positionsOf(symbolId):
+            setType(position, TokenCode.err)
 
     def cleanTable(self) -> None:
-        rejects = {k: v for k, v in self.symbol_table.items() if v['data_type'] is None}
-        for key in rejects: 
-            self.fixTokens(key, rejects[key]['first_line'])
+        rejects = self.symbol_table.rejects()
+        if rejects:
+            # One pass over the identifier tokens indexes all of them, instead of one pass over every token per reject.
+            self.symbol_table.indexTokens(self.tokenStream, self.tokensCopy, TokenCode.IDENTIFIER)
+        for symbolId in rejects:
+            self.fixTokens(symbolId)
             # self.reportError(key, rejects[key]['first_line']-1, f"Incorrect token: {key}.", "Lexical Error")
-        self.symbol_table = {k: v for k, v in self.symbol_table.items() if v['data_type'] is not None}
+        self.count("rejectedSymbols", len(rejects))
+        self.symbol_table.compact()
         # print("\nNew Symbol Table:")
         # print(self.symbol_table, end="\n\n")
-        print()
-
-    def assignOrDeclare(self, l) -> None:
-        token, tag, lineCount, mode = l.pop(0)
-
-        val = self.symbol_table[token]['value']
-        dt = self.symbol_table[token]['data_type']       
-        if mode == False: # Declaration
-            if dt == None:
-                self.symbol_table[token]['data_type'] = self.tokenize(DATA_TYPE, tag, lineCount)
-                self.symbol_table[token]['first_line'] = lineCount+1
-                self.symbol_table[token]['last_line'] = lineCount+1 # +1 since we're displaying this in symbol table.
-            else:
-                self.reportError(token, lineCount, f"Redeclaration Error of {token} previously in line: {self.symbol_table[token]['first_line']}", "Lexical Error")
-        else: # Assignment
-            if dt == None:
-                self.reportError(tag, lineCount, f"Undeclared Variable {token}.", "Lexical Error")
-            
-            if val == 'null':
-                result = self.tokenize(LITERAL, tag, lineCount)
-                if result != False:
-                    self.symbol_table[token]['value'] = tag if dt == DATA_TYPE.KEYWORD_DOUBLE.value else re.sub(r'\..+', '',tag)
-                    self.symbol_table[token]['first_line'] = lineCount+1 if self.symbol_table[token]['first_line'] == None else self.symbol_table[token]['first_line'] # Dont change if it exists.
-                    self.symbol_table[token]['last_line'] = lineCount+1
-            else:
-                result = self.tokenize(LITERAL, tag, lineCount)
-                if result != False:
-                    self.symbol_table[token]['value'] = tag if dt == DATA_TYPE.KEYWORD_DOUBLE.value else re.sub(r'\..+', '',tag)
-                    self.symbol_table[token]['last_line'] = lineCount+1
-
-        self.assignOrDeclare(l) if l != [] else None   
-
-    def reportError(self, targetToken: any, targetLine: int,  errorMessage = None, errorType = None, mode = 'a') -> None:
+        if self.diagnostics.echo:
+            print()
+
+    def assignOrDeclare(self, token: str, tag: str, lineCount: int, mode: bool) -> None:
+        """ This function will apply one declaration (mode False) or assignment (mode True) to the symbol table."""
+        symbolId = self.symbol_table.ids[token]
+        problem = declareOrAssign(self.symbol_table, symbolId, tag, lineCount+1, mode) # +1 since we're displaying this in symbol table.
+        if problem == "redeclared":
+            self.reportError(token, lineCount, f"Redeclaration Error of {token} previously in line: {self.symbol_table.firstLine(symbolId)}", "Lexical Error")
+        elif problem == "undeclared":
+            self.reportError(tag, lineCount, f"Undeclared Variable {token}.", "Lexical Error")
+
+    def reportError(self, targetToken: any, targetLine: int,  errorMessage = None, errorType = None, mode = 'a', offset: int = None) -> None:
         """ This function will report the error of the token with its location."""
-        mode = 'w' if self.isFirstError else 'a'
-        self.isFirstError = False
-        with open(f'{default_directory}/error.txt', mode) as log:
-            for count, line in enumerate(self.file.split("\n")):
-                if targetLine == count:
-                    targetColumn = line.find(targetToken) + 1  # Adding 1 to make it 1-indexed
-                    # Has issue since it continues to append instead of overwriting 
-                    log.write(f"\nIn {self.fileName}, line {targetLine+1}: {line}, column {targetColumn}.\n|\t{targetToken} :: {errorType} :: {errorMessage}")
-                    print(f"\nIn {self.fileName}, line {targetLine+1}: {line}, column {targetColumn}.\n|\t{targetToken} :: {errorType} :: {errorMessage}")
-                    break
+        # The offset pins the exact column when the caller knows it, otherwise the first occurrence of the token on the line is used.
+        # Nothing is written here, see flushDiagnostics().
+        self.diagnostics.report(targetToken, targetLine, errorMessage, errorType, offset)
+
+    def flushDiagnostics(self) -> None:
+        """ This function will write every reported error into the error log in a single write."""
+        self.diagnostics.flush()
     # Once the entire file has been tokenized, then we analyze and report errors. 
-    
+
+    # Getters, each one runs only the stages it needs. Once the symbol table is built the token stream has the rejected identifiers as err.
+    # The tokens are only handed out after that, so a lazy analyzer gives the same ones as an eager one and nothing changes them later.
+
+    def getAtoms(self) -> list:
+        self.lex()
+        if self.mapped is not None and self.require("atoms"):
+            # A memory mapped file is lexed without atoms, they are the lexemes of each line.
+            self.atoms = [[] for _ in range(self.lineTotal)]
+            for index, line in enumerate(self.tokenStream.lines):
+                self.atoms[line].append(self.tokenStream.lexeme(index))
+        return self.atoms
+
+    def getDiagnostics(self) -> list:
+        self.analyze()
+        if self.recoverSyntax:
+            self.parse()
+        return list(self.diagnostics)
 
     def getTokens(self) -> list:
-        return self.tokens
\ No newline at end of file
+        self.analyze()
+        return self.tokens.copy() # The old list of (token, type) tuples.
+
+    def getTokenStream(self) -> TokenStream:
+        self.analyze()
+        return self.tokenStream
+
+    def getSymbolTable(self) -> SymbolTable:
+        self.analyze()
+        return self.symbol_table
+
+    def getProgram(self):
+        """ This function will parse the tokens once the symbol table is built, raising the same SyntaxError on every call."""
+        self.parse()
+        if self.syntaxError is not None:
+            raise self.syntaxError
+        return self.program
\ No newline at end of file
@@ -1,8 +1,82 @@
-import lexicalAnalyzer as lex
-from Parser import Parser
+import argparse
+import cProfile # For --profile.
+import pstats
+import sys
+import tracemalloc # For --trace-memory.
+
+from Parser import Parser, print_trace
+from artifacts import formats, default_formats
+from cache import Cache, analyze
+from compiler import compileProgram
+from instrumentation import Instrumentation, stageOf
+from optimizer import optimizeProgram
+from pythonBackend import compilePython, sourceKey
+from virtualMachine import runProgram
+
+def main(options) -> None:
+    instrumentation = Instrumentation() if options.stats or options.stats_json else None
+    stage = stageOf(instrumentation)
+
+    analysis = analyze(options.source, Cache(options.cache) if options.cache else None, workers=options.workers, instrumentation=instrumentation, recoverSyntax=options.all_errors,
+                       logDirectory=options.logs, logFormats=tuple(options.log_format or default_formats))
+    if options.trace:
+        program = Parser(analysis.tokenStream, trace=print_trace, instrumentation=instrumentation).parse() # The trace needs a parse that actually runs.
+    else:
+        program = analysis.parse()
+
+    if options.optimize:
+        with stage("optimize"):
+            program, stats = optimizeProgram(program, analysis.symbolTable)
+        print(stats)
+
+    if (options.run or options.disassemble) and options.backend == "python":
+        with stage("compile"):
+            code = compilePython(program, sourceKey(analysis.source, options.optimize))
+        if options.disassemble:
+            print(code.source)
+        if options.run:
+            with stage("run"):
+                code.run()
+    elif options.run or options.disassemble:
+        with stage("compile"):
+            code = compileProgram(program)
+        if options.disassemble:
+            print(code.disassemble())
+        if options.run:
+            with stage("run"):
+                runProgram(code)
+
+    if options.stats:
+        print(instrumentation.report(), file=sys.stderr)
+    if options.stats_json:
+        with open(options.stats_json, "w") as file:
+            file.write(instrumentation.toJson())
 
 if __name__ == "__main__":
-    lex = lex.LexicalAnalyzer("src.txt")
-    tokens = [t[::-1] for t in lex.getTokens()]
-    parser = Parser(tokens)
-    parser.parse()
+    arguments = argparse.ArgumentParser(description="Lex and parse a source file.")
+    arguments.add_argument("source", nargs="?", default="src.txt")
+    arguments.add_argument("--workers", type=int, default=None, help="lex on this many processes, for large files")
+    arguments.add_argument("--cache", nargs="?", const=".cache", default=None, help="reuse the results of an unchanged source from this directory (.cache by default)")
+    arguments.add_argument("--logs", default="logs", help="directory of the atom, token, symbol and error logs")
+    arguments.add_argument("--log-format", action="append", choices=list(formats), default=None, help="format of the atom, token and symbol logs, can be repeated (legacy by default)")
+    arguments.add_argument("--all-errors", action="store_true", help="recover from syntax errors and report all of them with the lexical errors, not just the first")
+    arguments.add_argument("--trace", action="store_true", help="print the matched tokens after every statement, like the parser used to")
+    arguments.add_argument("--run", action="store_true", help="compile the program to bytecode and run it")
+    arguments.add_argument("--optimize", action="store_true", help="fold constants and drop dead branches before compiling")
+    arguments.add_argument("--backend", choices=("vm", "python"), default="vm", help="run on the bytecode VM, or compile the program to a Python function")
+    arguments.add_argument("--disassemble", action="store_true", help="print the compiled bytecode, or the generated Python")
+    arguments.add_argument("--stats", action="store_true", help="print the time of every stage and the counters to stderr")
+    arguments.add_argument("--stats-json", default=None, help="write the stage timings and counters to this file as JSON")
+    arguments.add_argument("--trace-memory", action="store_true", help="record the peak memory of every stage with tracemalloc (slow)")
+    arguments.add_argument("--profile", default=None, help="run under cProfile, save the profile to this file and print the top functions to stderr")
+    options = arguments.parse_args()
+
+    if options.trace_memory:
+        tracemalloc.start()
+    if options.profile:
+        profiler = cProfile.Profile()
+        profiler.runcall(main, options)
+        profiler.dump_stats(options.profile)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(20)
+    else:
+        main(options)
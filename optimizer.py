@@ -0,0 +1,164 @@
+from astNodes import Program, Declaration, Assignment, Output, If, BinaryOp, Negate, Identifier, Literal
+from tokenStream import TokenCode
+
+# Optimizes the Program returned by Parser.parse() before compiler.py sees it.
+# Every rewrite gives the same result virtualMachine.py would compute at run time, including the integer division truncating toward zero.
+# A division by a constant zero is left alone so it still fails at run time.
+# Like compiler.py, nothing here recurses: the parser builds trees as deep as the source nests them.
+
+INT = int(TokenCode.KEYWORD_INT)
+DOUBLE = int(TokenCode.KEYWORD_DOUBLE)
+LITERAL_INTEGER = int(TokenCode.LITERAL_INTEGER)
+LITERAL_DOUBLE = int(TokenCode.LITERAL_DOUBLE)
+LITERAL_STRING = int(TokenCode.LITERAL_STRING)
+
+# Symbol table data types, as LexicalAnalyzer.symbol_table has them.
+SYMBOL_TYPES = {"integer": INT, "double": DOUBLE}
+
+
+def divide(left, right, resultType: int):
+    if resultType == DOUBLE:
+        return left / right
+    quotient = abs(left) // abs(right)
+    return quotient if (left < 0) == (right < 0) else -quotient
+
+OPERATIONS = {
+    TokenCode.OP_ARITHMETIC_PLUS: lambda left, right, resultType: left + right,
+    TokenCode.OP_ARITHMETIC_MINUS: lambda left, right, resultType: left - right,
+    TokenCode.OP_ARITHMETIC_MULTIPLY: lambda left, right, resultType: left * right,
+    TokenCode.OP_ARITHMETIC_DIVIDE: divide,
+    TokenCode.OP_RELATIONAL_ISEQUAL: lambda left, right, resultType: int(left == right),
+    TokenCode.OP_RELATIONAL_NOTEQUAL: lambda left, right, resultType: int(left != right),
+    TokenCode.OP_RELATIONAL_LESSTHAN: lambda left, right, resultType: int(left < right),
+    TokenCode.OP_RELATIONAL_LESSTHANOREQUAL: lambda left, right, resultType: int(left <= right),
+    TokenCode.OP_RELATIONAL_GREATERTHAN: lambda left, right, resultType: int(left > right),
+    TokenCode.OP_RELATIONAL_GREATERTHANOREQUAL: lambda left, right, resultType: int(left >= right),
+}
+RELATIONAL = {code for code in OPERATIONS if code.name.startswith("OP_RELATIONAL_")}
+
+
+def numericLiteral(node) -> bool:
+    return isinstance(node, Literal) and node.kind != LITERAL_STRING
+
+def literalType(node: Literal) -> int:
+    return INT if node.kind == LITERAL_INTEGER else DOUBLE
+
+def makeLiteral(value, valueType: int, line: int) -> Literal:
+    if valueType == INT:
+        return Literal(LITERAL_INTEGER, int(value), line)
+    return Literal(LITERAL_DOUBLE, float(value), line)
+
+
+class Optimizer:
+    def __init__(self, symbolTable: dict = None) -> None:
+        # The symbol table only seeds types for names the program itself never declares, its own declarations always win.
+        self.types = {}
+        for name, entry in (symbolTable or {}).items():
+            if entry.get('data_type') in SYMBOL_TYPES:
+                self.types[name] = SYMBOL_TYPES[entry['data_type']]
+        self.stats = {
+            "types": {"identifiers": 0, "unresolved": 0},
+            "fold": {"expressions": 0, "conversions": 0},
+            "branches": {"removed": 0, "inlined": 0},
+        }
+
+    def optimize(self, program: Program) -> Program:
+        """ This function will return the optimized program, the stats of every pass are in self.stats."""
+        statements = []
+        for statement in program.statements:
+            statement = self.statement(statement)
+            if statement is not None:
+                statements.append(statement)
+        return Program(statements, program.line)
+
+    def statement(self, node):
+        """ This function will return the optimized statement, or None when it can never run."""
+        if isinstance(node, Declaration):
+            if node.dataType in (INT, DOUBLE):
+                self.types[node.name] = node.dataType
+            return node
+        if isinstance(node, Assignment):
+            value = self.expression(node.value)
+            targetType = self.types.get(node.name)
+            if numericLiteral(value) and targetType is not None and literalType(value) != targetType:
+                # The conversion the store would do, done now.
+                value = makeLiteral(value.value, targetType, value.line)
+                self.stats["fold"]["conversions"] += 1
+            return Assignment(node.name, value, node.line)
+        if isinstance(node, Output):
+            if isinstance(node.value, Literal):
+                return node
+            return Output(self.expression(node.value), node.line)
+        if isinstance(node, If):
+            # Nested ifs are unrolled, the ones that stay are put back around the optimized body.
+            kept = []
+            while isinstance(node, If):
+                condition = self.expression(node.condition)
+                if numericLiteral(condition):
+                    if not condition.value:
+                        self.stats["branches"]["removed"] += 1
+                        return None
+                    self.stats["branches"]["inlined"] += 1
+                else:
+                    kept.append((condition, node.line))
+                node = node.body
+            body = self.statement(node) # Not an if, this does not loop back here.
+            for condition, line in reversed(kept):
+                body = If(condition, body, line)
+            return body
+        return node
+
+    def expression(self, root):
+        """ This function will return the expression with every constant part folded."""
+        # Post order walk on an explicit stack, an operator comes up again once its operands are folded.
+        results = []
+        pending = [(root, False)]
+        while pending:
+            node, operandsDone = pending.pop()
+            if isinstance(node, BinaryOp):
+                if not operandsDone:
+                    pending += [(node, True), (node.right, False), (node.left, False)] # The left operand comes off first.
+                    continue
+                right = results.pop()
+                left = results.pop()
+                results.append(self.binary(node, left, right))
+            elif isinstance(node, Negate):
+                if not operandsDone:
+                    pending += [(node, True), (node.operand, False)]
+                    continue
+                results.append(self.negate(node, results.pop()))
+            elif isinstance(node, Identifier):
+                dataType = self.types.get(node.name)
+                self.stats["types"]["identifiers" if dataType is not None else "unresolved"] += 1
+                results.append(Identifier(node.name, node.line, dataType))
+            else:
+                results.append(node)
+        return results.pop()
+
+    def binary(self, node: BinaryOp, left, right):
+        """ This function will fold an operator whose operands are already folded."""
+        if numericLiteral(left) and numericLiteral(right):
+            resultType = DOUBLE if DOUBLE in (literalType(left), literalType(right)) else INT
+            leftValue, rightValue = left.value, right.value
+            if resultType == DOUBLE:
+                leftValue, rightValue = float(leftValue), float(rightValue)
+            if not (node.op == TokenCode.OP_ARITHMETIC_DIVIDE and rightValue == 0):
+                value = OPERATIONS[node.op](leftValue, rightValue, resultType)
+                self.stats["fold"]["expressions"] += 1
+                return makeLiteral(value, INT if node.op in RELATIONAL else resultType, node.line)
+        return BinaryOp(node.op, left, right, node.line)
+
+    def negate(self, node: Negate, operand):
+        """ This function will fold a negation whose operand is already folded."""
+        if numericLiteral(operand):
+            self.stats["fold"]["expressions"] += 1
+            return Literal(operand.kind, -operand.value, node.line)
+        if isinstance(operand, Negate):
+            self.stats["fold"]["expressions"] += 1
+            return operand.operand
+        return Negate(operand, node.line)
+
+
+def optimizeProgram(program: Program, symbolTable: dict = None) -> (Program, dict):
+    optimizer = Optimizer(symbolTable)
+    return optimizer.optimize(program), optimizer.stats
@@ -0,0 +1,69 @@
+# Generated by tableGenerator.py from logs/grammar_rules.txt. Do not edit by hand.
+# Regenerate with `python tableGenerator.py` whenever the rules or the token enums change.
+
+FINGERPRINT = '71d65de770ff30cad8e666c3186bb03a5bcda62029f90c73365f1671f564356a'
+
+TERMINAL_COUNT = 26 # Symbols below this are token codes, the rest are TERMINAL_COUNT + the index into NONTERMINALS.
+NONTERMINALS = ('<program>', '<line>', '<declaration>', '<declaration_rest>', '<declaration_end>', '<line_end>', '<type>', '<statements>', '<statement>', '<assignment_statement>', '<output_statement>', '<output_params>', '<if_statement>', '<condition>', '<relation>', '<expression>', '<simple_expression>', '<simple_expression_tail>', '<term>', '<term_tail>', '<factor>')
+START = 0
+ITEM = 1 # The start rule is a loop over this nonterminal.
+
+# (nonterminal, right hand side as symbols), in the order of the rules.
+PRODUCTIONS = (
+    (0, (27, 26)), # <program> -> <line> <program>
+    (0, ()), # <program> -> ε
+    (1, (28, 30)), # <line> -> <declaration> <declaration_end>
+    (1, (36, 33, 31)), # <line> -> <output_statement> <statements> <line_end>
+    (1, (38, 33, 31)), # <line> -> <if_statement> <statements> <line_end>
+    (1, (31,)), # <line> -> <line_end>
+    (2, (5, 29)), # <declaration> -> IDENTIFIER <declaration_rest>
+    (3, (11, 32)), # <declaration_rest> -> OP_COLON <type>
+    (3, (10, 41)), # <declaration_rest> -> OP_ASSIGNMENT <expression>
+    (4, (9,)), # <declaration_end> -> ENDLINE
+    (5, (9,)), # <line_end> -> ENDLINE
+    (6, (1,)), # <type> -> KEYWORD_INT
+    (6, (2,)), # <type> -> KEYWORD_DOUBLE
+    (6, (5,)), # <type> -> IDENTIFIER
+    (7, (34, 33)), # <statements> -> <statement> <statements>
+    (7, ()), # <statements> -> ε
+    (8, (35,)), # <statement> -> <assignment_statement>
+    (8, (36,)), # <statement> -> <output_statement>
+    (8, (38,)), # <statement> -> <if_statement>
+    (9, (5, 10, 41)), # <assignment_statement> -> IDENTIFIER OP_ASSIGNMENT <expression>
+    (10, (4, 13, 37)), # <output_statement> -> KEYWORD_OUTPUT OP_LEFTSHIFT <output_params>
+    (11, (41,)), # <output_params> -> <expression>
+    (11, (8,)), # <output_params> -> LITERAL_STRING
+    (12, (3, 24, 39, 25, 34)), # <if_statement> -> KEYWORD_IF DELIMITER_LEFT_P <condition> DELIMITER_RIGHT_P <statement>
+    (13, (41, 40)), # <condition> -> <expression> <relation>
+    (14, (18, 41)), # <relation> -> OP_RELATIONAL_ISEQUAL <expression>
+    (14, (19, 41)), # <relation> -> OP_RELATIONAL_NOTEQUAL <expression>
+    (14, (20, 41)), # <relation> -> OP_RELATIONAL_LESSTHAN <expression>
+    (14, (21, 41)), # <relation> -> OP_RELATIONAL_LESSTHANOREQUAL <expression>
+    (14, (22, 41)), # <relation> -> OP_RELATIONAL_GREATERTHAN <expression>
+    (14, (23, 41)), # <relation> -> OP_RELATIONAL_GREATERTHANOREQUAL <expression>
+    (14, ()), # <relation> -> ε
+    (15, (42,)), # <expression> -> <simple_expression>
+    (16, (44, 43)), # <simple_expression> -> <term> <simple_expression_tail>
+    (17, (14, 44, 43)), # <simple_expression_tail> -> OP_ARITHMETIC_PLUS <term> <simple_expression_tail>
+    (17, (15, 44, 43)), # <simple_expression_tail> -> OP_ARITHMETIC_MINUS <term> <simple_expression_tail>
+    (17, ()), # <simple_expression_tail> -> ε
+    (18, (46, 45)), # <term> -> <factor> <term_tail>
+    (19, (16, 46, 45)), # <term_tail> -> OP_ARITHMETIC_MULTIPLY <factor> <term_tail>
+    (19, (17, 46, 45)), # <term_tail> -> OP_ARITHMETIC_DIVIDE <factor> <term_tail>
+    (19, ()), # <term_tail> -> ε
+    (20, (5,)), # <factor> -> IDENTIFIER
+    (20, (7,)), # <factor> -> LITERAL_INTEGER
+    (20, (6,)), # <factor> -> LITERAL_DOUBLE
+    (20, (24, 41, 25)), # <factor> -> DELIMITER_LEFT_P <expression> DELIMITER_RIGHT_P
+    (20, (15, 46)), # <factor> -> OP_ARITHMETIC_MINUS <factor>
+)
+
+# TABLE[nonterminal * TERMINAL_COUNT + token code] is the production to expand, 255 means none.
+NO_PRODUCTION = 255
+TABLE = b'\xff\xff\xff\x00\x00\x00\xff\xff\xff\x00\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x04\x03\x02\xff\xff\xff\x05\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x06\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x08\x07\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\t\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\n\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x0b\x0c\xff\xff\r\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x0e\x0e\x0e\xff\xff\xff\x0f\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x12\x11\x10\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x13\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x14\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x15\x15\x15\x16\xff\xff\xff\xff\xff\xff\x15\xff\xff\xff\xff\xff\xff\xff\xff\x15\xff\xff\xff\xff\x17\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x18\x18\x18\xff\xff\xff\xff\xff\xff\xff\x18\xff\xff\xff\xff\xff\xff\xff\xff\x18\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\xff\x19\x1a\x1b\x1c\x1d\x1e\xff\x1f\xff\xff\xff\xff\xff   \xff\xff\xff\xff\xff\xff\xff \xff\xff\xff\xff\xff\xff\xff\xff \xff\xff\xff\xff\xff\xff!!!\xff\xff\xff\xff\xff\xff\xff!\xff\xff\xff\xff\xff\xff\xff\xff!\xff\xff\xff\xff$$$\xff\xff\xff$\xff\xff\xff\xff"#\xff\xff$$$$$$\xff$\xff\xff\xff\xff\xff%%%\xff\xff\xff\xff\xff\xff\xff%\xff\xff\xff\xff\xff\xff\xff\xff%\xff\xff\xff\xff(((\xff\xff\xff(\xff\xff\xff\xff((&\'((((((\xff(\xff\xff\xff\xff\xff)+*\xff\xff\xff\xff\xff\xff\xff-\xff\xff\xff\xff\xff\xff\xff\xff,\xff'
+
+# ε production of every nonterminal, taken when the table has no entry, or -1.
+DEFAULTS = (1, -1, -1, -1, -1, -1, -1, 15, -1, -1, -1, -1, -1, -1, 31, -1, -1, 36, -1, 40, -1)
+
+# FIRST of every nonterminal as token codes, for the error messages.
+EXPECTED = ((3, 4, 5, 9), (3, 4, 5, 9), (5,), (10, 11), (9,), (9,), (1, 2, 5), (3, 4, 5), (3, 4, 5), (5,), (4,), (5, 6, 7, 8, 15, 24), (3,), (5, 6, 7, 15, 24), (18, 19, 20, 21, 22, 23), (5, 6, 7, 15, 24), (5, 6, 7, 15, 24), (14, 15), (5, 6, 7, 15, 24), (16, 17), (5, 6, 7, 15, 24))
@@ -0,0 +1,265 @@
+import hashlib # For the cache keys.
+import math # For the literals that are not finite.
+import sys
+from collections import OrderedDict # For the LRU cache of compiled programs.
+
+from astNodes import Program, Declaration, Assignment, Output, If, BinaryOp, Negate, Identifier, Literal
+from compiler import CompileError
+from tokenStream import TokenCode
+from virtualMachine import VMError, default_buffer_limit
+
+# Second backend next to compiler.py + virtualMachine.py: the Program returned by Parser.parse() becomes the source of one Python function,
+# compiled once with compile() and run at CPython bytecode speed, with no dispatch loop in between.
+# Same rules as compiler.py, so both backends output the same text and end with the same values:
+# - Every declared variable is a local (v_<name>, so no name can clash with Python), 0 or 0.0 until it is assigned.
+# - The types are known here, every conversion is an explicit int() or float(). int() truncates, like assignOrDeclare() does with a double literal.
+# - Integer division truncates toward zero, comparisons give 1 or 0, a chain of ifs is one `if ... and ...:`.
+# - output<< appends to a buffer that is written out in large blocks, like the VM's.
+# Compiled programs are kept per source hash (sourceKey()), a hot program is only generated and compiled once per process.
+
+INT = int(TokenCode.KEYWORD_INT)
+DOUBLE = int(TokenCode.KEYWORD_DOUBLE)
+
+ARITHMETIC = {
+    TokenCode.OP_ARITHMETIC_PLUS: "+",
+    TokenCode.OP_ARITHMETIC_MINUS: "-",
+    TokenCode.OP_ARITHMETIC_MULTIPLY: "*",
+    TokenCode.OP_ARITHMETIC_DIVIDE: "/",
+}
+
+RELATIONAL = {
+    TokenCode.OP_RELATIONAL_ISEQUAL: "==",
+    TokenCode.OP_RELATIONAL_NOTEQUAL: "!=",
+    TokenCode.OP_RELATIONAL_LESSTHAN: "<",
+    TokenCode.OP_RELATIONAL_LESSTHANOREQUAL: "<=",
+    TokenCode.OP_RELATIONAL_GREATERTHAN: ">",
+    TokenCode.OP_RELATIONAL_GREATERTHANOREQUAL: ">=",
+}
+
+# Parameters of the generated function, none of them can start with v_.
+PARAMETERS = ("append", "buffer", "flush", "limit", "divide")
+FUNCTION_NAME = "program"
+default_cache_limit = 128 # Compiled programs kept by compilePython().
+
+def divide(left: int, right: int) -> int:
+    """ This function will divide two integers truncating toward zero, like DIV_INT."""
+    quotient = abs(left) // abs(right)
+    return quotient if (left < 0) == (right < 0) else -quotient
+
+def literalText(value) -> str:
+    # repr() of inf and nan is not Python source.
+    if isinstance(value, float) and not math.isfinite(value):
+        return f"float({str(value)!r})"
+    return repr(value)
+
+# Precedence of the generated expressions, an operand below the level its operator asks for is put in parentheses.
+SUM = 1
+PRODUCT = 2
+UNARY = 3
+ATOM = 4
+
+def wrap(text: str, level: int, minimum: int) -> str:
+    return text if level >= minimum else f"({text})"
+
+
+class PythonGenerator:
+    def __init__(self) -> None:
+        self.lines = [f"def {FUNCTION_NAME}({', '.join(PARAMETERS)}):"]
+        self.lineMap = [None] # Source line of every generated line, for the errors at run time.
+        self.types = {} # name: INT or DOUBLE
+        self.names = [] # Declared names, in the order of the VM's slots.
+
+    def generate(self, program: Program) -> str:
+        """ This function will return the source of the whole program as one function that returns the final value of every variable."""
+        for statement in program.statements:
+            self.statement(statement)
+        self.emit(f"return [{', '.join(f'v_{name}' for name in self.names)}]", None)
+        return "\n".join(self.lines) + "\n"
+
+    def emit(self, text: str, line: int, depth: int = 1) -> None:
+        self.lines.append("    " * depth + text)
+        self.lineMap.append(line)
+
+    def typeOf(self, name: str, line: int) -> int:
+        dataType = self.types.get(name)
+        if dataType is None:
+            raise CompileError(f"Undeclared Variable {name}.", line)
+        return dataType
+
+    def convert(self, text: str, fromType: int, toType: int) -> str:
+        if fromType == toType:
+            return text
+        return f"float({text})" if toType == DOUBLE else f"int({text})"
+
+    def statement(self, node, depth: int = 1) -> None:
+        if isinstance(node, Assignment):
+            dataType = self.typeOf(node.name, node.line)
+            text, valueType, _ = self.expression(node.value)
+            self.emit(f"v_{node.name} = {self.convert(text, valueType, dataType)}", node.line, depth)
+        elif isinstance(node, Output):
+            if isinstance(node.value, Literal) and node.value.kind == TokenCode.LITERAL_STRING:
+                self.emit(f"append({node.value.value + chr(10)!r})", node.line, depth)
+            else:
+                text, _, _ = self.expression(node.value)
+                self.emit(f'append(f"{{{text}}}\\n")', node.line, depth)
+            self.emit("if len(buffer) >= limit: flush()", node.line, depth)
+        elif isinstance(node, If):
+            # if (a) if (b) s only runs s when a and then b hold, with b only evaluated after a: one `if a and b:`.
+            # That also keeps the indentation at one level, however deep the ifs nest.
+            conditions = []
+            while isinstance(node, If):
+                conditions.append(self.condition(node.condition))
+                body = node.body
+                line = node.line
+                node = body
+            self.emit(f"if {' and '.join(conditions)}:", line, depth)
+            self.statement(node, depth + 1)
+        elif isinstance(node, Declaration):
+            if node.name in self.types:
+                raise CompileError(f"Redeclaration of {node.name}.", node.line)
+            if node.dataType not in (INT, DOUBLE):
+                raise CompileError(f"Invalid type for {node.name}.", node.line)
+            self.types[node.name] = node.dataType
+            self.names.append(node.name)
+            self.emit(f"v_{node.name} = {'0' if node.dataType == INT else '0.0'}", node.line, depth)
+        else:
+            raise CompileError(f"Cannot compile {type(node).__name__}.", node.line)
+
+    def condition(self, node) -> str:
+        """ This function will return an expression to test, a comparison is tested as it is instead of as 1 or 0."""
+        if isinstance(node, BinaryOp) and node.op in RELATIONAL:
+            return f"({self.comparison(node.op, self.expression(node.left), self.expression(node.right))})"
+        text, _, _ = self.expression(node)
+        return text
+
+    def promote(self, left: tuple, right: tuple) -> (tuple, tuple, int):
+        """ This function will return both operands promoted to the type of the operation, and that type."""
+        resultType = DOUBLE if DOUBLE in (left[1], right[1]) else INT
+        # Mixed operands are both promoted to double, like TO_DOUBLE does in the VM. A conversion is a call, it needs no parentheses inside or around it.
+        if left[1] != resultType:
+            left = (self.convert(left[0], left[1], resultType), resultType, ATOM)
+        if right[1] != resultType:
+            right = (self.convert(right[0], right[1], resultType), resultType, ATOM)
+        return left, right, resultType
+
+    def comparison(self, op: int, left: tuple, right: tuple) -> str:
+        # Any arithmetic binds tighter than a comparison, the operands never need parentheses.
+        left, right, _ = self.promote(left, right)
+        return f"{left[0]} {RELATIONAL[op]} {right[0]}"
+
+    def binary(self, node: BinaryOp, left: tuple, right: tuple) -> tuple:
+        if node.op in RELATIONAL:
+            return f"(1 if {self.comparison(node.op, left, right)} else 0)", INT, ATOM
+        left, right, resultType = self.promote(left, right)
+        if node.op == TokenCode.OP_ARITHMETIC_DIVIDE and resultType == INT:
+            return f"divide({left[0]}, {right[0]})", INT, ATOM
+        level = PRODUCT if node.op in (TokenCode.OP_ARITHMETIC_MULTIPLY, TokenCode.OP_ARITHMETIC_DIVIDE) else SUM
+        # Left associative, a - (b - c) keeps its parentheses and (a - b) - c does not need them.
+        return f"{wrap(left[0], left[2], level)} {ARITHMETIC[node.op]} {wrap(right[0], right[2], level + 1)}", resultType, level
+
+    def leaf(self, node) -> tuple:
+        if isinstance(node, Identifier):
+            return f"v_{node.name}", self.typeOf(node.name, node.line), ATOM
+        if isinstance(node, Literal):
+            if node.kind == TokenCode.LITERAL_STRING:
+                raise CompileError("A string can only be output.", node.line)
+            value = int(node.value) if node.kind == TokenCode.LITERAL_INTEGER else float(node.value)
+            text = literalText(value)
+            return text, INT if isinstance(value, int) else DOUBLE, UNARY if text.startswith("-") else ATOM
+        raise CompileError(f"Cannot compile {type(node).__name__}.", node.line)
+
+    def expression(self, root) -> (str, int, int):
+        """ This function will return the Python text of an expression, its type (INT or DOUBLE) and its precedence level."""
+        # Only the parentheses Python needs are written, a long chain like a + b + c + ... would otherwise hit the nesting limit of compile().
+        # No recursion either, the operands are done in post order on an explicit stack.
+        results = []
+        stack = [(root, False)]
+        while stack:
+            node, visited = stack.pop()
+            if isinstance(node, BinaryOp):
+                if not visited:
+                    stack += ((node, True), (node.right, False), (node.left, False))
+                    continue
+                right = results.pop()
+                results.append(self.binary(node, results.pop(), right))
+            elif isinstance(node, Negate):
+                if not visited:
+                    stack += ((node, True), (node.operand, False))
+                    continue
+                text, operandType, level = results.pop()
+                results.append((f"-{wrap(text, level, UNARY)}", operandType, UNARY))
+            else:
+                results.append(self.leaf(node))
+        return results.pop()
+
+
+class PythonProgram:
+    """ A program compiled to a Python function. run() can be called any number of times."""
+    __slots__ = ("source", "function", "slotNames", "slotTypes", "lineMap", "fileName")
+
+    def __init__(self, source: str, code, slotNames: list, slotTypes: list, lineMap: list, fileName: str) -> None:
+        self.source = source # The generated Python, for debugging (main.py --disassemble).
+        namespace = {}
+        exec(code, namespace)
+        self.function = namespace[FUNCTION_NAME]
+        self.slotNames = slotNames
+        self.slotTypes = slotTypes
+        self.lineMap = lineMap
+        self.fileName = fileName
+
+    def run(self, output = sys.stdout, bufferLimit: int = default_buffer_limit) -> list:
+        """ This function will run the program and return the final value of every variable, in the order of the VM's slots."""
+        # output is anything with write(), or a list that collects the written blocks.
+        buffer = []
+        write = output.append if isinstance(output, list) else output.write
+        def flush() -> None:
+            write("".join(buffer))
+            buffer.clear()
+        try:
+            return self.function(buffer.append, buffer, flush, bufferLimit, divide)
+        except ZeroDivisionError:
+            raise VMError(f"Division by zero at line {self.failedLine(sys.exc_info()[2])}.") from None
+        finally:
+            if buffer:
+                flush()
+
+    def failedLine(self, traceback) -> str:
+        # The innermost frame of the generated code is where the division was.
+        line = None
+        while traceback is not None:
+            if traceback.tb_frame.f_code.co_filename == self.fileName:
+                line = self.lineMap[traceback.tb_lineno - 1]
+            traceback = traceback.tb_next
+        return "?" if line is None else str(line + 1)
+
+
+compiledPrograms = OrderedDict() # key: PythonProgram, least recently used first.
+
+def sourceKey(source, *options) -> str:
+    """ This function will return the cache key of a source (text or bytes), options that change the program (like --optimize) are part of it."""
+    digest = hashlib.sha256(source.encode() if isinstance(source, str) else source)
+    for option in options:
+        digest.update(f"\n{option}".encode())
+    return digest.hexdigest()
+
+def compilePython(program: Program, key: str = None, cacheLimit: int = default_cache_limit) -> PythonProgram:
+    """ This function will generate and compile a program, or return the one already compiled for the same key."""
+    if key is not None and key in compiledPrograms:
+        compiledPrograms.move_to_end(key)
+        return compiledPrograms[key]
+    generator = PythonGenerator()
+    try:
+        source = generator.generate(program)
+        fileName = f"<program {key[:12] if key else id(generator)}>"
+        code = compile(source, fileName, "exec")
+    except (RecursionError, MemoryError, SyntaxError): # SyntaxError is "too many nested parentheses", the program itself is already valid.
+        raise CompileError("The program is nested too deeply for the Python backend.") from None
+    compiled = PythonProgram(source, code, generator.names, [generator.types[name] for name in generator.names], generator.lineMap, fileName)
+    if key is not None:
+        compiledPrograms[key] = compiled
+        while len(compiledPrograms) > cacheLimit:
+            compiledPrograms.popitem(last = False)
+    return compiled
+
+def runPython(program: Program, output = sys.stdout, key: str = None) -> list:
+    return compilePython(program, key).run(output)
@@ -0,0 +1,244 @@
+import argparse
+import asyncio
+import json # For the requests and the responses.
+import os
+import socket # For checkOverSocket().
+import sys
+import threading # For reading stdin without blocking the loop.
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from astNodes import toDict
+from diagnostics import LineIndex
+from lexicalAnalyzer import LexicalAnalyzer
+
+# Long running check server. The interpreter, the compiled token patterns and the parser stay loaded between checks,
+# so a check only pays for lexing and parsing its own source. Nothing is written to the log directory.
+# Requests and responses are JSON, one object per line, over a Unix socket (--socket PATH) or stdin/stdout.
+#
+#   {"id": 1, "method": "check", "path": "src.txt"}
+#   {"id": 2, "method": "check", "source": "x:integer;\n", "fileName": "scratch.HL", "tokens": false, "recover": true}
+#   {"id": 3, "method": "ping"}     {"id": 4, "method": "stats"}     {"id": 5, "method": "shutdown"}
+#
+# "recover": true lists every syntax error in the diagnostics, syntaxError is still the first one.
+# Every response carries the id of its request: {"id": 1, "ok": true, "result": {...}} or {"id": 1, "ok": false, "error": "..."}.
+# Requests are handled concurrently, responses come back as they finish and not necessarily in order.
+# Checks never run on the event loop itself, a long one would hold up every other connection.
+# With --workers, checks of sources larger than --inline-limit run on a process pool. Small ones, and every check without --workers,
+# run on the loop's thread pool in the server process: no pickling of the request and the result, and the loop keeps answering meanwhile.
+
+default_request_limit = 64 << 20 # Bytes of one request line.
+default_inline_limit = 64 << 10 # Bytes of source below which a check never goes to the process pool.
+MODES = ("scanner", "atomizer", "dfa")
+
+def checkRequest(request: dict) -> dict:
+    """ This function will lex, analyze and parse the source of a check request, and return the result as plain JSON data."""
+    # Module level, so the process pool can run it.
+    start = time.perf_counter()
+    mode = request.get("mode", "scanner")
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {', '.join(MODES)}.")
+    source = request.get("source")
+    fileName = request.get("fileName", "<source>") if source is not None else request["path"]
+    analyzer = LexicalAnalyzer(fileName, useScanner=mode == "scanner", useDFA=mode == "dfa", echoErrors=False, logDirectory=None, lazy=True, source=source,
+                               recoverSyntax=request.get("recover", False))
+
+    result = {"fileName": fileName}
+    symbolTable = analyzer.getSymbolTable()
+    result["diagnostics"] = [diagnostic.toDict() for diagnostic in analyzer.getDiagnostics()]
+    if request.get("symbols", True):
+        result["symbolTable"] = symbolTable.toDict()
+    if request.get("tokens", True):
+        stream = analyzer.getTokenStream()
+        lineStarts = LineIndex(analyzer.file).starts
+        result["tokens"] = [
+            [stream.typeName(index), stream.lexeme(index), stream.lines[index], stream.starts[index] - lineStarts[stream.lines[index]]]
+            for index in range(len(stream))
+        ]
+    result["syntaxError"] = None
+    result["ast"] = None
+    try:
+        program = analyzer.getProgram()
+        if request.get("ast", True):
+            result["ast"] = toDict(program)
+    except SyntaxError as error:
+        result["syntaxError"] = str(error)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+def sourceSize(request: dict) -> int:
+    if request.get("source") is not None:
+        return len(request["source"])
+    try:
+        return os.path.getsize(request["path"])
+    except (KeyError, OSError):
+        return 0 # Let checkRequest() report it.
+
+
+class CheckServer:
+    def __init__(self, workers: int = 0, inlineLimit: int = default_inline_limit, requestLimit: int = default_request_limit) -> None:
+        self.executor = ProcessPoolExecutor(max_workers = workers) if workers else None
+        self.inlineLimit = inlineLimit
+        self.requestLimit = requestLimit
+        self.stopping = asyncio.Event()
+        self.connections = set() # Tasks of the open socket connections, a shutdown lets them answer what they already read.
+        self.stats = {"requests": 0, "checks": 0, "pooled": 0, "errors": 0, "started": time.time()}
+
+    async def check(self, request: dict) -> dict:
+        self.stats["checks"] += 1
+        loop = asyncio.get_running_loop()
+        if self.executor is not None and sourceSize(request) > self.inlineLimit:
+            self.stats["pooled"] += 1
+            return await loop.run_in_executor(self.executor, checkRequest, request)
+        return await loop.run_in_executor(None, checkRequest, request) # The default thread pool, see the header.
+
+    async def handle(self, line: bytes) -> dict:
+        """ This function will answer one request line."""
+        self.stats["requests"] += 1
+        requestId = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("A request is a JSON object.")
+            requestId = request.get("id")
+            method = request.get("method", "check")
+            if method == "check":
+                result = await self.check(request)
+            elif method == "ping":
+                result = "pong"
+            elif method == "stats":
+                result = dict(self.stats, uptime = time.time() - self.stats["started"])
+            elif method == "shutdown":
+                self.stopping.set()
+                result = "bye"
+            else:
+                raise ValueError(f"Unknown method {method!r}.")
+        except Exception as error: # A bad request only fails its own response.
+            self.stats["errors"] += 1
+            return {"id": requestId, "ok": False, "error": f"{type(error).__name__}: {error}"}
+        return {"id": requestId, "ok": True, "result": result}
+
+    async def serveStream(self, readLine, write) -> None:
+        """ This function will answer every line readLine() gives until it runs dry, each one in its own task."""
+        tasks = set()
+
+        async def answer(line: bytes) -> None:
+            response = await self.handle(line)
+            await write((json.dumps(response) + "\n").encode())
+
+        stopping = asyncio.create_task(self.stopping.wait()) # A shutdown stops the reading even while a read is waiting.
+        try:
+            while True:
+                reading = asyncio.create_task(readLine())
+                await asyncio.wait((reading, stopping), return_when = asyncio.FIRST_COMPLETED)
+                if not reading.done():
+                    reading.cancel()
+                    break
+                line = reading.result()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(answer(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            stopping.cancel()
+
+    async def serveConnection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        async def write(data: bytes) -> None:
+            writer.write(data) # One whole line per call, so concurrent answers never interleave.
+            await writer.drain()
+
+        task = asyncio.current_task()
+        self.connections.add(task)
+        try:
+            await self.serveStream(reader.readline, write)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass # The client went away or sent a line over the limit, only its connection is dropped.
+        finally:
+            self.connections.discard(task)
+            writer.close()
+
+    async def serveUnix(self, path: str) -> None:
+        if os.path.exists(path):
+            os.remove(path) # Left over by a server that did not shut down cleanly.
+        server = await asyncio.start_unix_server(self.serveConnection, path, limit = self.requestLimit)
+        try:
+            async with server:
+                await self.stopping.wait()
+                await asyncio.gather(*self.connections, return_exceptions = True)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def serveStdio(self) -> None:
+        # stdin is read by a daemon thread, which works for pipes, terminals and redirected files alike and never holds up the exit.
+        # It reads the raw descriptor, a thread stuck in the buffered reader would block the interpreter from shutting down.
+        loop = asyncio.get_running_loop()
+        lines = asyncio.Queue()
+        output = sys.stdout.buffer
+
+        def pump() -> None:
+            pending = [] # Pieces of a line longer than one read.
+            try:
+                while True:
+                    chunk = os.read(sys.stdin.fileno(), 1 << 16)
+                    if not chunk:
+                        break
+                    start = 0
+                    cut = chunk.find(b"\n")
+                    while cut != -1:
+                        pending.append(chunk[start:cut + 1])
+                        loop.call_soon_threadsafe(lines.put_nowait, b"".join(pending))
+                        pending = []
+                        start = cut + 1
+                        cut = chunk.find(b"\n", start)
+                    if start < len(chunk):
+                        pending.append(chunk[start:])
+                if pending:
+                    loop.call_soon_threadsafe(lines.put_nowait, b"".join(pending)) # Last line without a newline.
+                loop.call_soon_threadsafe(lines.put_nowait, b"") # End of input.
+            except RuntimeError:
+                pass # The loop is closed, the server is gone.
+
+        threading.Thread(target = pump, daemon = True).start()
+
+        async def write(data: bytes) -> None:
+            output.write(data)
+            output.flush()
+
+        await self.serveStream(lines.get, write)
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+def checkOverSocket(path: str, request: dict) -> dict:
+    """ This function will send one request to a server on a Unix socket and wait for its response, for scripts and tests."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(path)
+        client.sendall((json.dumps(request) + "\n").encode())
+        with client.makefile("rb") as responses:
+            return json.loads(responses.readline())
+
+async def serve(options) -> None:
+    server = CheckServer(options.workers, options.inline_limit)
+    try:
+        if options.socket is not None:
+            await server.serveUnix(options.socket)
+        else:
+            await server.serveStdio()
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    arguments = argparse.ArgumentParser(description="Serve lex/symbol table/parse checks from one long running process.")
+    arguments.add_argument("--socket", default=None, help="listen on this Unix socket, stdin/stdout otherwise")
+    arguments.add_argument("--workers", type=int, default=0, help="processes for large checks, none by default")
+    arguments.add_argument("--inline-limit", type=int, default=default_inline_limit, help="sources up to this many bytes are checked on a thread of the server process")
+    asyncio.run(serve(arguments.parse_args()))
@@ -0,0 +1,166 @@
+import sys # For sys.intern().
+from array import array # For the columns.
+from collections.abc import Mapping
+from enum import IntEnum
+
+# Compact symbol table of one source. Every identifier is interned once and gets an id, its position of first appearance,
+# and its record lives in parallel columns indexed by that id instead of one dict per identifier.
+# Values are real numbers (or the text of a string literal), None until a literal is assigned.
+# Lines start at 1 like they are displayed, 0 means none.
+# positionsOf() answers where an identifier occurs in the token stream from an index built once, so rejecting an
+# identifier only touches its own tokens.
+# Seen as a Mapping it still gives the old {name: {'data_type', 'value', 'first_line', 'last_line'}} entries, for the callers
+# (optimizer.py, server.py, ...) that read it as a dict.
+
+class SymbolType(IntEnum):
+    UNDECLARED = 0 # Never declared, cleanTable() rejects it. The old data_type None.
+    INVALID = 1 # Declared with something that is not a type. The old data_type False.
+    INTEGER = 2
+    DOUBLE = 3
+
+# What the old entries had in data_type.
+TYPE_NAMES = (None, False, "integer", "double")
+TYPE_CODES = {"integer": SymbolType.INTEGER, "double": SymbolType.DOUBLE}
+NO_LINE = 0
+
+def literalValue(tag: str, symbolType: int):
+    """ This function will turn the text of an assigned literal into its value, a double keeps its fraction and the rest is truncated."""
+    if tag[:1] in ("'", '"'):
+        return tag[1:-1]
+    if symbolType == SymbolType.DOUBLE:
+        return float(tag)
+    return int(tag.partition(".")[0]) # Same cut as re.sub(r'\..+', '', tag) had.
+
+
+class SymbolTable(Mapping):
+    __slots__ = ("ids", "names", "types", "values", "firstLines", "lastLines", "offsets", "positions")
+
+    def __init__(self) -> None:
+        self.ids = {} # name -> id
+        self.names = [] # id -> name
+        self.types = bytearray() # id -> SymbolType
+        self.values = [] # id -> int, float, str or None
+        self.firstLines = array("I")
+        self.lastLines = array("I")
+        self.offsets = None # Index of the token positions, see indexTokens().
+        self.positions = None
+
+    def add(self, name: str) -> int:
+        """ This function will return the id of a name, adding an undeclared record the first time it is seen."""
+        symbolId = self.ids.get(name)
+        if symbolId is None:
+            name = sys.intern(name)
+            symbolId = self.ids[name] = len(self.names)
+            self.names.append(name)
+            self.types.append(SymbolType.UNDECLARED)
+            self.values.append(None)
+            self.firstLines.append(NO_LINE)
+            self.lastLines.append(NO_LINE)
+        return symbolId
+
+    def declare(self, symbolId: int, symbolType: int, line: int) -> None:
+        self.types[symbolId] = symbolType
+        self.firstLines[symbolId] = line
+        self.lastLines[symbolId] = line
+
+    def assign(self, symbolId: int, value, line: int) -> None:
+        self.values[symbolId] = value
+        if self.firstLines[symbolId] == NO_LINE: # Dont change if it exists.
+            self.firstLines[symbolId] = line
+        self.lastLines[symbolId] = line
+
+    def firstLine(self, symbolId: int):
+        line = self.firstLines[symbolId]
+        return None if line == NO_LINE else line
+
+    def lastLine(self, symbolId: int):
+        line = self.lastLines[symbolId]
+        return None if line == NO_LINE else line
+
+    def rejects(self) -> list:
+        """ This function will return the ids of the identifiers that were never declared."""
+        return [symbolId for symbolId, symbolType in enumerate(self.types) if symbolType == SymbolType.UNDECLARED]
+
+    def indexTokens(self, tokenStream, types, identifier: int) -> None:
+        """ This function will index the token positions of every identifier, types are the token types to look at."""
+        # One pass over the identifier tokens, then a counting sort into one positions array: the positions of id i are
+        # positions[offsets[i]:offsets[i + 1]], in stream order.
+        data = bytes(types)
+        lexeme = tokenStream.lexeme
+        ids = self.ids
+        owners = array("I")
+        found = array("I")
+        marker = bytes((identifier,))
+        index = data.find(marker)
+        while index != -1:
+            symbolId = ids.get(lexeme(index))
+            if symbolId is not None:
+                owners.append(symbolId)
+                found.append(index)
+            index = data.find(marker, index + 1)
+
+        counts = array("I", bytes(4 * (len(self.names) + 1)))
+        for symbolId in owners:
+            counts[symbolId + 1] += 1
+        for symbolId in range(len(self.names)):
+            counts[symbolId + 1] += counts[symbolId]
+        self.offsets = counts
+        self.positions = array("I", bytes(4 * len(found)))
+        fill = array("I", counts[:-1])
+        for symbolId, index in zip(owners, found):
+            self.positions[fill[symbolId]] = index
+            fill[symbolId] += 1
+
+    def positionsOf(self, symbolId: int) -> array:
+        """ This function will return the token positions of an identifier, indexTokens() has to run first."""
+        return self.positions[self.offsets[symbolId]:self.offsets[symbolId + 1]]
+
+    def compact(self) -> None:
+        """ This function will drop the undeclared records, the ids of the others are renumbered in the same order."""
+        keep = [symbolId for symbolId, symbolType in enumerate(self.types) if symbolType != SymbolType.UNDECLARED]
+        if len(keep) == len(self.names):
+            return
+        self.names = [self.names[symbolId] for symbolId in keep]
+        self.ids = {name: symbolId for symbolId, name in enumerate(self.names)}
+        self.types = bytearray(self.types[symbolId] for symbolId in keep)
+        self.values = [self.values[symbolId] for symbolId in keep]
+        self.firstLines = array("I", (self.firstLines[symbolId] for symbolId in keep))
+        self.lastLines = array("I", (self.lastLines[symbolId] for symbolId in keep))
+        self.offsets = self.positions = None # The index belongs to the old ids.
+
+    # Mapping of name -> old style entry.
+
+    def entry(self, symbolId: int) -> dict:
+        return {
+            'data_type': TYPE_NAMES[self.types[symbolId]],
+            'value': self.values[symbolId],
+            'first_line': self.firstLine(symbolId),
+            'last_line': self.lastLine(symbolId),
+        }
+
+    def __getitem__(self, name: str) -> dict:
+        return self.entry(self.ids[name])
+
+    def __contains__(self, name) -> bool:
+        return name in self.ids
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def toDict(self) -> dict:
+        """ This function will return the whole table as plain dicts, for JSON."""
+        return {name: self.entry(symbolId) for symbolId, name in enumerate(self.names)}
+
+    def __getstate__(self):
+        # The position index is only needed while cleaning, it is not kept in a cache entry.
+        return (self.names, bytes(self.types), self.values, self.firstLines, self.lastLines)
+
+    def __setstate__(self, state) -> None:
+        names, types, self.values, self.firstLines, self.lastLines = state
+        self.names = names
+        self.ids = {sys.intern(name): symbolId for symbolId, name in enumerate(names)}
+        self.types = bytearray(types)
+        self.offsets = self.positions = None
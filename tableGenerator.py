@@ -0,0 +1,231 @@
+import argparse # For the command line options.
+import hashlib # For the fingerprint of the grammar.
+import sys
+
+from grammar import loadGrammar, isNonterminal, startSymbol, default_grammar_file
+from tokenStream import TOKEN_NAMES, TOKEN_CODES
+
+# Generates parseTables.py, the LL(1) parse table that TableParser (tableParser.py) runs on.
+# logs/grammar_rules.txt is the syntactic grammar, so this is the only place that has to read it.
+# Run it again whenever the rules change, `python tableGenerator.py --check` tells if the table is stale.
+
+# Pipeline:
+# 1. Load the rules (grammar.py) and replace immediate left recursion, A -> A a | b becomes A -> b A_tail, A_tail -> a A_tail | ε.
+# 2. Compute the nullable nonterminals, FIRST and FOLLOW.
+# 3. Fill TABLE[nonterminal, token] with the one production to expand, any cell claimed twice is a conflict and stops the build.
+# 4. Write the productions and the table as literals, terminals as token codes and nonterminals after them.
+
+default_output = "parseTables.py"
+END = "$" # End of input in the FOLLOW sets, never a column of the table.
+NO_PRODUCTION = 0xff
+
+
+def removeLeftRecursion(grammar: dict) -> dict:
+    """ This function will rewrite every immediately left recursive rule into a right recursive tail."""
+    result = {}
+    for name, alternatives in grammar.items():
+        recursive = [alternative[1:] for alternative in alternatives if alternative[:1] == [name]]
+        if not recursive:
+            result[name] = alternatives
+            continue
+        tail = name[:-1] + "_tail>"
+        if tail in grammar:
+            raise ValueError(f"Cannot name the tail of {name}, {tail} already has a rule.")
+        result[name] = [alternative + [tail] for alternative in alternatives if alternative[:1] != [name]]
+        result[tail] = [alternative + [tail] for alternative in recursive] + [[]]
+    return result
+
+def nullables(grammar: dict) -> set:
+    """ This function will return the nonterminals that derive ε."""
+    nullable = set()
+    changed = True
+    while changed:
+        changed = False
+        for name, alternatives in grammar.items():
+            if name not in nullable and any(all(symbol in nullable for symbol in alternative) for alternative in alternatives):
+                nullable.add(name)
+                changed = True
+    return nullable
+
+def firstOfSequence(symbols: list, first: dict, nullable: set) -> (set, bool):
+    """ This function will return FIRST of a sequence of symbols, and whether the whole sequence derives ε."""
+    result = set()
+    for symbol in symbols:
+        if not isNonterminal(symbol):
+            result.add(symbol)
+            return result, False
+        result |= first[symbol]
+        if symbol not in nullable:
+            return result, False
+    return result, True
+
+def firstSets(grammar: dict, nullable: set) -> dict:
+    first = {name: set() for name in grammar}
+    changed = True
+    while changed:
+        changed = False
+        for name, alternatives in grammar.items():
+            for alternative in alternatives:
+                symbols, _ = firstOfSequence(alternative, first, nullable)
+                if not symbols <= first[name]:
+                    first[name] |= symbols
+                    changed = True
+    return first
+
+def followSets(grammar: dict, first: dict, nullable: set) -> dict:
+    follow = {name: set() for name in grammar}
+    follow[startSymbol(grammar)].add(END)
+    changed = True
+    while changed:
+        changed = False
+        for name, alternatives in grammar.items():
+            for alternative in alternatives:
+                for index, symbol in enumerate(alternative):
+                    if not isNonterminal(symbol):
+                        continue
+                    symbols, restNullable = firstOfSequence(alternative[index + 1:], first, nullable)
+                    if restNullable:
+                        symbols = symbols | follow[name]
+                    if not symbols <= follow[symbol]:
+                        follow[symbol] |= symbols
+                        changed = True
+    return follow
+
+def buildTable(grammar: dict) -> dict:
+    """ This function will build the LL(1) table, raising a ValueError that lists every conflict."""
+    grammar = removeLeftRecursion(grammar)
+    nullable = nullables(grammar)
+    first = firstSets(grammar, nullable)
+    follow = followSets(grammar, first, nullable)
+
+    nonterminals = list(grammar)
+    productions = [(name, alternative) for name in nonterminals for alternative in grammar[name]]
+    table = {}
+    conflicts = []
+    for number, (name, alternative) in enumerate(productions):
+        symbols, derivesEmpty = firstOfSequence(alternative, first, nullable)
+        if derivesEmpty:
+            symbols = symbols | follow[name]
+        for terminal in sorted(symbols - {END}):
+            claimed = table.setdefault((name, terminal), number)
+            if claimed != number:
+                conflicts.append(f"{name} on {terminal}: {' '.join(productions[claimed][1]) or 'ε'} / {' '.join(alternative) or 'ε'}")
+    if conflicts:
+        raise ValueError("The grammar is not LL(1):\n  " + "\n  ".join(conflicts))
+
+    # The ε production of a nullable nonterminal is also taken on tokens the table has no entry for.
+    # That is what the recursive descent parser does (a while loop that just stops), and the error then comes from
+    # whoever expected that token, with the same message as Parser.py.
+    defaults = []
+    for name in nonterminals:
+        empty = [number for number, (left, alternative) in enumerate(productions) if left == name and not alternative]
+        defaults.append(empty[0] if empty else -1)
+    return {
+        "nonterminals": nonterminals,
+        "productions": productions,
+        "table": table,
+        "defaults": defaults,
+        "first": first,
+    }
+
+def checkStart(grammar: dict, tables: dict) -> str:
+    """ This function will return the nonterminal the start rule repeats, the parser runs the start rule as a loop over it."""
+    # The start rule has to be <program> -> <item> <program> | ε, one <item> per unit (a line) of the source.
+    start = startSymbol(grammar)
+    alternatives = sorted(grammar[start], key = len, reverse = True)
+    if len(alternatives) != 2 or alternatives[1] or len(alternatives[0]) != 2 or alternatives[0][1] != start or not isNonterminal(alternatives[0][0]):
+        raise ValueError(f"The start rule has to be {start} -> <item> {start} | ε.")
+    return alternatives[0][0]
+
+
+def fingerprint(grammarFile: str = default_grammar_file) -> str:
+    """ This function will hash everything the table depends on, the rules and the token names in code order."""
+    digest = hashlib.sha256()
+    with open(grammarFile, "rb") as file:
+        digest.update(file.read())
+    digest.update("\n".join(TOKEN_NAMES).encode())
+    return digest.hexdigest()
+
+def renderTables(tables: dict, item: str, stamp: str) -> str:
+    """ This function will render the tables as a Python module made only of literals."""
+    nonterminals = tables["nonterminals"]
+    productions = tables["productions"]
+    if len(productions) >= NO_PRODUCTION:
+        raise ValueError(f"{len(productions)} productions do not fit the one byte table.")
+    terminalCount = len(TOKEN_NAMES)
+    symbolCode = lambda symbol: terminalCount + nonterminals.index(symbol) if isNonterminal(symbol) else TOKEN_CODES[symbol]
+
+    flat = bytearray([NO_PRODUCTION]) * (len(nonterminals) * terminalCount)
+    for (name, terminal), number in tables["table"].items():
+        flat[nonterminals.index(name) * terminalCount + TOKEN_CODES[terminal]] = number
+    expected = tuple(tuple(sorted(TOKEN_CODES[terminal] for terminal in tables["first"][name])) for name in nonterminals)
+
+    lines = [
+        "# Generated by tableGenerator.py from logs/grammar_rules.txt. Do not edit by hand.",
+        "# Regenerate with `python tableGenerator.py` whenever the rules or the token enums change.",
+        "",
+        f"FINGERPRINT = {stamp!r}",
+        "",
+        f"TERMINAL_COUNT = {terminalCount} # Symbols below this are token codes, the rest are TERMINAL_COUNT + the index into NONTERMINALS.",
+        f"NONTERMINALS = {tuple(nonterminals)!r}",
+        f"START = {nonterminals.index(startSymbol(tables['grammar']))}",
+        f"ITEM = {nonterminals.index(item)} # The start rule is a loop over this nonterminal.",
+        "",
+        "# (nonterminal, right hand side as symbols), in the order of the rules.",
+        "PRODUCTIONS = (",
+    ]
+    for name, alternative in productions:
+        lines.append(f"    ({nonterminals.index(name)}, {tuple(symbolCode(symbol) for symbol in alternative)!r}), # {name} -> {' '.join(alternative) or 'ε'}")
+    lines += [
+        ")",
+        "",
+        f"# TABLE[nonterminal * TERMINAL_COUNT + token code] is the production to expand, {NO_PRODUCTION} means none.",
+        f"NO_PRODUCTION = {NO_PRODUCTION}",
+        f"TABLE = {bytes(flat)!r}",
+        "",
+        "# ε production of every nonterminal, taken when the table has no entry, or -1.",
+        f"DEFAULTS = {tuple(tables['defaults'])!r}",
+        "",
+        "# FIRST of every nonterminal as token codes, for the error messages.",
+        f"EXPECTED = {expected!r}",
+        "",
+    ]
+    return "\n".join(lines)
+
+def generate(output: str = default_output, grammarFile: str = default_grammar_file) -> str:
+    """ This function will build the LL(1) table from the rules and write it into `output`."""
+    grammar = loadGrammar(grammarFile)
+    tables = buildTable(grammar)
+    tables["grammar"] = grammar
+    source = renderTables(tables, checkStart(grammar, tables), fingerprint(grammarFile))
+    with open(output, "w", encoding="utf-8") as file:
+        file.write(source)
+    return output
+
+def isStale(grammarFile: str = default_grammar_file) -> bool:
+    """ This function will check the fingerprint of the committed table against the rules."""
+    try:
+        import parseTables
+    except ImportError:
+        return True
+    return parseTables.FINGERPRINT != fingerprint(grammarFile)
+
+
+if __name__ == "__main__":
+    argParser = argparse.ArgumentParser(description = "Generate the LL(1) parse table for tableParser.py from the grammar rules.")
+    argParser.add_argument("--grammar", default = default_grammar_file, help = "The rules to read.")
+    argParser.add_argument("--output", default = default_output, help = "Where to write the tables module.")
+    argParser.add_argument("--check", action = "store_true", help = "Only check that the existing table is up to date.")
+    args = argParser.parse_args()
+
+    if args.check:
+        if isStale(args.grammar):
+            print("parseTables.py is out of date, run `python tableGenerator.py`.")
+            sys.exit(1)
+        print("parseTables.py is up to date.")
+    else:
+        try:
+            print(f"Wrote {generate(args.output, args.grammar)}")
+        except ValueError as error:
+            print(error)
+            sys.exit(1)
@@ -0,0 +1,312 @@
+from tokenStream import TokenStream, TokenCode, TOKEN_NAMES, TOKEN_CODES
+from astNodes import Program, Declaration, Assignment, Output, If, BinaryOp, Negate, Identifier, Literal
+from instrumentation import stageOf
+import parseTables as tables
+
+# Table driven LL(1) parser, accepts the same language as Parser.py and builds the same AST with the same error messages.
+# It runs on parseTables.py (see tableGenerator.py) with an explicit stack, so a deeply nested expression never hits the
+# recursion limit, and every token costs one table lookup instead of a chain of calls and membership tests.
+#
+# The stack holds symbols to expand (token codes and TERMINAL_COUNT + nonterminal) and reduce markers (~production).
+# A matched token pushes its reference on the value stack, a reduce pops the values of its right hand side and pushes what
+# the builder of its nonterminal makes of them.
+
+ENDLINE = int(TokenCode.ENDLINE)
+LITERAL_STRING = int(TokenCode.LITERAL_STRING)
+LITERAL_INTEGER = int(TokenCode.LITERAL_INTEGER)
+LITERAL_DOUBLE = int(TokenCode.LITERAL_DOUBLE)
+
+# Panic mode recovery (recover=True) starts a new line on one of these, or right after an ENDLINE.
+# An IDENTIFIER only counts when a : or := follows it, otherwise every stray name in a broken expression would start another error.
+SYNC_KEYWORDS = (int(TokenCode.KEYWORD_OUTPUT), int(TokenCode.KEYWORD_IF))
+IDENTIFIER = int(TokenCode.IDENTIFIER)
+DECLARATION_OPERATORS = (int(TokenCode.OP_COLON), int(TokenCode.OP_ASSIGNMENT))
+TERMINAL_COUNT = tables.TERMINAL_COUNT
+TABLE = tables.TABLE
+DEFAULTS = tables.DEFAULTS
+NO_PRODUCTION = tables.NO_PRODUCTION
+
+# First symbol of every right hand side (None for ε), the rest reversed so it can be pushed in one go, and their counts.
+HEADS = tuple(right[0] if right else None for _, right in tables.PRODUCTIONS)
+TAILS = tuple(tuple(reversed(right[1:])) for _, right in tables.PRODUCTIONS)
+RIGHT_LENGTHS = tuple(len(right) for _, right in tables.PRODUCTIONS)
+# Symbol names of every right hand side, the builders tell the alternatives apart by them.
+RIGHT_NAMES = tuple(
+    tuple(tables.NONTERMINALS[symbol - TERMINAL_COUNT] if symbol >= TERMINAL_COUNT else TOKEN_NAMES[symbol] for symbol in right)
+    for _, right in tables.PRODUCTIONS
+)
+
+# What Parser.py says when the nonterminal has nothing for the current token.
+ERROR_MESSAGES = {
+    "<line>": "Expected ENDLINE at the end, but got {}",
+    "<line_end>": "Expected ENDLINE at the end, but got {}",
+    "<declaration_end>": "Expected ENDLINE after declaration, but got {}",
+    "<declaration_rest>": "Expected OP_COLON but got {}",
+    "<type>": "Invalid type: {}",
+    "<statement>": "Expected a statement but got {}",
+    "<output_params>": "Expected an expression but got {}",
+    "<condition>": "Expected an expression but got {}",
+    "<expression>": "Expected an expression but got {}",
+    "<simple_expression>": "Expected an expression but got {}",
+    "<term>": "Expected an expression but got {}",
+    "<factor>": "Expected an expression but got {}",
+}
+
+
+class TableParser:
+    def __init__(self, tokens, instrumentation = None, recover: bool = False):
+        # Takes a TokenStream straight from the lexer, or any iterable of (type, token, ...) tuples, like Parser.
+        # instrumentation (see instrumentation.py) times parse() and counts the tokens and statements.
+        # recover=True never raises: every syntax error goes into errors as (message, token), the parse skips to the next
+        # line or statement keyword and goes on, and parse() returns the statements of the lines that did parse.
+        self.tokens = tokens
+        self.instrumentation = instrumentation
+        self.recover = recover
+        self.errors = []
+        # text(token) and line(token) of a matched token, straight from the stream's columns when there is one.
+        if isinstance(tokens, TokenStream):
+            self.text, self.line = tokens.lexeme, tokens.lines.__getitem__
+        else:
+            self.text, self.line = self.tupleText, self.tupleLine
+        self.tokenStream = self.readCodes(tokens)
+        self.nextToken = next(self.tokenStream, None)
+        self.currentType = None
+        self.currentToken = None
+        self.tokenIndex = 0
+        # Builder of every production. The start rule is never reduced, parse() runs it as a loop.
+        # A production that only hands its one value up (<expression> -> <simple_expression>) gets None and no reduce at all,
+        # and an ε production pushes its value right away, both save a trip through the stack.
+        self.builders = []
+        self.emptyValues = []
+        for production, (left, right) in enumerate(tables.PRODUCTIONS):
+            builder = None if left == tables.START else self.builderOf(tables.NONTERMINALS[left])
+            self.emptyValues.append(builder(RIGHT_NAMES[production], ()) if builder is not None and not right else None)
+            if len(right) == 1 and builder == self.passUp:
+                builder = None
+            self.builders.append(builder)
+        self.folds = tuple(builder == self.buildSimpleExpression for builder in self.builders)
+
+    def readCodes(self, tokens):
+        # Yields (type id, token) pairs, token is the index into the stream or the original tuple.
+        if isinstance(tokens, TokenStream):
+            return zip(tokens.types, range(len(tokens)))
+        return ((TOKEN_CODES.get(token[0], TokenCode.err), token) for token in tokens)
+
+    def builderOf(self, nonterminal: str):
+        """ This function will return the method that builds the value of a nonterminal."""
+        if nonterminal.endswith("_tail>"):
+            return self.buildTail # Made by tableGenerator.removeLeftRecursion().
+        name = "build" + "".join(part.capitalize() for part in nonterminal.strip("<>").split("_"))
+        builder = getattr(self, name, None)
+        if builder is None:
+            raise ValueError(f"No builder for {nonterminal}, add TableParser.{name}().")
+        return builder
+
+    def tupleText(self, token) -> str:
+        return token[1]
+
+    def tupleLine(self, token):
+        return token[2] if len(token) > 2 else None
+
+    def advance(self) -> None:
+        self.currentType, self.currentToken = self.nextToken
+        self.nextToken = next(self.tokenStream, None)
+        self.tokenIndex += 1
+
+    def errorMessage(self, nonterminal: int, code: int) -> str:
+        name = tables.NONTERMINALS[nonterminal]
+        got = TOKEN_NAMES[code]
+        if name in ERROR_MESSAGES:
+            return ERROR_MESSAGES[name].format(got)
+        expected = ", ".join(TOKEN_NAMES[code] for code in tables.EXPECTED[nonterminal])
+        return f"Expected one of {expected} but got {got}"
+
+    def parseItem(self):
+        """ This function will parse one unit of the start rule (a line), the current token is its first token."""
+        stack = [TERMINAL_COUNT + tables.ITEM]
+        values = []
+        builders = self.builders
+        emptyValues = self.emptyValues
+        folds = self.folds
+        tokenStream = self.tokenStream
+        code, token, nextToken = self.currentType, self.currentToken, self.nextToken
+        consumed = 0
+        try:
+            while stack:
+                symbol = stack.pop()
+                while symbol >= TERMINAL_COUNT:
+                    # Expand, then go on with the first symbol of the production right away instead of through the stack.
+                    nonterminal = symbol - TERMINAL_COUNT
+                    production = TABLE[nonterminal * TERMINAL_COUNT + code]
+                    if production == NO_PRODUCTION:
+                        production = DEFAULTS[nonterminal]
+                        if production < 0:
+                            raise SyntaxError(self.errorMessage(nonterminal, code))
+                    symbol = HEADS[production]
+                    if symbol is None:
+                        values.append(emptyValues[production])
+                        break
+                    if builders[production] is not None:
+                        stack.append(~production)
+                    stack.extend(TAILS[production])
+                if symbol is None:
+                    continue
+                if symbol >= 0:
+                    if symbol != code:
+                        raise SyntaxError(f"Expected {TOKEN_NAMES[symbol]} but got {TOKEN_NAMES[code]}")
+                    values.append(token)
+                    if symbol == ENDLINE:
+                        continue # The ENDLINE closing the line is only checked, parse() steps over it.
+                    if nextToken is None:
+                        raise SyntaxError(f"Unexpected end of input after {TOKEN_NAMES[code]}")
+                    code, token = nextToken
+                    nextToken = next(tokenStream, None)
+                    consumed += 1
+                else:
+                    # Reduce: everything the production matched is on top of the value stack.
+                    production = ~symbol
+                    if folds[production] and values[-1] is None:
+                        values.pop() # A fold over an empty tail, the operand is already the value.
+                        continue
+                    count = RIGHT_LENGTHS[production]
+                    right = values[-count:]
+                    del values[-count:]
+                    values.append(builders[production](RIGHT_NAMES[production], right))
+        finally:
+            self.currentType, self.currentToken, self.nextToken = code, token, nextToken
+            self.tokenIndex += consumed
+        return values[0]
+
+    def parse(self):
+        statements = []
+        with stageOf(self.instrumentation)("parse"):
+            # The start rule, <program> -> <line> <program> | ε, runs as a loop so the stack never holds more than one line.
+            resume = False # True when recovery stopped on the first token of the next line.
+            while resume or self.nextToken is not None:
+                if not resume:
+                    self.advance()
+                start = self.tokenIndex
+                try:
+                    statements.extend(self.parseItem())
+                    resume = False
+                except SyntaxError as error:
+                    if not self.recover:
+                        raise
+                    self.errors.append((str(error), self.currentToken))
+                    resume = self.synchronize(start)
+        if self.instrumentation is not None:
+            self.instrumentation.count("parsedTokens", self.tokenIndex)
+            self.instrumentation.count("statements", len(statements))
+            self.instrumentation.count("syntaxErrors", len(self.errors))
+        return Program(statements, 0)
+
+    def synchronize(self, start: int) -> bool:
+        """ This function will skip the tokens of a broken line, and tell if the current token starts the next one."""
+        # The statements the broken line already had are dropped with it.
+        while True:
+            code = self.currentType
+            if code == ENDLINE:
+                return False # parse() steps over it, like after any line.
+            if self.tokenIndex != start: # Never restart on the token the broken line started on, that would loop.
+                if code in SYNC_KEYWORDS:
+                    return True
+                if code == IDENTIFIER and self.nextToken is not None and self.nextToken[0] in DECLARATION_OPERATORS:
+                    return True
+            if self.nextToken is None:
+                return False
+            self.advance()
+
+    # Builders, one per nonterminal. right holds the names of the production's symbols, values what each of them matched:
+    # the token reference for a terminal, the built value for a nonterminal.
+
+    def buildLine(self, right, values):
+        # A list of statements, the declaration or the statement chain of the line.
+        if right[0] == "<declaration>":
+            return [values[0]]
+        statements = []
+        if len(right) == 3:
+            statements.append(values[0])
+            chain = values[1]
+            while chain is not None:
+                statement, chain = chain
+                statements.append(statement)
+        return statements
+
+    def buildDeclaration(self, right, values):
+        name, line = self.text(values[0]), self.line(values[0])
+        kind, value = values[1]
+        if kind == "OP_COLON":
+            return Declaration(name, value, line)
+        return Assignment(name, value, line) # Assignment as Declaration
+
+    def buildDeclarationRest(self, right, values):
+        return right[0], values[1]
+
+    def buildDeclarationEnd(self, right, values):
+        return None
+
+    buildLineEnd = buildDeclarationEnd
+
+    def buildType(self, right, values):
+        return TOKEN_CODES[right[0]]
+
+    def buildStatements(self, right, values):
+        # (statement, rest) pairs, buildLine() flattens them.
+        return (values[0], values[1]) if values else None
+
+    def passUp(self, right, values):
+        return values[0]
+
+    buildStatement = passUp
+
+    def buildAssignmentStatement(self, right, values):
+        return Assignment(self.text(values[0]), values[2], self.line(values[0]))
+
+    def buildOutputStatement(self, right, values):
+        return Output(values[2], self.line(values[0]))
+
+    def buildOutputParams(self, right, values):
+        if right[0] == "LITERAL_STRING":
+            return Literal(LITERAL_STRING, self.text(values[0])[1:-1], self.line(values[0]))
+        return values[0]
+
+    def buildIfStatement(self, right, values):
+        return If(values[2], values[4], self.line(values[0]))
+
+    def buildCondition(self, right, values):
+        left, relation = values
+        if relation is None:
+            return left # Without a relational operator the condition is the expression itself.
+        op, token, operand = relation
+        return BinaryOp(op, left, operand, self.line(token))
+
+    def buildRelation(self, right, values):
+        return (TOKEN_CODES[right[0]], values[0], values[1]) if values else None
+
+    buildExpression = passUp
+
+    def buildTail(self, right, values):
+        # (op, operator token, operand, rest) of a rewritten left recursive rule, None for ε.
+        return (TOKEN_CODES[right[0]], values[0], values[1], values[2]) if values else None
+
+    def buildSimpleExpression(self, right, values):
+        # Folds the tail to the left, a - b - c is (a - b) - c like the while loops of Parser.py.
+        node, chain = values
+        while chain is not None:
+            op, token, operand, chain = chain
+            node = BinaryOp(op, node, operand, self.line(token))
+        return node
+
+    buildTerm = buildSimpleExpression
+
+    def buildFactor(self, right, values):
+        kind = right[0]
+        if kind == "IDENTIFIER":
+            return Identifier(self.text(values[0]), self.line(values[0]))
+        if kind == "LITERAL_INTEGER":
+            return Literal(LITERAL_INTEGER, int(self.text(values[0])), self.line(values[0]))
+        if kind == "LITERAL_DOUBLE":
+            return Literal(LITERAL_DOUBLE, float(self.text(values[0])), self.line(values[0]))
+        if kind == "DELIMITER_LEFT_P":
+            return values[1]
+        return Negate(values[1], self.line(values[0])) # OP_ARITHMETIC_MINUS <factor>
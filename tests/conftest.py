@@ -0,0 +1,75 @@
+import os
+import sys
+
+import pytest
+
+# The modules are flat files at the root of the repository.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+GRAMMAR_FILE = os.path.join(ROOT, "logs", "grammar_rules.txt")
+
+from lexicalAnalyzer import LexicalAnalyzer
+
+# Declarations, assignments of every literal kind, an undeclared identifier, an invalid token, a string with spaces and an if.
+SAMPLE = """x:integer;
+y:double;
+name:integer;
+
+x:=5;
+y:=-2.75;
+x:=x+3*2;
+name:=7;
+z:=4;
+
+output<<"Hello World!";
+output<<x;
+output<<y#;
+
+if (x<50)
+    output<<y/2;
+"""
+
+# The same program without the errors, it parses and runs.
+VALID = """x:integer;
+y:double;
+x:=5;
+y:=-2.75;
+x:=x+3*2-x/2;
+output<<"Hello World!";
+output<<x;
+if (x<50)
+    output<<y/2;
+if (x<2)
+    output<<x;
+y:=y*2+x;
+output<<y;
+"""
+
+@pytest.fixture(autouse=True)
+def workingDirectory(tmp_path, monkeypatch):
+    # The analyzer writes its logs under ./logs, keep them out of the repository.
+    monkeypatch.chdir(tmp_path)
+
+def analyzerOf(text: str, **options) -> LexicalAnalyzer:
+    """ This function will run the pipeline over a text kept in memory, with nothing written or echoed."""
+    return LexicalAnalyzer("sample.HL", source=text, echoErrors=False, logDirectory=None, lazy=True, **options)
+
+def tokensOf(analyzer: LexicalAnalyzer) -> list:
+    stream = analyzer.getTokenStream()
+    return [(stream.typeName(index), stream.lexeme(index), stream.lines[index]) for index in range(len(stream))]
+
+def diagnosticsOf(analyzer: LexicalAnalyzer) -> list:
+    return [diagnostic.toDict() for diagnostic in analyzer.getDiagnostics()]
+
+def assertSameAnalysis(first: LexicalAnalyzer, second: LexicalAnalyzer) -> None:
+    """ This function will check that two runs over the same text agree on everything they produced."""
+    assert first.getAtoms() == second.getAtoms()
+    assert tokensOf(first) == tokensOf(second)
+    assert first.getSymbolTable() == second.getSymbolTable()
+    assert diagnosticsOf(first) == diagnosticsOf(second)
+
+@pytest.fixture
+def sampleFile(tmp_path):
+    path = tmp_path / "sample.HL"
+    path.write_text(SAMPLE)
+    return str(path)
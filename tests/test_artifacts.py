@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from artifacts import MemorySink, blocks, loadTokens, writersFor
+from lexicalAnalyzer import LexicalAnalyzer
+from tokenStream import TOKEN_NAMES
+from conftest import SAMPLE
+
+
+def writeLogs(directory, text: str = SAMPLE, formats: tuple = ("legacy", "jsonl", "binary")) -> LexicalAnalyzer:
+    return LexicalAnalyzer("sample.HL", source=text, useScanner=True, echoErrors=False, logDirectory=directory, logFormats=formats)
+
+def loggedTokens(analyzer: LexicalAnalyzer) -> list:
+    # The logs have the types from before cleanTable() rejected the undeclared identifiers, like RES_SYM.txt always had.
+    stream = analyzer.getTokenStream()
+    return [(TOKEN_NAMES[code], stream.lexeme(index), stream.lines[index]) for index, code in enumerate(analyzer.tokensCopy)]
+
+def test_blocks():
+    assert list(blocks(["a", "b", "c"], 2)) == ["ab", "c"]
+    assert list(blocks([""] * 5, 2)) == ["", "", ""] # Empty pieces are not the end.
+    assert list(blocks([], 2)) == []
+
+def test_legacyLogs():
+    sink = MemorySink()
+    writeLogs(sink, "x:integer;\nx:=5;\n", ("legacy",))
+    assert sink["NOSPACES.txt"] == "x:integer;x:=5;"
+    assert sink["NOSPACES_LINE.txt"] == "x:integer;\nx:=5;\n"
+    assert sink["RES_SYM.txt"].splitlines()[:2] == [f"{'IDENTIFIER':<32} token: x ", f"{'OP_COLON':<32} token: : "]
+    assert "tokens.jsonl" not in sink and "tokens.bin" not in sink
+
+def test_jsonLines():
+    sink = MemorySink()
+    analyzer = writeLogs(sink)
+    tokens = [json.loads(line) for line in sink["tokens.jsonl"].splitlines()]
+    assert [(token["type"], token["token"], token["line"] - 1) for token in tokens] == loggedTokens(analyzer)
+    assert [json.loads(line)["name"] for line in sink["symbols.jsonl"].splitlines()] == list(analyzer.getSymbolTable())
+    assert json.loads(sink["atoms.jsonl"].splitlines()[0]) == {"line": 1, "atoms": ["x", ":", "integer", ";"]}
+
+def test_directoryMatchesMemory(tmp_path):
+    sink = MemorySink()
+    writeLogs(sink)
+    writeLogs(str(tmp_path))
+    for name, data in sink.files.items():
+        assert (tmp_path / name).read_bytes() == (data if isinstance(data, bytes) else data.encode())
+
+def test_binaryRoundTrip(tmp_path):
+    for number, text in enumerate((SAMPLE, 'x:integer;\noutput<<"é ü";\nx:=1;\n')):
+        directory = tmp_path / str(number)
+        analyzer = writeLogs(str(directory), text, ("binary",))
+        for loaded in (loadTokens(str(directory / "tokens.bin")), loadTokens((directory / "tokens.bin").read_bytes())):
+            assert len(loaded) == len(analyzer.getTokenStream())
+            assert [(loaded.typeName(index), loaded.lexeme(index), loaded.lines[index]) for index in range(len(loaded))] == loggedTokens(analyzer)
+
+def test_badInput(tmp_path):
+    with pytest.raises(ValueError, match="Unknown log format"):
+        writersFor(["legacy", "xml"])
+    with pytest.raises(ValueError):
+        loadTokens(b"HLTK")
+    with pytest.raises(ValueError):
+        loadTokens(b"XXXX" + bytes(64))
@@ -0,0 +1,61 @@
+import os
+
+from batch import cacheFor, findSources, logDirectoryFor, runJob, runBatch
+from cache import Cache
+from conftest import SAMPLE, VALID
+
+
+def writeSources(root) -> None:
+    (root / "a").mkdir()
+    (root / "a_b").mkdir()
+    (root / "a" / "b_c.HL").write_text(VALID)
+    (root / "a_b" / "c.HL").write_text(SAMPLE)
+    (root / "a" / "notes.txt").write_text("not a source")
+
+def test_findSources(tmp_path, monkeypatch):
+    writeSources(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    assert findSources(["."]) == [os.path.join(".", "a", "b_c.HL"), os.path.join(".", "a_b", "c.HL")]
+    assert findSources(["a/*.txt", "a/*.txt"]) == [os.path.join("a", "notes.txt")]
+
+def test_logDirectoriesNeverCollide(tmp_path, monkeypatch):
+    (tmp_path / "work").mkdir()
+    monkeypatch.chdir(tmp_path / "work")
+    sources = ["a/b_c.HL", "a_b/c.HL", "a/b/c.HL", "a/b.c.HL", "../x/y.HL", "../z/y.HL", str(tmp_path / "y.HL")]
+    directories = [logDirectoryFor(source, "out") for source in sources]
+    assert len(set(directories)) == len(sources)
+    assert directories[0] == os.path.join("out", "a", "b_c.HL")
+    assert all(directory.startswith("out" + os.sep) and os.pardir not in directory.split(os.sep) for directory in directories)
+    assert logDirectoryFor("a.HL", None) is None
+
+def test_runJob(tmp_path, monkeypatch):
+    writeSources(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    valid = runJob(os.path.join("a", "b_c.HL"), "out")
+    assert valid["status"] == "pass" and valid["statements"] == 11 and valid["error"] is None
+    assert os.path.isfile(os.path.join("out", "a", "b_c.HL", "RES_SYM.txt"))
+    invalid = runJob(os.path.join("a_b", "c.HL"))
+    assert invalid["status"] == "fail" and len(invalid["diagnostics"]) == 2
+    missing = runJob("missing.HL")
+    assert missing["status"] == "error" and missing["error"].startswith("FileNotFoundError")
+
+def test_runBatch(tmp_path, monkeypatch):
+    writeSources(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    sources = findSources(["."])
+    seen = []
+    summary = runBatch(sources, workers=2, onResult=seen.append, cacheDirectory="cache")
+    assert summary["total"] == 2 and summary["counts"] == {"pass": 1, "fail": 1, "error": 0}
+    assert [result["source"] for result in summary["results"]] == sources
+    assert sorted(result["source"] for result in seen) == sources
+    assert runBatch(sources, workers=1, cacheDirectory="cache")["cached"] == 2
+
+def test_jobsShareTheCache(tmp_path, monkeypatch):
+    writeSources(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    scans = []
+    monkeypatch.setattr(Cache, "scan", lambda cache, scan=Cache.scan: (scans.append(cache), scan(cache)))
+    results = [runJob(source, cacheDirectory="cache") for source in findSources(["."]) * 2]
+    assert [result["cached"] for result in results] == [False, False, True, True]
+    assert len(scans) == 1 # One index for the whole process, not one per job.
+    assert cacheFor("cache") is cacheFor(str(tmp_path / "cache"))
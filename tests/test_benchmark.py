@@ -0,0 +1,42 @@
+from benchmark import CORRUPTIONS, generateProgram, programPath, measure, compareResults, runBenchmarks
+from conftest import GRAMMAR_FILE, analyzerOf
+
+
+def generate(tmp_path, lines: int, seed: int, invalidRate: float = 0.0) -> str:
+    path = programPath(str(tmp_path), lines, seed, invalidRate > 0, GRAMMAR_FILE)
+    with open(generateProgram(path, lines, seed, invalidRate, GRAMMAR_FILE)) as file:
+        return file.read()
+
+def test_generatedProgramsAreReproducible(tmp_path):
+    first = generate(tmp_path / "first", 300, 7)
+    assert generate(tmp_path / "second", 300, 7) == first
+    assert generate(tmp_path / "third", 300, 8) != first
+    assert first.count("\n") == 300
+
+def test_validProgramsAreValid(tmp_path):
+    for seed in range(3):
+        analyzer = analyzerOf(generate(tmp_path, 400, seed), useScanner=True)
+        assert analyzer.getDiagnostics() == []
+        assert len(analyzer.getProgram().statements) == 400
+
+def test_invalidProgramsFail(tmp_path):
+    analyzer = analyzerOf(generate(tmp_path, 400, 0, invalidRate=0.2), useScanner=True, recoverSyntax=True)
+    assert analyzer.getDiagnostics() != []
+
+def test_measureAndCompare(tmp_path):
+    path = programPath(str(tmp_path), 200, 0, False, GRAMMAR_FILE)
+    generateProgram(path, 200, 0, 0.0, GRAMMAR_FILE)
+    case = measure(path, 200, "scanner", repeat=1, memory=False)
+    assert case["lines"] == 200 and case["errors"] == 0 and case["syntaxErrors"] == 0
+    assert "scanner" in case["phases"]
+    results = {"cases": {"valid-200-scanner": case}}
+    rows = compareResults(results, results, minimum=0.0)
+    assert rows and all(ratio == 1.0 for _, _, _, _, ratio in rows)
+
+def test_atomizerProgramsCloseTheirStrings(tmp_path):
+    # One unterminated string would run to the end of the file in atomizer(), its programs go without.
+    results = runBenchmarks([300], ["atomizer", "scanner"], invalid=True, invalidRate=0.2, repeat=1, memory=False, directory=str(tmp_path), grammarFile=GRAMMAR_FILE)
+    atomizer, scanner = results["cases"]["invalid-300-atomizer"], results["cases"]["invalid-300-scanner"]
+    assert "unterminated" not in atomizer["corruptions"] and scanner["corruptions"] == list(CORRUPTIONS)
+    assert 0 < atomizer["errors"] < 300 and 0 < scanner["errors"] < 300
+    assert len(list(tmp_path.glob("*_invalid_without_unterminated_*.HL"))) == 1
@@ -0,0 +1,124 @@
+import os
+
+import pytest
+
+from artifacts import MemorySink
+from cache import Cache, analyze
+from conftest import SAMPLE, VALID
+
+
+def analyzeFile(path, cache, **options):
+    return analyze(str(path), cache, echoErrors=False, logDirectory=None, useScanner=True, **options)
+
+def entryFiles(cache) -> list:
+    return sorted(name for name in os.listdir(cache.directory) if name.endswith(".pickle"))
+
+def cacheSize(cache) -> int:
+    return sum(os.path.getsize(os.path.join(cache.directory, name)) for name in entryFiles(cache))
+
+def test_roundTrip(tmp_path):
+    cache = Cache(str(tmp_path / "cache"))
+    for text in (VALID, SAMPLE):
+        path = tmp_path / "source.HL"
+        path.write_text(text)
+        fresh = analyzeFile(path, cache)
+        cached = analyzeFile(path, cache)
+        assert not fresh.cached and cached.cached
+        assert list(cached.tokenStream.types) == list(fresh.tokenStream.types)
+        assert [cached.tokenStream.lexeme(index) for index in range(len(cached.tokenStream))] == [fresh.tokenStream.lexeme(index) for index in range(len(fresh.tokenStream))]
+        assert cached.getAtoms() == fresh.atoms
+        assert cached.symbolTable == fresh.symbolTable
+        assert [diagnostic.toDict() for diagnostic in cached.diagnostics] == [diagnostic.toDict() for diagnostic in fresh.diagnostics]
+        assert cached.syntaxError == fresh.syntaxError
+        if fresh.syntaxError is None:
+            assert cached.parse() == fresh.parse()
+        else:
+            with pytest.raises(SyntaxError):
+                cached.parse()
+    assert (cache.hits, cache.misses) == (2, 2)
+
+def test_keyDependsOnTheSourceAndTheMode(tmp_path):
+    cache = Cache(str(tmp_path / "cache"))
+    assert cache.key(b"x:integer;", "scanner") != cache.key(b"x:integer; ", "scanner")
+    assert cache.key(b"x:integer;", "scanner") != cache.key(b"x:integer;", "atomizer")
+
+def test_sameTextOnHitAndMiss(tmp_path):
+    path = tmp_path / "source.HL"
+    text = 'x:integer;\r\noutput<<"é ü";\r\n'
+    path.write_bytes(text.encode("utf-8"))
+    cache = Cache(str(tmp_path / "cache"))
+    fresh = analyzeFile(path, cache)
+    cached = analyzeFile(path, cache)
+    assert fresh.source == cached.source == text.replace("\r\n", "\n")
+    assert cached.tokenStream.lexeme(len(cached.tokenStream) - 2) == '"é ü"'
+
+def test_identicalFilesKeepTheirNames(tmp_path):
+    # Both files share one entry, each one is still reported under its own name.
+    cache = Cache(str(tmp_path / "cache"))
+    paths = [tmp_path / "a" / "p.HL", tmp_path / "b" / "p.HL"]
+    logs = []
+    for path in paths:
+        path.parent.mkdir()
+        path.write_text(SAMPLE)
+        logs.append(MemorySink())
+        analysis = analyze(str(path), cache, echoErrors=False, logDirectory=logs[-1], useScanner=True)
+        assert {diagnostic.fileName for diagnostic in analysis.diagnostics} == {str(path)}
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert logs[1]["error.txt"] == logs[0]["error.txt"].replace(str(paths[0]), str(paths[1]))
+    assert str(paths[0]) not in logs[1]["error.txt"]
+
+def test_hitWritesTheSameLogs(tmp_path):
+    path = tmp_path / "source.HL"
+    formats = ("legacy", "jsonl", "binary")
+    for text in (SAMPLE, VALID, 'x:integer;\noutput<<"é ü";\nz:=1;\n'):
+        path.write_text(text)
+        for options in ({"useScanner": True}, {}, {"useScanner": True, "recoverSyntax": True, "errorFormat": "jsonl"}):
+            cache = Cache(str(tmp_path / "cache"))
+            fresh, cached = MemorySink(), MemorySink()
+            assert not analyze(str(path), cache, echoErrors=False, logDirectory=fresh, logFormats=formats, **options).cached
+            assert analyze(str(path), cache, echoErrors=False, logDirectory=cached, logFormats=formats, **options).cached
+            assert cached.files == fresh.files
+            assert {"NOSPACES.txt", "RES_SYM.txt", "tokens.jsonl", "symbols.jsonl", "tokens.bin"} <= set(cached.files)
+    directory = tmp_path / "logs"
+    assert analyze(str(path), cache, echoErrors=False, logDirectory=str(directory), useScanner=True).cached
+    assert sorted(os.listdir(directory)) == ["NOSPACES.txt", "NOSPACES_LINE.txt", "RES_SYM.txt", "error.txt"]
+
+def test_damagedEntryIsRecomputed(tmp_path):
+    path = tmp_path / "source.HL"
+    path.write_text(VALID)
+    cache = Cache(str(tmp_path / "cache"))
+    analyzeFile(path, cache)
+    (name,) = entryFiles(cache)
+    with open(os.path.join(cache.directory, name), "wb") as file:
+        file.write(b"not a pickle")
+    assert not analyzeFile(path, cache).cached
+    assert analyzeFile(path, cache).cached
+
+def test_evictsLeastRecentlyUsed(tmp_path):
+    directory = str(tmp_path / "cache")
+    sources = []
+    for number in range(12):
+        path = tmp_path / f"source{number}.HL"
+        path.write_text(VALID + "x:=1;\n" * number)
+        sources.append(path)
+    cache = Cache(directory)
+    analyzeFile(sources[0], cache)
+    entrySize = cache.total # The smallest entry, they grow with the sources.
+    cache = Cache(directory, maxBytes=entrySize * 6)
+    for path in sources[1:]:
+        analyzeFile(path, cache)
+        analyzeFile(sources[0], cache) # Kept in use, never evicted.
+        assert cacheSize(cache) <= cache.maxBytes
+    assert cache.total == cacheSize(cache)
+    assert analyzeFile(sources[0], cache).cached
+    assert analyzeFile(sources[-1], cache).cached
+    assert not analyzeFile(sources[1], cache).cached
+
+def test_clear(tmp_path):
+    path = tmp_path / "source.HL"
+    path.write_text(VALID)
+    cache = Cache(str(tmp_path / "cache"))
+    analyzeFile(path, cache)
+    cache.clear()
+    assert entryFiles(cache) == [] and cache.total == 0
+    assert not analyzeFile(path, cache).cached
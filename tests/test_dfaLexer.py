@@ -0,0 +1,16 @@
+import dfaGenerator
+from dfaLexer import DFALexer
+from conftest import SAMPLE, VALID, analyzerOf, assertSameAnalysis
+
+
+def test_tablesAreUpToDate():
+    assert not dfaGenerator.isStale()
+
+def test_dfaMatchesScanner():
+    for text in (SAMPLE, VALID, "x:integer;\nx:=é+1;\n", "x:integer;\noutput<<'it''s';\n"):
+        dfa = analyzerOf(text, useDFA=True)
+        scanner = analyzerOf(text, useScanner=True)
+        assertSameAnalysis(dfa, scanner)
+
+def test_tokenizeGivesTheOldTuples():
+    assert DFALexer("x:=5;").tokenize() == [("x", "IDENTIFIER"), (":=", "OP_ASSIGNMENT"), ("5", "LITERAL_INTEGER"), (";", "ENDLINE")]
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from diagnostics import LineIndex, DiagnosticSink
+from conftest import SAMPLE, analyzerOf, diagnosticsOf
+
+
+def test_lineIndexPositions():
+    index = LineIndex(SAMPLE)
+    lines = SAMPLE.split("\n")
+    assert len(index) == len(lines)
+    offset = 0
+    for number, text in enumerate(lines):
+        assert index.lineText(number) == text
+        for column in range(len(text) + 1):
+            assert index.position(offset + column) == (number, column)
+        offset += len(text) + 1
+
+def test_sinkWritesOnce(tmp_path):
+    source = "x:=1;\ny:=$;\n"
+    diagnostics = DiagnosticSink("sample.HL", source, str(tmp_path), echo=False)
+    assert diagnostics.report("$", offset=source.index("$"), errorMessage="Invalid Token Type.", errorType="Lexical Error").column == 3
+    assert diagnostics.report("y", 1, "Undeclared Variable y.", "Lexical Error").column == 0
+    assert diagnostics.report("q", 10) is None # Outside the file.
+    assert not (tmp_path / "error.txt").exists()
+    diagnostics.flush()
+    assert (tmp_path / "error.txt").read_text() == (
+        "\nIn sample.HL, line 2: y:=$;, column 4.\n|\t$ :: Lexical Error :: Invalid Token Type."
+        "\nIn sample.HL, line 2: y:=$;, column 1.\n|\ty :: Lexical Error :: Undeclared Variable y."
+    )
+    assert [json.loads(line)["column"] for line in diagnostics.render("jsonl").splitlines()] == [4, 1]
+
+def test_sinkEchoes(capsys):
+    diagnostics = DiagnosticSink("sample.HL", "x:=$;", None)
+    diagnostics.report("$", 0, "Invalid Token Type.", "Lexical Error")
+    diagnostics.flush()
+    assert capsys.readouterr().out == "\nIn sample.HL, line 1: x:=$;, column 4.\n|\t$ :: Lexical Error :: Invalid Token Type.\n"
+
+def test_unknownFormat():
+    with pytest.raises(ValueError):
+        DiagnosticSink("sample.HL", "", None, errorFormat="xml")
+
+def test_repeatedInvalidTokens():
+    # Every mode points at the token itself, not at the first occurrence of its text on the line.
+    for options in ({}, {"useScanner": True}, {"useDFA": True}):
+        analyzer = analyzerOf("x:integer;\nx:=1 $ 2 $;\n", **options)
+        assert [(diagnostic["line"], diagnostic["column"]) for diagnostic in diagnosticsOf(analyzer)] == [(2, 6), (2, 10)]
@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from document import Document
+from conftest import SAMPLE, VALID, analyzerOf, diagnosticsOf
+
+PIECES = ["x:integer;", "y:double;", "x:=x+1;", "y:=2.5*y;", "output<<x;", "if(x<3) output<<y;", "x:=", "3;", "if (y", "<2)",
+          'output << "hi";', "", "x", ";", "z:=1;", ":=;", "w:integer; w:=4;", "x:=$;"]
+
+def fullParse(text: str):
+    """ This function will return (program, error) of the whole text, the way LexicalAnalyzer parses it."""
+    try:
+        return analyzerOf(text, useScanner=True).getProgram(), None
+    except SyntaxError as error:
+        return None, str(error)
+
+def documentParse(document: Document):
+    try:
+        return document.parse(), None
+    except SyntaxError as error:
+        return None, str(error)
+
+def nodesOf(node):
+    yield node
+    for field in node.fields:
+        value = getattr(node, field)
+        if hasattr(value, "fields"):
+            yield from nodesOf(value)
+
+def checkDocument(document: Document) -> None:
+    text = document.getText()
+    analyzer = analyzerOf(text, useScanner=True)
+    assert document.getSymbolTable() == analyzer.getSymbolTable()
+    assert [diagnostic.toDict() for diagnostic in document.getDiagnostics()] == diagnosticsOf(analyzer)
+    expected, expectedError = fullParse(text)
+    program, error = documentParse(document)
+    assert error == expectedError
+    if expected is not None:
+        assert program == expected
+        for index, (statement, expectedStatement) in enumerate(zip(program.statements, expected.statements)):
+            assert [document.lineOf(index, node) for node in nodesOf(statement)] == [node.line for node in nodesOf(expectedStatement)]
+
+def test_wholeText():
+    for text in (SAMPLE, VALID, "", "x:integer;\nx:=\n5;\n"):
+        document = Document(text, "sample.HL")
+        assert document.getText() == text
+        checkDocument(document)
+
+@pytest.mark.parametrize("seed", range(4))
+def test_editsMatchAFullParse(seed):
+    generator = random.Random(seed)
+    document = Document("\n".join(generator.choice(PIECES) for _ in range(10)), "sample.HL")
+    lines = document.getText().split("\n")
+    for _ in range(40):
+        start = generator.randint(0, len(lines))
+        end = generator.randint(start, min(len(lines), start + 2))
+        newLines = [generator.choice(PIECES) for _ in range(generator.randint(0, 3))]
+        document.edit(start, end, newLines)
+        lines[start:end] = newLines
+        if not lines:
+            lines = [""]
+        assert document.getText() == "\n".join(lines)
+        if generator.random() < 0.5:
+            checkDocument(document)
+    checkDocument(document)
+
+def test_editOnlyParsesItsBlock():
+    document = Document("\n".join(["x:integer;", "x:=x+1;", "if(x<3)", "output<<x;"] * 50))
+    document.parse()
+    first, last = document.lines[0].block, document.lines[-1].block
+    document.replaceLine(100, "x:=x+2;")
+    assert document.dirtyLines == set(document.lines[98:102]) # The line and the blocks next to it, if(x<3) output<<x; takes two lines.
+    program = document.parse()
+    assert document.lines[0].block is first and document.lines[-1].block is last
+    assert program == fullParse(document.getText())[0]
+    assert document.lineOf(len(program.statements) - 1) == len(document) - 2 # The if starts a line above its output.
+
+def test_badRange():
+    with pytest.raises(IndexError):
+        Document("x:integer;").edit(1, 3, [])
@@ -0,0 +1,45 @@
+import json
+import tracemalloc
+
+from instrumentation import Instrumentation, stageOf
+from conftest import SAMPLE, analyzerOf
+
+
+def test_pipelineStages():
+    instrumentation = Instrumentation()
+    analyzer = analyzerOf(SAMPLE, useScanner=True, instrumentation=instrumentation)
+    analyzer.getDiagnostics()
+    analyzer.getDiagnostics() # Stages only run once.
+    assert list(instrumentation.stages) == ["scanner", "analyzeTokens", "cleanTable"]
+    assert all(stats["calls"] == 1 and stats["wall"] >= 0 and stats["peakMemory"] is None for stats in instrumentation.stages.values())
+    assert instrumentation.counters["symbolLookups"] > 0 and instrumentation.counters["regexCalls"] > 0
+    assert json.loads(instrumentation.toJson())["counters"] == instrumentation.counters
+    assert instrumentation.report().splitlines()[0].split() == ["stage", "calls", "wall", "ms", "cpu", "ms", "peak", "KiB"]
+
+def test_hooks():
+    instrumentation = Instrumentation()
+    events = []
+    instrumentation.addHook(lambda event, name, data: events.append((event, name)))
+    with instrumentation.stage("outer"):
+        instrumentation.count("things", 2)
+    assert events == [("start", "outer"), ("count", "things"), ("end", "outer")]
+    assert instrumentation.counters == {"things": 2}
+
+def test_nestedStagesKeepTheOuterPeak():
+    instrumentation = Instrumentation()
+    tracemalloc.start()
+    try:
+        with instrumentation.stage("outer"):
+            block = bytearray(4 << 20)
+            del block
+            with instrumentation.stage("inner"):
+                block = bytearray(1 << 20)
+                del block
+    finally:
+        tracemalloc.stop()
+    assert instrumentation.stages["inner"]["peakMemory"] < 2 << 20
+    assert instrumentation.stages["outer"]["peakMemory"] >= 4 << 20
+
+def test_noInstrumentation():
+    with stageOf(None)("anything"):
+        pass
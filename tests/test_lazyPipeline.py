@@ -0,0 +1,47 @@
+import pytest
+
+from artifacts import MemorySink
+from lexicalAnalyzer import LexicalAnalyzer
+from conftest import SAMPLE, VALID, analyzerOf
+
+
+def test_stagesRunOnDemand():
+    analyzer = analyzerOf(VALID, useScanner=True)
+    assert analyzer.done == set()
+    analyzer.getAtoms()
+    assert analyzer.done == {"lex"}
+    analyzer.getTokens()
+    assert analyzer.done == {"lex", "analyze"}
+    program = analyzer.getProgram()
+    assert analyzer.done == {"lex", "analyze", "parse"}
+    assert analyzer.getProgram() is program
+
+def test_syntaxErrorIsRaisedEveryTime():
+    analyzer = analyzerOf(SAMPLE, useScanner=True)
+    for _ in range(2):
+        with pytest.raises(SyntaxError):
+            analyzer.getProgram()
+
+def test_lazyTokensAreFinal():
+    # Handed out before the symbol table, IDENTIFIER z would turn into err under the caller's feet.
+    text = "x:integer;\nz:=x;\n"
+    lazy = analyzerOf(text, useScanner=True)
+    stream = lazy.getTokenStream()
+    tokens = lazy.getTokens()
+    types = stream.types[:]
+    lazy.parse() # Keeps the SyntaxError of the err token.
+    assert stream.types == types and lazy.getTokens() == tokens
+    assert ("z", "err") in tokens
+    eager = LexicalAnalyzer("sample.HL", source=text, useScanner=True, echoErrors=False, logDirectory=None)
+    assert tokens == eager.getTokens()
+
+def test_lazyWritesNothingUntilAsked():
+    sink = MemorySink()
+    analyzer = LexicalAnalyzer("sample.HL", source=SAMPLE, useScanner=True, echoErrors=False, logDirectory=sink, lazy=True)
+    analyzer.getSymbolTable()
+    assert sink.files == {}
+    analyzer.writeLogs()
+    eager = MemorySink()
+    LexicalAnalyzer("sample.HL", source=SAMPLE, useScanner=True, echoErrors=False, logDirectory=eager)
+    assert sink.files == eager.files
+    assert set(eager.files) == {"NOSPACES.txt", "NOSPACES_LINE.txt", "RES_SYM.txt", "error.txt"}
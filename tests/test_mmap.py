@@ -0,0 +1,36 @@
+from lexicalAnalyzer import LexicalAnalyzer
+from conftest import SAMPLE, VALID, assertSameAnalysis
+
+
+def analyzerOfFile(path, **options) -> LexicalAnalyzer:
+    return LexicalAnalyzer(str(path), echoErrors=False, logDirectory=None, lazy=True, **options)
+
+def parseResult(analyzer: LexicalAnalyzer):
+    try:
+        return analyzer.getProgram()
+    except SyntaxError as error:
+        return str(error)
+
+def checkSame(mapped: LexicalAnalyzer) -> None:
+    # The same file read as text by the scanner.
+    scanner = analyzerOfFile(mapped.fileName, useScanner=True)
+    assertSameAnalysis(mapped, scanner)
+    assert parseResult(mapped) == parseResult(scanner)
+
+def test_mappedMatchesScanner(tmp_path):
+    for number, text in enumerate((SAMPLE, VALID, VALID * 50 + "x")):
+        path = tmp_path / f"source{number}.HL"
+        path.write_bytes(text.encode())
+        mapped = analyzerOfFile(path, useMmap=True)
+        assert mapped.mapped is not None
+        checkSame(mapped)
+        checkSame(analyzerOfFile(path, useMmap=True, workers=2))
+
+def test_textFallback(tmp_path):
+    # Not plain ASCII with \n newlines, or empty: read as text like before.
+    for number, raw in enumerate(('x:integer;\r\nx:=1;\r\n'.encode(), 'output<<"é";\n'.encode("utf-8"), b"")):
+        path = tmp_path / f"source{number}.HL"
+        path.write_bytes(raw)
+        mapped = analyzerOfFile(path, useMmap=True)
+        assert mapped.mapped is None
+        checkSame(mapped)
@@ -0,0 +1,50 @@
+import pytest
+
+from astNodes import Assignment, Output, Literal, Identifier
+from compiler import compileProgram
+from optimizer import optimizeProgram
+from tokenStream import TokenCode
+from virtualMachine import VMError, VirtualMachine
+from conftest import VALID, analyzerOf
+
+
+def programOf(text: str):
+    return analyzerOf(text, useScanner=True).getProgram()
+
+def outputOf(program) -> str:
+    machine = VirtualMachine()
+    machine.run(compileProgram(program))
+    return machine.getOutput()
+
+def test_foldsConstants():
+    program, stats = optimizeProgram(programOf("x:integer;\ny:double;\nx:=2*3-7/2;\ny:=1+2;\noutput<<-(-x);\n"))
+    assert program.statements[2] == Assignment("x", Literal(TokenCode.LITERAL_INTEGER, 3))
+    assert program.statements[3] == Assignment("y", Literal(TokenCode.LITERAL_DOUBLE, 3.0)) # Converted to the type of y.
+    assert program.statements[4] == Output(Identifier("x"))
+    assert program.statements[4].value.dataType == TokenCode.KEYWORD_INT
+    assert stats["fold"]["conversions"] == 1
+
+def test_removesDeadBranches():
+    program, stats = optimizeProgram(programOf("x:integer;\nif (1<2) x:=1;\nif (2<1) x:=2;\n"))
+    assert program.statements[1:] == [Assignment("x", Literal(TokenCode.LITERAL_INTEGER, 1))]
+    assert stats["branches"] == {"removed": 1, "inlined": 1}
+
+def test_keepsTheResult():
+    text = VALID + "x:=-7/2;\noutput<<x;\nx:=0/0+x;\n"
+    program = programOf(text)
+    optimized, _ = optimizeProgram(program)
+    # The division by a constant zero is still there, it fails at run time like before.
+    machine = VirtualMachine()
+    with pytest.raises(VMError, match="Division by zero"):
+        machine.run(compileProgram(optimized))
+    assert machine.getOutput() == "Hello World!\n9\n-1.375\n3.5\n-3\n"
+    assert outputOf(programOf(VALID)) == outputOf(optimizeProgram(programOf(VALID))[0])
+
+def test_deepNesting():
+    # As deep as the source nests, without recursion.
+    depth = 5000
+    text = "x:integer;\nx:=" + "+".join(["1"] * depth) + ";\n" + "if (x<9999) " * depth + "if (1<2) " * depth + "output<< " + "- ( " * depth + "x" + " )" * depth + ";\n"
+    program, stats = optimizeProgram(programOf(text))
+    assert program.statements[1] == Assignment("x", Literal(TokenCode.LITERAL_INTEGER, depth))
+    assert stats["branches"] == {"removed": 0, "inlined": depth}
+    assert outputOf(program) == f"{depth}\n"
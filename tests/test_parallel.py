@@ -0,0 +1,21 @@
+from lexicalAnalyzer import splitLines
+from conftest import SAMPLE, VALID, analyzerOf, assertSameAnalysis
+
+
+def test_splitLines():
+    text = SAMPLE * 5
+    chunks = splitLines(text, 7)
+    assert "".join(chunk for chunk, _, _, _ in chunks) == text
+    for chunkText, start, firstLine, isLast in chunks:
+        assert text[start:start + len(chunkText)] == chunkText
+        assert firstLine == text.count("\n", 0, start)
+        assert chunkText.endswith("\n") or isLast
+        assert isLast == (start + len(chunkText) == len(text))
+    assert splitLines("", 4) == [("", 0, 0, True)]
+
+def test_parallelMatchesScanner():
+    # Errors, redeclarations and identifiers spread over many chunks.
+    text = SAMPLE * 20 + VALID * 20 + "x"
+    parallel = analyzerOf(text, workers=2)
+    scanner = analyzerOf(text, useScanner=True)
+    assertSameAnalysis(parallel, scanner)
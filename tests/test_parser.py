@@ -0,0 +1,41 @@
+import io
+
+import pytest
+
+from Parser import Parser, print_trace
+from astNodes import Declaration, Assignment, Output, If, BinaryOp, Negate, Identifier, Literal
+from lexicalAnalyzer import iter_tokens
+from conftest import VALID, analyzerOf
+
+
+def test_quietByDefault(capsys):
+    stream = analyzerOf(VALID, useScanner=True).getTokenStream()
+    capsys.readouterr() # Only the parser's output is checked.
+    program = Parser(stream).parse()
+    assert capsys.readouterr().out == ""
+    assert [type(statement) for statement in program.statements] == [Declaration, Declaration, Assignment, Assignment, Assignment, Output, Output, If, If, Assignment, Output]
+
+def test_traceGivesTheOldOutput(capsys):
+    stream = analyzerOf("x:integer;\nx:=1;\n", useScanner=True).getTokenStream()
+    capsys.readouterr()
+    Parser(stream, trace=print_trace).parse()
+    assert capsys.readouterr().out.splitlines() == [
+        "[('IDENTIFIER', 'x'), ('OP_COLON', ':'), ('KEYWORD_INT', 'integer')]", ".. Declaration",
+        "[('IDENTIFIER', 'x'), ('OP_ASSIGNMENT', ':='), ('LITERAL_INTEGER', '1')]", ".. Assignment Statement",
+    ]
+
+def test_expressionTree():
+    statement = Parser(analyzerOf("x:integer;\nx:=-x+2*3;\n", useScanner=True).getTokenStream()).parse().statements[1]
+    assert statement == Assignment("x", BinaryOp(statement.value.op, Negate(Identifier("x")), BinaryOp(statement.value.right.op, Literal(statement.value.right.left.kind, 2), Literal(statement.value.right.left.kind, 3))))
+    assert statement.line == 1
+
+def test_tupleSources():
+    # The same tree from a token stream, a list of tuples and the streaming lexer.
+    stream = analyzerOf(VALID, useScanner=True).getTokenStream()
+    expected = Parser(stream).parse()
+    assert Parser([(stream.typeName(index), stream.lexeme(index), stream.lines[index]) for index in range(len(stream))]).parse() == expected
+    assert Parser(iter_tokens(io.StringIO(VALID))).parse() == expected
+
+def test_syntaxError():
+    with pytest.raises(SyntaxError, match="Expected ENDLINE after declaration, but got IDENTIFIER"):
+        Parser(analyzerOf("x:integer;\nx:=1 x;\n", useScanner=True).getTokenStream()).parse()
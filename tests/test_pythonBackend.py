@@ -0,0 +1,95 @@
+import io
+import random
+
+import pytest
+
+import pythonBackend
+from compiler import CompileError, compileProgram
+from optimizer import optimizeProgram
+from pythonBackend import compilePython, sourceKey
+from virtualMachine import VMError, VirtualMachine
+from conftest import VALID, analyzerOf
+
+NAMES = ["a", "b", "c", "d", "e"]
+
+def randomProgram(generator: random.Random) -> str:
+    """ This function will write a random program over both types, with nested expressions, ifs and divisions by zero."""
+    def expression(depth: int = 0) -> str:
+        choice = generator.random()
+        if depth > 4 or choice < 0.3:
+            return generator.choice(NAMES + ["3", "0", "7", "2.5", "0.0", "12", "1.75", "1"])
+        if choice < 0.4:
+            return "- " + expression(depth + 1)
+        if choice < 0.5:
+            return "( " + expression(depth + 1) + " )"
+        return f"{expression(depth + 1)} {generator.choice('+-*/+*')} {expression(depth + 1)}"
+    def statement(depth: int = 0) -> str:
+        choice = generator.random()
+        if choice < 0.45:
+            return f"{generator.choice(NAMES)}:={expression()}"
+        if choice < 0.7:
+            return "output<<" + ('"hi"' if generator.random() < 0.2 else expression())
+        condition = expression() + (f" {generator.choice(['<', '<=', '>', '>=', '==', '!='])} {expression()}" if generator.random() < 0.7 else "")
+        return f"if ( {condition} ) {statement(depth + 1)}"
+    lines = [f"{name}:{generator.choice(['integer', 'double'])};" for name in NAMES]
+    lines += [f"{name}:={generator.choice(['3', '7', '2.5', '1.75'])};" for name in NAMES]
+    lines += [statement() + ";" for _ in range(generator.randint(1, 20))]
+    return "\n".join(lines) + "\n"
+
+def runVM(program):
+    machine = VirtualMachine()
+    try:
+        return machine.run(compileProgram(program)), machine.getOutput(), None
+    except VMError:
+        return None, machine.getOutput(), "VMError"
+
+def runPython(program):
+    output = []
+    try:
+        return compilePython(program).run(output), "".join(output), None
+    except VMError:
+        return None, "".join(output), "VMError"
+
+def test_sameOutputAsTheVM():
+    program = analyzerOf(VALID, useScanner=True).getProgram()
+    assert runPython(program) == runVM(program) == ([9, 3.5], "Hello World!\n9\n-1.375\n3.5\n", None)
+
+def test_randomProgramsMatchTheVM():
+    generator = random.Random(23)
+    compared = 0
+    while compared < 150:
+        analyzer = analyzerOf(randomProgram(generator), useScanner=True)
+        try:
+            program = analyzer.getProgram()
+        except SyntaxError:
+            continue
+        for candidate in (program, optimizeProgram(program, analyzer.getSymbolTable())[0]):
+            vmResult, pythonResult = runVM(candidate), runPython(candidate)
+            assert repr(pythonResult) == repr(vmResult) # repr() tells 0.0 from -0.0.
+            compared += 1
+
+def test_divisionByZeroNamesTheLine():
+    program = analyzerOf("x:integer;\nx:=0;\noutput<<x;\nx:=1/x;\n", useScanner=True).getProgram()
+    output = io.StringIO()
+    with pytest.raises(VMError, match="Division by zero at line 4."):
+        compilePython(program).run(output)
+    assert output.getvalue() == "0\n" # What was output before still comes out.
+
+def test_compiledProgramsAreCached(monkeypatch):
+    monkeypatch.setattr(pythonBackend, "compiledPrograms", type(pythonBackend.compiledPrograms)())
+    program = analyzerOf(VALID, useScanner=True).getProgram()
+    keys = [sourceKey(VALID, optimize) for optimize in (False, True)]
+    assert keys[0] != keys[1] and sourceKey(VALID.encode(), False) == keys[0]
+    first = compilePython(program, keys[0], cacheLimit=1)
+    assert compilePython(program, keys[0], cacheLimit=1) is first
+    compilePython(program, keys[1], cacheLimit=1)
+    assert list(pythonBackend.compiledPrograms) == [keys[1]]
+
+def test_deepNesting():
+    depth = 5000
+    # Redundant parentheses are dropped from the generated code.
+    program = analyzerOf("x:integer;\nx:=" + " ( " * depth + "1" + " ) " * depth + ";\n", useScanner=True).getProgram()
+    assert compilePython(program).run([]) == [1]
+    # Nesting that Python cannot compile is a CompileError, like the VM compiler's errors.
+    with pytest.raises(CompileError):
+        compilePython(analyzerOf("x:integer;\nx:=" + "- " * depth + "1;\n", useScanner=True).getProgram())
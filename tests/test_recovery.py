@@ -0,0 +1,36 @@
+import random
+
+import pytest
+
+from astNodes import packTree
+from tableParser import TableParser
+from conftest import analyzerOf, diagnosticsOf
+from test_tableParser import randomTokens, parseWith
+
+BROKEN = "x:integer;\nx:=1 2;\noutput<<;\nx:=3;\nif (x<) output<<x;\noutput<<x;\n"
+
+def test_everySyntaxErrorIsReported():
+    analyzer = analyzerOf(BROKEN + "y:=$;\n", useScanner=True, recoverSyntax=True)
+    assert [(diagnostic["line"], diagnostic["type"], diagnostic["message"]) for diagnostic in diagnosticsOf(analyzer)] == [
+        (2, "Syntax Error", "Expected ENDLINE after declaration, but got LITERAL_INTEGER"),
+        (3, "Syntax Error", "Expected an expression but got ENDLINE"),
+        (5, "Syntax Error", "Expected an expression but got DELIMITER_RIGHT_P"),
+        (7, "Syntax Error", "Expected ENDLINE at the end, but got err"), # y is undeclared.
+        (7, "Lexical Error", "Invalid Token Type."),
+    ]
+    with pytest.raises(SyntaxError, match="Expected ENDLINE after declaration, but got LITERAL_INTEGER"):
+        analyzer.getProgram()
+    # The lines that parsed are still there.
+    assert len(analyzer.program.statements) == 4
+
+def test_recoveryAgreesWithAPlainParse():
+    generator = random.Random(20)
+    for _ in range(3000):
+        tokens = randomTokens(generator)
+        plain = parseWith(TableParser, tokens)
+        parser = TableParser(tokens, recover=True)
+        program = parser.parse()
+        if isinstance(plain, str):
+            assert parser.errors and "error: " + parser.errors[0][0] == plain
+        else:
+            assert parser.errors == [] and packTree(program) == plain
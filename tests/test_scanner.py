@@ -0,0 +1,15 @@
+from conftest import SAMPLE, VALID, analyzerOf, tokensOf, assertSameAnalysis
+
+
+def test_scannerMatchesAtomizer():
+    for text in (SAMPLE, VALID, "", "\n\n", "x:integer;\n  x := 'a b' ;\n"):
+        atomizer = analyzerOf(text)
+        scanner = analyzerOf(text, useScanner=True)
+        assertSameAnalysis(scanner, atomizer)
+
+def test_scannerTokenTypes():
+    analyzer = analyzerOf("x:integer;\nx:=3.5 << $;\n", useScanner=True)
+    assert [token[0] for token in tokensOf(analyzer)] == [
+        "IDENTIFIER", "OP_COLON", "KEYWORD_INT", "ENDLINE",
+        "IDENTIFIER", "OP_ASSIGNMENT", "LITERAL_DOUBLE", "OP_LEFTSHIFT", "err", "ENDLINE",
+    ]
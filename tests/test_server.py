@@ -0,0 +1,80 @@
+import asyncio
+import json
+import threading
+import time
+
+import server
+from server import CheckServer, checkRequest, checkOverSocket
+from conftest import SAMPLE, VALID
+
+
+def test_checkRequest(sampleFile):
+    result = checkRequest({"source": VALID, "fileName": "valid.HL"})
+    assert result["fileName"] == "valid.HL" and result["diagnostics"] == [] and result["syntaxError"] is None
+    assert result["ast"]["node"] == "Program"
+    assert result["tokens"][0] == ["IDENTIFIER", "x", 0, 0]
+    assert result["symbolTable"]["x"]["data_type"] == "integer"
+    result = checkRequest({"path": sampleFile, "tokens": False, "recover": True})
+    assert "tokens" not in result and result["ast"] is None
+    assert result["syntaxError"] is not None
+    assert any(diagnostic["type"] == "Syntax Error" for diagnostic in result["diagnostics"])
+
+def test_handle():
+    async def run():
+        checks = CheckServer()
+        answers = [await checks.handle(json.dumps(request).encode()) for request in (
+            {"id": 1, "method": "ping"}, {"id": 2, "source": SAMPLE, "mode": "dfa"}, {"id": 3, "method": "nope"}, {"id": 4, "source": "", "mode": "nope"},
+        )]
+        answers.append(await checks.handle(b"[1, 2]"))
+        answers.append(await checks.handle(json.dumps({"id": 5, "method": "stats"}).encode()))
+        return answers
+    ping, check, unknown, badMode, notAnObject, stats = asyncio.run(run())
+    assert ping == {"id": 1, "ok": True, "result": "pong"}
+    assert check["ok"] and len(check["result"]["diagnostics"]) == 2
+    assert unknown == {"id": 3, "ok": False, "error": "ValueError: Unknown method 'nope'."}
+    assert not badMode["ok"] and not notAnObject["ok"]
+    assert stats["result"]["checks"] == 2 and stats["result"]["errors"] == 3
+
+def test_checksDoNotBlockTheLoop(monkeypatch):
+    # A long check runs off the event loop, a ping sent after it is answered first.
+    def slowCheck(request: dict) -> dict:
+        time.sleep(0.5)
+        return {"slow": True}
+    monkeypatch.setattr(server, "checkRequest", slowCheck)
+
+    async def run():
+        requests = asyncio.Queue()
+        for request in ({"id": "slow", "source": "x:integer;"}, {"id": "ping", "method": "ping"}):
+            requests.put_nowait((json.dumps(request) + "\n").encode())
+        requests.put_nowait(b"")
+        answered = []
+        async def write(data: bytes) -> None:
+            answered.append(json.loads(data)["id"])
+        await CheckServer().serveStream(requests.get, write)
+        return answered
+    assert asyncio.run(run()) == ["ping", "slow"]
+
+def test_unixSocket(tmp_path):
+    path = str(tmp_path / "check.sock")
+    checks = None
+    def serve():
+        nonlocal checks
+        async def run():
+            nonlocal checks
+            checks = CheckServer()
+            await checks.serveUnix(path)
+        asyncio.run(run())
+    thread = threading.Thread(target=serve)
+    thread.start()
+    try:
+        for _ in range(200):
+            try:
+                response = checkOverSocket(path, {"id": 1, "source": VALID, "ast": False})
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                time.sleep(0.01)
+        assert response["ok"] and response["result"]["ast"] is None and response["result"]["syntaxError"] is None
+    finally:
+        assert checkOverSocket(path, {"id": 2, "method": "shutdown"}) == {"id": 2, "ok": True, "result": "bye"}
+        thread.join(10)
+    assert not thread.is_alive()
@@ -0,0 +1,35 @@
+import io
+
+from dfaLexer import DFALexer
+from lexicalAnalyzer import iter_tokens
+from conftest import SAMPLE, VALID
+
+
+def expected(text: str) -> list:
+    # The tokens before the symbol table, placed by looking each one up after the previous one.
+    lines = text.split("\n")
+    result = []
+    line, column = 0, 0
+    for lexeme, typeToken in DFALexer(text).tokenize():
+        while lines[line].find(lexeme, column) == -1:
+            line, column = line + 1, 0
+        column = lines[line].find(lexeme, column)
+        result.append((typeToken, lexeme, line, column))
+        column += len(lexeme)
+    return result
+
+def test_streamingMatchesTheLexer():
+    text = SAMPLE + VALID * 3
+    for chunkSize in (1, 7, 64, 1 << 16):
+        assert list(iter_tokens(io.StringIO(text), chunkSize=chunkSize)) == expected(text)
+
+def test_streamingReadsPathsAndBytes(tmp_path):
+    text = "name:=\"é ü\";\n" + SAMPLE
+    path = tmp_path / "source.HL"
+    path.write_bytes(text.encode("utf-8"))
+    assert list(iter_tokens(io.BytesIO(text.encode("utf-8")), chunkSize=3)) == expected(text)
+    assert list(iter_tokens(str(path))) == expected(text)
+
+def test_streamingKeepsItsCacheBounded():
+    text = "".join(f"v{number}:=1;\n" for number in range(50))
+    assert list(iter_tokens(io.StringIO(text), cacheLimit=4)) == expected(text)
@@ -0,0 +1,32 @@
+from conftest import SAMPLE, analyzerOf, tokensOf, diagnosticsOf
+
+
+def test_sampleSymbolTable():
+    analyzer = analyzerOf(SAMPLE + "x:double;\n", useScanner=True)
+    assert analyzer.getSymbolTable().toDict() == {
+        "x": {"data_type": "integer", "value": 5, "first_line": 1, "last_line": 5},
+        "y": {"data_type": "double", "value": -2.75, "first_line": 2, "last_line": 6},
+        "name": {"data_type": "integer", "value": 7, "first_line": 3, "last_line": 8},
+    }
+    assert [diagnostic["message"] for diagnostic in diagnosticsOf(analyzer)] == [
+        "Invalid Token Type.", "Undeclared Variable z.", "Redeclaration Error of x previously in line: 1",
+    ]
+    # The rejected identifier becomes an err token everywhere it shows up.
+    assert ("err", "z", 8) in tokensOf(analyzer)
+
+def test_filesWithoutDeclarations():
+    for text in ("", "\n\n", "output<<'it''s';\n"):
+        assert analyzerOf(text).getSymbolTable() == {}
+
+def nameOf(number: int) -> str:
+    # Identifiers are letters only.
+    return "v" + "".join("abcdefghijklmnopqrstuvwxyz"[int(digit)] for digit in str(number))
+
+def test_manySymbols():
+    count = 3000
+    names = [nameOf(number) for number in range(count)]
+    text = "".join(f"{name}:integer;\n" for name in names) + "".join(f"{name}:={number};\n" for number, name in enumerate(names))
+    table = analyzerOf(text, useScanner=True).getSymbolTable()
+    assert list(table) == names
+    for number in (0, 1234, count - 1):
+        assert table[names[number]] == {"data_type": "integer", "value": number, "first_line": number + 1, "last_line": count + number + 1}
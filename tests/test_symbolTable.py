@@ -0,0 +1,48 @@
+import pickle
+
+from symbolTable import SymbolTable, SymbolType, literalValue
+from tokenStream import TokenCode
+from conftest import SAMPLE, analyzerOf
+
+
+def test_literalValue():
+    assert literalValue('"a b"', SymbolType.INTEGER) == "a b"
+    assert literalValue("2.75", SymbolType.DOUBLE) == 2.75
+    assert literalValue("2.75", SymbolType.INTEGER) == 2
+    assert literalValue("7", SymbolType.UNDECLARED) == 7
+
+def test_records():
+    table = SymbolTable()
+    x, y = table.add("x"), table.add("y")
+    assert table.add("x") == x and (x, y) == (0, 1)
+    table.declare(x, SymbolType.INTEGER, 1)
+    table.assign(x, 5, 3)
+    table.assign(y, 2, 4)
+    assert table["x"] == {"data_type": "integer", "value": 5, "first_line": 1, "last_line": 3}
+    assert table["y"] == {"data_type": None, "value": 2, "first_line": 4, "last_line": 4}
+    assert table.rejects() == [y]
+    table.compact()
+    assert list(table) == ["x"] and "y" not in table and table.ids == {"x": 0}
+
+def test_positionIndex():
+    analyzer = analyzerOf("a:integer;\nb:=a+b;\na:=b;\n", useScanner=True)
+    stream = analyzer.getTokenStream()
+    table = SymbolTable()
+    for name in ("a", "b"):
+        table.add(name)
+    table.indexTokens(stream, analyzer.tokensCopy, TokenCode.IDENTIFIER) # The types from before b was rejected.
+    assert [stream.lexeme(position) for position in table.positionsOf(0)] == ["a", "a", "a"]
+    assert list(table.positionsOf(1)) == [4, 8, 12]
+
+def test_rejectedIdentifiersBecomeErr():
+    analyzer = analyzerOf(SAMPLE, useScanner=True)
+    table = analyzer.getSymbolTable()
+    assert "z" not in table and table.rejects() == []
+    stream = analyzer.getTokenStream()
+    assert {stream.typeName(index) for index in range(len(stream)) if stream.lexeme(index) == "z"} == {"err"}
+
+def test_pickleKeepsTheRecords():
+    table = analyzerOf(SAMPLE, useScanner=True).getSymbolTable()
+    copy = pickle.loads(pickle.dumps(table))
+    assert copy == table and copy.toDict() == table.toDict()
+    assert copy.ids == table.ids
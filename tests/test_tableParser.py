@@ -0,0 +1,61 @@
+import random
+
+import tableGenerator
+from Parser import Parser
+from astNodes import packTree
+from tableParser import TableParser
+from conftest import GRAMMAR_FILE, SAMPLE, VALID, analyzerOf
+
+LEXEMES = {"IDENTIFIER": ["x", "y"], "LITERAL_INTEGER": ["1", "7"], "LITERAL_DOUBLE": ["2.5"], "LITERAL_STRING": ['"hi"']}
+COMMON = ["IDENTIFIER", "OP_COLON", "OP_ASSIGNMENT", "ENDLINE", "KEYWORD_INT", "KEYWORD_DOUBLE", "KEYWORD_OUTPUT", "OP_LEFTSHIFT",
+          "KEYWORD_IF", "DELIMITER_LEFT_P", "DELIMITER_RIGHT_P", "LITERAL_INTEGER", "OP_ARITHMETIC_PLUS", "OP_ARITHMETIC_MINUS",
+          "OP_ARITHMETIC_MULTIPLY", "LITERAL_STRING", "OP_RELATIONAL_LESSTHAN", "LITERAL_DOUBLE", "err", "OP_ARITHMETIC_DIVIDE"]
+TEMPLATES = [
+    ["IDENTIFIER", "OP_COLON", "KEYWORD_INT", "ENDLINE"],
+    ["IDENTIFIER", "OP_ASSIGNMENT", "IDENTIFIER", "OP_ARITHMETIC_PLUS", "LITERAL_INTEGER", "OP_ARITHMETIC_MULTIPLY", "IDENTIFIER", "ENDLINE"],
+    ["KEYWORD_OUTPUT", "OP_LEFTSHIFT", "LITERAL_STRING", "ENDLINE"],
+    ["KEYWORD_IF", "DELIMITER_LEFT_P", "IDENTIFIER", "OP_RELATIONAL_LESSTHAN", "LITERAL_INTEGER", "DELIMITER_RIGHT_P",
+     "KEYWORD_OUTPUT", "OP_LEFTSHIFT", "DELIMITER_LEFT_P", "IDENTIFIER", "OP_ARITHMETIC_MINUS", "IDENTIFIER", "DELIMITER_RIGHT_P", "OP_ARITHMETIC_DIVIDE", "LITERAL_INTEGER", "ENDLINE"],
+]
+
+def randomTokens(generator: random.Random) -> list:
+    """ This function will return a few statements with some of their tokens dropped, added or replaced, as parser tuples."""
+    names = []
+    for _ in range(generator.randint(0, 4)):
+        statement = list(generator.choice(TEMPLATES))
+        for _ in range(generator.choice([0, 0, 1, 2])):
+            position = generator.randrange(len(statement))
+            operation = generator.random()
+            if operation < 0.4:
+                del statement[position]
+            elif operation < 0.8:
+                statement.insert(position, generator.choice(COMMON))
+            else:
+                statement[position] = generator.choice(COMMON)
+        names += statement
+    return [(name, generator.choice(LEXEMES.get(name, [name.lower()])), index // 3) for index, name in enumerate(names)]
+
+def parseWith(parserClass, tokens):
+    try:
+        return packTree(parserClass(tokens).parse())
+    except SyntaxError as error:
+        return f"error: {error}"
+
+def test_tablesAreUpToDate():
+    assert not tableGenerator.isStale(GRAMMAR_FILE)
+
+def test_sameTreesAsTheRecursiveParser():
+    for text in (VALID, SAMPLE):
+        stream = analyzerOf(text, useScanner=True).getTokenStream()
+        assert parseWith(TableParser, stream) == parseWith(Parser, stream)
+
+def test_sameResultsOnRandomTokens():
+    generator = random.Random(19)
+    for _ in range(3000):
+        tokens = randomTokens(generator)
+        assert parseWith(TableParser, tokens) == parseWith(Parser, tokens)
+
+def test_deepNestingNeedsNoRecursion():
+    depth = 20000
+    tokens = [("IDENTIFIER", "x", 0), ("OP_ASSIGNMENT", ":=", 0)] + [("DELIMITER_LEFT_P", "(", 0)] * depth + [("LITERAL_INTEGER", "1", 0)] + [("DELIMITER_RIGHT_P", ")", 0)] * depth + [("ENDLINE", ";", 0)]
+    assert len(TableParser(tokens).parse().statements) == 1
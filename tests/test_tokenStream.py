@@ -0,0 +1,34 @@
+from tokenStream import TokenStream, TokenCode, TOKEN_NAMES, TOKEN_CODES
+from conftest import SAMPLE, analyzerOf
+
+
+def test_codesAndNames():
+    assert [TOKEN_CODES[name] for name in TOKEN_NAMES] == list(range(len(TOKEN_NAMES)))
+    assert TOKEN_NAMES[TokenCode.err] == "err"
+
+def test_columns():
+    source = "x:=5;"
+    stream = TokenStream(source)
+    stream.append(TokenCode.IDENTIFIER, 0, 1, 0)
+    stream.appendText(TokenCode.OP_ASSIGNMENT, 1, ":=", 0)
+    stream.appendText(TokenCode.LITERAL_INTEGER, 3, "55", 0) # Not a slice of the source.
+    assert len(stream) == 3
+    assert stream.types.typecode == "B" and stream.starts.typecode == "q"
+    assert [stream.lexeme(index) for index in range(3)] == ["x", ":=", "55"]
+    assert stream.overrides == {2: "55"}
+    assert stream.asParserTuples() == [("IDENTIFIER", "x"), ("OP_ASSIGNMENT", ":="), ("LITERAL_INTEGER", "55")]
+
+def test_bytesSource():
+    stream = TokenStream("é:=1;".encode("utf-8"))
+    stream.append(TokenCode.err, 0, 2, 0)
+    assert stream.lexeme(0) == "é"
+
+def test_tupleView():
+    analyzer = analyzerOf(SAMPLE, useScanner=True)
+    stream = analyzer.getTokenStream()
+    tuples = stream.asTuples()
+    assert tuples == analyzer.getTokens()
+    assert tuples[0] == ("x", "IDENTIFIER") and tuples[-1] == (";", "ENDLINE")
+    assert tuples[1:3] == [(":", "OP_COLON"), ("integer", "KEYWORD_INT")]
+    tuples[0] = ("x", "err") # Only the type changes.
+    assert stream.typeName(0) == "err" and stream.lexeme(0) == "x"
@@ -0,0 +1,52 @@
+import io
+
+import pytest
+
+from astNodes import Program, Declaration, Assignment, Output, Literal
+from compiler import CompileError, compileProgram
+from tokenStream import TokenCode
+from virtualMachine import VMError, VirtualMachine, runProgram
+from conftest import VALID, analyzerOf
+
+
+def compileText(text: str):
+    return compileProgram(analyzerOf(text, useScanner=True).getProgram())
+
+def test_runsTheProgram():
+    machine = VirtualMachine()
+    assert machine.run(compileText(VALID)) == [9, 3.5]
+    assert machine.getOutput() == "Hello World!\n9\n-1.375\n3.5\n"
+
+def test_writesToAStream():
+    output = io.StringIO()
+    text = "x:integer;\nx:=0;\n" + "x:=x+1;\noutput<<x;\n" * 30
+    VirtualMachine(output, bufferLimit=4).run(compileText(text))
+    assert output.getvalue() == "".join(f"{number}\n" for number in range(1, 31))
+    output = io.StringIO()
+    runProgram(compileText(VALID), output)
+    assert output.getvalue().startswith("Hello World!\n")
+
+def test_constantsKeepTheirKind():
+    # 1 and 1.0, 0.0 and -0.0 are different constants.
+    program = Program([
+        Declaration("y", TokenCode.KEYWORD_DOUBLE), Declaration("x", TokenCode.KEYWORD_INT),
+        Assignment("x", Literal(TokenCode.LITERAL_INTEGER, 1)), Output(Literal(TokenCode.LITERAL_DOUBLE, 1.0)),
+        Output(Literal(TokenCode.LITERAL_DOUBLE, 0.0)), Output(Literal(TokenCode.LITERAL_DOUBLE, -0.0)),
+    ])
+    machine = VirtualMachine()
+    machine.run(compileProgram(program))
+    assert machine.getOutput() == "1.0\n0.0\n-0.0\n"
+
+def test_deepNesting():
+    # As deep as the source nests, without recursion.
+    depth = 5000
+    text = "x:integer;\nx:=" + "+".join(["1"] * depth) + ";\n" + "if (x<9999) " * depth + "output<< " + "- ( " * depth + "x" + " )" * depth + ";\n"
+    machine = VirtualMachine()
+    machine.run(compileText(text))
+    assert machine.getOutput() == f"{depth}\n"
+
+def test_errors():
+    with pytest.raises(VMError, match="Division by zero"):
+        VirtualMachine().run(compileText("x:integer;\nx:=0;\nx:=1/x;\n"))
+    with pytest.raises(CompileError, match="line 2: Undeclared Variable q."):
+        compileProgram(Program([Assignment("q", Literal(TokenCode.LITERAL_INTEGER, 1), 1)]))
@@ -0,0 +1,120 @@
+from array import array # For the compact columns.
+from enum import IntEnum
+
+# One central numbering of the token types, shared by the lexer, the parser and anything downstream.
+# Same leaves, same order as lexicalAnalyzer.tokenLeaves(), with err in front. lexicalAnalyzer.py checks this at import.
+class TokenCode(IntEnum):
+    err = 0
+    KEYWORD_INT = 1
+    KEYWORD_DOUBLE = 2
+    KEYWORD_IF = 3
+    KEYWORD_OUTPUT = 4
+    IDENTIFIER = 5
+    LITERAL_DOUBLE = 6
+    LITERAL_INTEGER = 7
+    LITERAL_STRING = 8
+    ENDLINE = 9
+    OP_ASSIGNMENT = 10
+    OP_COLON = 11
+    OP_EQUAL = 12
+    OP_LEFTSHIFT = 13
+    OP_ARITHMETIC_PLUS = 14
+    OP_ARITHMETIC_MINUS = 15
+    OP_ARITHMETIC_MULTIPLY = 16
+    OP_ARITHMETIC_DIVIDE = 17
+    OP_RELATIONAL_ISEQUAL = 18
+    OP_RELATIONAL_NOTEQUAL = 19
+    OP_RELATIONAL_LESSTHAN = 20
+    OP_RELATIONAL_LESSTHANOREQUAL = 21
+    OP_RELATIONAL_GREATERTHAN = 22
+    OP_RELATIONAL_GREATERTHANOREQUAL = 23
+    DELIMITER_LEFT_P = 24
+    DELIMITER_RIGHT_P = 25
+
+# Plain lookups, cheaper than going through the enum in hot loops.
+TOKEN_NAMES = tuple(code.name for code in TokenCode)
+TOKEN_CODES = {name: code for code, name in enumerate(TOKEN_NAMES)}
+
+
+class TokenStream:
+    """ Column store of the tokens of one source: type ids, start/end offsets into the source, and line numbers."""
+    # The lexeme is only sliced out of the source when somebody asks for it.
+    # Tokens whose text is not a plain slice of the source (atomizer() can glue a quote to the atom before it) keep their text in `overrides`.
+
+    def __init__(self, source) -> None:
+        self.source = source
+        # A bytes-like source (bytes, an mmap) is sliced through a memoryview and decoded one lexeme at a time, only when asked for.
+        self.view = None if isinstance(source, str) else memoryview(source)
+        self.types = array('B')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.lines = array('L') # Line count starts at 0.
+        self.overrides = {}
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def append(self, code: int, start: int, end: int, line: int) -> None:
+        self.types.append(code)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+
+    def appendText(self, code: int, start: int, token: str, line: int) -> None:
+        """ This function will append a token whose text might not be a slice of the source."""
+        end = start + len(token)
+        if self.source[start:end] != token:
+            self.overrides[len(self.types)] = token
+        self.append(code, start, end, line)
+
+    def lexeme(self, index: int) -> str:
+        if self.overrides and index in self.overrides:
+            return self.overrides[index]
+        if self.view is not None:
+            return str(self.view[self.starts[index]:self.ends[index]], "utf-8")
+        return self.source[self.starts[index]:self.ends[index]]
+
+    def typeName(self, index: int) -> str:
+        return TOKEN_NAMES[self.types[index]]
+
+    def setType(self, index: int, code: int) -> None:
+        self.types[index] = code
+
+    def asTuples(self) -> "TokenTuples":
+        """ This function will return the old (token, type) list view."""
+        return TokenTuples(self)
+
+    def asParserTuples(self) -> list:
+        """ This function will return the old (type, token) list the parser used to take."""
+        return [(TOKEN_NAMES[self.types[index]], self.lexeme(index)) for index in range(len(self.types))]
+
+
+class TokenTuples:
+    """ Thin (token, type) list view over a TokenStream, for code written against the old tuple list."""
+    def __init__(self, stream: TokenStream) -> None:
+        self.stream = stream
+
+    def __len__(self) -> int:
+        return len(self.stream)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self.stream)))]
+        if index < 0:
+            index += len(self.stream)
+        return (self.stream.lexeme(index), self.stream.typeName(index))
+
+    def __setitem__(self, index: int, token: tuple) -> None:
+        # Only the type can change, the text is where it is in the source.
+        self.stream.setType(index, TOKEN_CODES[token[1]])
+
+    def __iter__(self):
+        stream = self.stream
+        for index in range(len(stream)):
+            yield (stream.lexeme(index), TOKEN_NAMES[stream.types[index]])
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def copy(self) -> list:
+        return list(self)
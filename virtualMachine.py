@@ -0,0 +1,151 @@
+import sys
+
+from bytecode import Opcode, CodeObject
+from tokenStream import TokenCode
+
+# Stack machine for the CodeObjects of compiler.py.
+# The dispatch loop only touches locals, and the most frequent opcodes are tested first.
+# Output is buffered and written in large blocks instead of one write per output statement.
+
+default_buffer_limit = 1 << 12 # Pending outputs before the buffer is written out.
+
+HALT = int(Opcode.HALT)
+LOAD_CONST = int(Opcode.LOAD_CONST)
+LOAD = int(Opcode.LOAD)
+STORE = int(Opcode.STORE)
+ADD_INT = int(Opcode.ADD_INT)
+SUB_INT = int(Opcode.SUB_INT)
+MUL_INT = int(Opcode.MUL_INT)
+DIV_INT = int(Opcode.DIV_INT)
+ADD_DOUBLE = int(Opcode.ADD_DOUBLE)
+SUB_DOUBLE = int(Opcode.SUB_DOUBLE)
+MUL_DOUBLE = int(Opcode.MUL_DOUBLE)
+DIV_DOUBLE = int(Opcode.DIV_DOUBLE)
+NEGATE = int(Opcode.NEGATE)
+TO_INT = int(Opcode.TO_INT)
+TO_DOUBLE = int(Opcode.TO_DOUBLE)
+ISEQUAL = int(Opcode.ISEQUAL)
+NOTEQUAL = int(Opcode.NOTEQUAL)
+LESSTHAN = int(Opcode.LESSTHAN)
+LESSTHANOREQUAL = int(Opcode.LESSTHANOREQUAL)
+GREATERTHAN = int(Opcode.GREATERTHAN)
+GREATERTHANOREQUAL = int(Opcode.GREATERTHANOREQUAL)
+JUMP = int(Opcode.JUMP)
+JUMP_IF_FALSE = int(Opcode.JUMP_IF_FALSE)
+OUTPUT = int(Opcode.OUTPUT)
+
+
+class VMError(Exception):
+    pass
+
+
+class VirtualMachine:
+    def __init__(self, output = None, bufferLimit: int = default_buffer_limit) -> None:
+        self.output = output # Anything with write(), None keeps the output in memory only.
+        self.bufferLimit = bufferLimit
+        self.buffer = []
+        self.written = [] # Everything that was output, when there is no stream to write to.
+        self.slots = []
+
+    def flush(self) -> None:
+        if not self.buffer:
+            return
+        text = "".join(self.buffer)
+        self.buffer = []
+        if self.output is None:
+            self.written.append(text)
+        else:
+            self.output.write(text)
+
+    def getOutput(self) -> str:
+        """ This function will return what the program output, when running without a stream."""
+        return "".join(self.written) + "".join(self.buffer)
+
+    def run(self, code: CodeObject) -> list:
+        """ This function will run a program and return the final value of every slot."""
+        instructions = code.instructions.tolist() # A list indexes faster than an array.
+        constants = code.constants
+        slots = [0 if slotType == TokenCode.KEYWORD_INT else 0.0 for slotType in code.slotTypes]
+        self.slots = slots
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        buffer = self.buffer
+        bufferLimit = self.bufferLimit
+
+        pc = 0
+        try:
+            while True:
+                opcode = instructions[pc]
+                argument = instructions[pc + 1]
+                pc += 2
+                if opcode == LOAD:
+                    push(slots[argument])
+                elif opcode == LOAD_CONST:
+                    push(constants[argument])
+                elif opcode == STORE:
+                    slots[argument] = pop()
+                elif opcode == ADD_INT or opcode == ADD_DOUBLE:
+                    right = pop()
+                    stack[-1] += right
+                elif opcode == SUB_INT or opcode == SUB_DOUBLE:
+                    right = pop()
+                    stack[-1] -= right
+                elif opcode == MUL_INT or opcode == MUL_DOUBLE:
+                    right = pop()
+                    stack[-1] *= right
+                elif opcode == JUMP_IF_FALSE:
+                    if not pop():
+                        pc = argument
+                elif opcode == OUTPUT:
+                    buffer.append(f"{pop()}\n")
+                    if len(buffer) >= bufferLimit:
+                        self.flush()
+                        buffer = self.buffer
+                elif opcode == DIV_INT:
+                    right = pop()
+                    left = stack[-1]
+                    quotient = abs(left) // abs(right)
+                    stack[-1] = quotient if (left < 0) == (right < 0) else -quotient
+                elif opcode == DIV_DOUBLE:
+                    right = pop()
+                    stack[-1] /= right
+                elif opcode == ISEQUAL:
+                    right = pop()
+                    stack[-1] = 1 if stack[-1] == right else 0
+                elif opcode == NOTEQUAL:
+                    right = pop()
+                    stack[-1] = 1 if stack[-1] != right else 0
+                elif opcode == LESSTHAN:
+                    right = pop()
+                    stack[-1] = 1 if stack[-1] < right else 0
+                elif opcode == LESSTHANOREQUAL:
+                    right = pop()
+                    stack[-1] = 1 if stack[-1] <= right else 0
+                elif opcode == GREATERTHAN:
+                    right = pop()
+                    stack[-1] = 1 if stack[-1] > right else 0
+                elif opcode == GREATERTHANOREQUAL:
+                    right = pop()
+                    stack[-1] = 1 if stack[-1] >= right else 0
+                elif opcode == NEGATE:
+                    stack[-1] = -stack[-1]
+                elif opcode == TO_DOUBLE:
+                    stack[-1 - argument] = float(stack[-1 - argument])
+                elif opcode == TO_INT:
+                    stack[-1 - argument] = int(stack[-1 - argument]) # Truncates, like the symbol table does with a double literal.
+                elif opcode == JUMP:
+                    pc = argument
+                elif opcode == HALT:
+                    break
+                else:
+                    raise VMError(f"Unknown opcode {opcode} at {pc - 2}.")
+        except ZeroDivisionError:
+            raise VMError(f"Division by zero at {pc - 2}.") from None
+        finally:
+            self.flush()
+        return slots
+
+
+def runProgram(code: CodeObject, output = sys.stdout) -> list:
+    return VirtualMachine(output).run(code)